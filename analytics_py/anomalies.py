@@ -0,0 +1,137 @@
+import warnings
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+DEFAULT_WINDOW = 8
+DEFAULT_THRESHOLD = 3.5  # Iglewicz-Hoaglin cut-off for the modified z-score
+MAD_TO_SIGMA = 0.6745
+MEAN_AD_TO_SIGMA = 0.7979
+# A doctor billing the exact same amount every week has MAD == 0; the scale is
+# floored at this fraction of the median so a spike still gets a finite score
+MIN_RELATIVE_SCALE = 0.01
+
+
+def weekly_means(df: pd.DataFrame) -> pd.DataFrame:
+    """(doctor_name, week, avg): weekly mean of the daily mean aih_value.
+
+    Expects discharge_date already parsed and aih_value numeric; rows without
+    a date are dropped.
+    """
+    df = df[df["discharge_date"].notna()]
+    if df.empty:
+        return pd.DataFrame({"doctor_name": pd.Series(dtype=object), "week": pd.Series(dtype="datetime64[ns]"),
+                             "avg": pd.Series(dtype=float)})
+    daily = df.groupby(["doctor_name", pd.Grouper(key="discharge_date", freq="D")]).agg(
+        avg=("aih_value", "mean")
+    ).reset_index()
+    daily["week"] = daily["discharge_date"].dt.to_period("W").dt.start_time
+    return daily.groupby(["doctor_name", "week"]).agg(avg=("avg", "mean")).reset_index()
+
+
+def week_matrix(weekly: pd.DataFrame, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Doctor x week matrix over every week from `start` (or the first week) to
+    the last one; weeks without discharges are NaN."""
+    matrix = weekly.pivot(index="doctor_name", columns="week", values="avg")
+    first = start if start is not None else matrix.columns.min()
+    weeks = pd.period_range(first, matrix.columns.max(), freq="W").start_time
+    return matrix.reindex(columns=weeks)
+
+
+def robust_scores(values: np.ndarray, history: np.ndarray, min_periods: int) -> Dict[str, np.ndarray]:
+    """Modified z-score of each cell against the `window` weeks before it.
+
+    values: (doctors, weeks); history: (doctors, window) weeks preceding
+    values[:, 0] (NaN where unknown). Every window of every doctor is reduced
+    in one nanmedian call over a strided (doctors, weeks, window) view.
+    """
+    window = history.shape[1]
+    full = np.concatenate([history, values], axis=1)
+    windows = sliding_window_view(full, window, axis=1)[:, :values.shape[1]]
+    counts = np.count_nonzero(~np.isnan(windows), axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # All-NaN windows (new doctors, gaps) are expected; they score NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        median = np.nanmedian(windows, axis=2)
+        deviation = np.abs(windows - median[..., None])
+        mad = np.nanmedian(deviation, axis=2)
+        scale = np.where(mad > 0, mad / MAD_TO_SIGMA, np.nanmean(deviation, axis=2) / MEAN_AD_TO_SIGMA)
+        scale = np.maximum(scale, MIN_RELATIVE_SCALE * np.abs(median))
+        z = (values - median) / scale
+    z[(counts < min_periods) | ~np.isfinite(z)] = np.nan
+    return {"median": median, "mad": mad, "z": z, "history": counts}
+
+
+def load_state(state: Optional[Dict[str, Any]], window: int) -> Tuple[Optional[pd.Timestamp], pd.DataFrame]:
+    """Previous response state -> (last scored week, doctor x window history)."""
+    if not state:
+        return None, pd.DataFrame(columns=range(window), dtype=float)
+    if int(state.get("window", 0)) != window:
+        raise ValueError(f"state was built with window={state.get('window')}, not {window}")
+    try:
+        last_week = pd.Timestamp(state["lastWeek"])
+        history = pd.DataFrame.from_dict(state["doctors"], orient="index", dtype=float)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("malformed anomaly state")
+    if history.shape[1] != window and len(history):
+        raise ValueError("malformed anomaly state")
+    history.columns = range(window)
+    return last_week, history
+
+
+def dump_state(history: pd.DataFrame, last_week: pd.Timestamp, window: int) -> Dict[str, Any]:
+    """Trailing window per doctor, enough to score the next appended weeks."""
+    tail = history.astype(object).where(history.notna(), None)
+    return {
+        "window": window,
+        "lastWeek": last_week.strftime("%Y-%m-%d"),
+        "doctors": {str(doctor): list(values) for doctor, values in zip(tail.index, tail.to_numpy().tolist())},
+    }
+
+
+def score_anomalies(weekly: pd.DataFrame, window: int = DEFAULT_WINDOW, min_periods: Optional[int] = None,
+                    state: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Score every doctor-week in `weekly` (weekly_means output).
+
+    With `state` (from a previous call) only weeks after state["lastWeek"] are
+    expected; the stored windows are reused instead of re-sending old weeks.
+    Returns (long frame of scored cells, new state).
+    """
+    min_periods = min_periods or max(3, window // 2)
+    last_week, history = load_state(state, window)
+    if last_week is not None and (weekly["week"] <= last_week).any():
+        raise ValueError(f"rows must start after the state's last week ({last_week:%Y-%m-%d})")
+
+    start = last_week + pd.Timedelta(weeks=1) if last_week is not None else None
+    matrix = week_matrix(weekly, start)
+    doctors = matrix.index.union(history.index)
+    matrix = matrix.reindex(doctors)
+    past = history.reindex(doctors).to_numpy(dtype=float)
+
+    scores = robust_scores(matrix.to_numpy(dtype=float), past, min_periods)
+    weeks = matrix.columns
+    cells = pd.DataFrame({
+        "doctor": np.repeat(doctors.to_numpy(), len(weeks)),
+        "week": np.tile(weeks.to_numpy(), len(doctors)),
+        "value": matrix.to_numpy(dtype=float).ravel(),
+        "median": scores["median"].ravel(),
+        "mad": scores["mad"].ravel(),
+        "z": scores["z"].ravel(),
+        "history": scores["history"].ravel(),
+    })
+    cells = cells[cells["value"].notna()]
+
+    full = np.concatenate([past, matrix.to_numpy(dtype=float)], axis=1)[:, -window:]
+    new_state = dump_state(pd.DataFrame(full, index=doctors), weeks[-1], window)
+    return cells, new_state
+
+
+def flag(cells: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD) -> pd.DataFrame:
+    """Cells with |z| >= threshold, most severe first."""
+    flagged = cells[cells["z"].abs() >= threshold].copy()
+    flagged["severity"] = flagged["z"].abs()
+    flagged["direction"] = np.where(flagged["z"] > 0, "high", "low")
+    return flagged.sort_values("severity", ascending=False, kind="stable")
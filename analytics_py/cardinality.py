@@ -0,0 +1,163 @@
+import base64
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_PRECISION = 12  # 4096 registers per sketch, ~1.6% standard error
+MIN_PRECISION, MAX_PRECISION = 4, 18
+_HEADER = struct.Struct(">3sBB")
+_MAGIC, _VERSION = b"HLL", 1
+# Response field -> row column whose distinct values it counts
+METRICS = {"patients": "patient_id", "aihs": "aih_id"}
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Stable 64-bit hashes (same value -> same hash in every process)."""
+    return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(w: np.ndarray) -> np.ndarray:
+    n = np.zeros(len(w), dtype=np.uint8)
+    w = w.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = w >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        w[big] >>= np.uint64(shift)
+    return n + (w > 0).astype(np.uint8)
+
+
+def register_updates(hashes: np.ndarray, p: int):
+    """Hash -> (register index, rank): top p bits pick the register, rank is the
+    position of the first 1 bit in the remaining 64 - p."""
+    rest = 64 - p
+    idx = (hashes >> np.uint64(rest)).astype(np.intp)
+    low = hashes & np.uint64((1 << rest) - 1)
+    rank = (rest + 1 - _bit_length(low).astype(np.int64)).astype(np.uint8)
+    return idx, rank
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """Cardinality estimate for each row of a (groups, m) register matrix."""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    # Small range: linear counting while there are empty registers
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with a fixed 2**p bytes of state."""
+
+    def __init__(self, p: int = DEFAULT_PRECISION, registers: Optional[np.ndarray] = None):
+        if not MIN_PRECISION <= p <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8) if registers is None else registers
+
+    def add(self, values: pd.Series) -> "HyperLogLog":
+        values = values.dropna()
+        if len(values):
+            idx, rank = register_updates(hash_values(values), self.p)
+            np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """In-place union; both sketches must share the same precision."""
+        if other.p != self.p:
+            raise ValueError(f"cannot merge sketches of precision {self.p} and {other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        return float(estimate(self.registers)[0])
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, _VERSION, self.p) + zlib.compress(self.registers.tobytes(), 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        if len(data) < _HEADER.size:
+            raise ValueError("truncated sketch")
+        magic, version, p = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a HyperLogLog sketch")
+        try:
+            registers = np.frombuffer(zlib.decompress(data[_HEADER.size:]), dtype=np.uint8).copy()
+        except zlib.error:
+            raise ValueError("corrupt sketch")
+        if len(registers) != 1 << p:
+            raise ValueError("corrupt sketch")
+        return cls(p, registers)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_base64(cls, text: str) -> "HyperLogLog":
+        try:
+            data = base64.b64decode(text, validate=True)
+        except ValueError:
+            raise ValueError("sketch is not valid base64")
+        return cls.from_bytes(data)
+
+
+def group_sketches(keys: pd.Series, values: pd.Series, p: int = DEFAULT_PRECISION) -> Dict[str, HyperLogLog]:
+    """One sketch per distinct key, built for all groups in a single pass."""
+    valid = keys.notna() & values.notna()
+    keys, values = keys[valid], values[valid]
+    codes, uniques = pd.factorize(keys)
+    registers = np.zeros((len(uniques), 1 << p), dtype=np.uint8)
+    if len(codes):
+        idx, rank = register_updates(hash_values(values), p)
+        np.maximum.at(registers, (codes, idx), rank)
+    return {str(key): HyperLogLog(p, registers[i]) for i, key in enumerate(uniques)}
+
+
+def cardinality_by(df: pd.DataFrame, key: str, p: int = DEFAULT_PRECISION) -> pd.DataFrame:
+    """Per-`key` aih_value total plus a sketch for each of METRICS.
+
+    Returns one row per key with `value`, `rows` and, per metric, the estimate
+    and the sketch object (column `<metric>_sketch`) to merge or store.
+    """
+    valid = df[key].notna()
+    grp = df.loc[valid].groupby(key, sort=False).agg(value=("aih_value", "sum"), rows=("aih_value", "size"))
+    out = grp.reset_index().rename(columns={key: "key"})
+    out["key"] = out["key"].astype(str)
+    for metric, column_name in METRICS.items():
+        column = df[column_name] if column_name in df else pd.Series(None, index=df.index, dtype=object)
+        sketches = group_sketches(df[key], column, p)
+        out[f"{metric}_sketch"] = [sketches.get(k) or HyperLogLog(p) for k in out["key"]]
+        out[metric] = estimate(np.stack([s.registers for s in out[f"{metric}_sketch"]])) if len(out) else []
+    return out.sort_values("value", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def merge_sketches(encoded: Iterable[str]) -> HyperLogLog:
+    """Union of base64 sketches (e.g. cached monthly buckets) -> one sketch."""
+    merged: Optional[HyperLogLog] = None
+    for text in encoded:
+        sketch = HyperLogLog.from_base64(text)
+        merged = sketch if merged is None else merged.merge(sketch)
+    if merged is None:
+        raise ValueError("no sketches to merge")
+    return merged
+
+
+def entries(table: pd.DataFrame, include_sketches: bool = False) -> List[Dict]:
+    """cardinality_by output -> JSON rows (estimates rounded to whole counts)."""
+    rows = []
+    for r in table.to_dict("records"):
+        row = {"key": r["key"], "value": float(r["value"]), "rows": int(r["rows"])}
+        for metric in METRICS:
+            row[metric] = int(round(r[metric]))
+        if include_sketches:
+            row["sketches"] = {metric: r[f"{metric}_sketch"].to_base64() for metric in METRICS}
+        rows.append(row)
+    return rows
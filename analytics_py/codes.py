@@ -0,0 +1,17 @@
+import re
+from typing import Any
+
+
+CODE_RE = re.compile(r"(\d{2}\.\d{2}\.\d{2}\.\d{3}-\d)")
+
+
+def normalize_code(raw: Any) -> str:
+    """Procedure cell ('04.01.02.004-5 EXCISÃO...', '0401020045') -> '04.01.02.004-5'."""
+    s = str(raw or "").strip()
+    m = CODE_RE.search(s)
+    if m:
+        return m.group(1)
+    digits = re.sub(r"\D", "", s)
+    if len(digits) >= 10:
+        return f"{digits[0:2]}.{digits[2:4]}.{digits[4:6]}.{digits[6:9]}-{digits[9]}"
+    return ""
@@ -0,0 +1,84 @@
+"""Measure cold start: process spawn -> first /health response -> /health/ready.
+
+    python cold_start.py                      # uvicorn, default warm-up mode
+    python cold_start.py --mode blocking --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, None
+
+
+def measure(mode: str, timeout: float = 60.0) -> dict:
+    port = _free_port()
+    env = {**os.environ, "ANALYTICS_WARMUP": mode}
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    base = f"http://127.0.0.1:{port}"
+    first_response = ready = None
+    body = None
+    try:
+        while time.monotonic() - started < timeout:
+            if first_response is None:
+                status, _ = _get(f"{base}/health/live")
+                if status == 200:
+                    first_response = time.monotonic() - started
+            if first_response is not None:
+                status, body = _get(f"{base}/health/ready")
+                if status == 200:
+                    ready = time.monotonic() - started
+                    break
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {
+        "first_response_seconds": round(first_response, 3) if first_response else None,
+        "ready_seconds": round(ready, 3) if ready else None,
+        "warmup": (body or {}).get("warmup"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start timing for the analytics service")
+    parser.add_argument("--mode", choices=["background", "blocking", "off"], default="background")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure(args.mode) for _ in range(max(1, args.runs))]
+    for r in runs:
+        print(json.dumps(r))
+    firsts = [r["first_response_seconds"] for r in runs if r["first_response_seconds"]]
+    readies = [r["ready_seconds"] for r in runs if r["ready_seconds"]]
+    print(json.dumps({
+        "mode": args.mode,
+        "median_first_response_seconds": statistics.median(firsts) if firsts else None,
+        "median_ready_seconds": statistics.median(readies) if readies else None,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def daily_aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    """(doctor_name, day, total, count): the one pass over the raw rows.
+
+    Expects discharge_date already parsed and aih_value numeric; rows without
+    a date are dropped.
+    """
+    dated = df[df["discharge_date"].notna()]
+    return dated.groupby(["doctor_name", dated["discharge_date"].dt.normalize().rename("day")]).agg(
+        total=("aih_value", "sum"), count=("aih_value", "size")
+    ).reset_index()
+
+
+def comparison_bounds(start: pd.Timestamp, end: pd.Timestamp, offset: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Comparison period for [start, end] (inclusive days).
+
+    month/year shift by 1/12 calendar months, keeping whole months whole
+    (Feb 2024 vs Jan 2024, not Jan 1-29); previous is the equally long period
+    right before start.
+    """
+    if offset == "previous":
+        length = end - start + pd.Timedelta(days=1)
+        return start - length, start - pd.Timedelta(days=1)
+    months = 12 if offset == "year" else 1
+    prev_start = start - pd.DateOffset(months=months)
+    prev_end = end - pd.DateOffset(months=months)
+    if start.is_month_start and end.is_month_end:
+        prev_end = prev_end + pd.offsets.MonthEnd(0)
+    return prev_start, prev_end
+
+
+def default_period(daily: pd.DataFrame, offset: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Calendar month (year for offset=year) holding the latest discharge."""
+    last = daily["day"].max()
+    if offset == "year":
+        return pd.Timestamp(last.year, 1, 1), pd.Timestamp(last.year, 12, 31)
+    return last.replace(day=1), last + pd.offsets.MonthEnd(0)
+
+
+def compare_periods(daily: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp,
+                    prev_start: pd.Timestamp, prev_end: pd.Timestamp, metric: str = "total") -> pd.DataFrame:
+    """Per-doctor current/previous metric and changes in one grouped pass.
+
+    Days are labeled current/previous (others dropped) and the daily
+    aggregate is grouped once by (doctor, label). pct_change is NaN when the
+    previous value is 0 or missing.
+    """
+    days = daily["day"]
+    label = np.select(
+        [(days >= start) & (days <= end), (days >= prev_start) & (days <= prev_end)],
+        ["current", "previous"], default="",
+    )
+    labeled = daily.assign(period=label)
+    labeled = labeled[labeled["period"] != ""]
+    grp = labeled.groupby(["doctor_name", "period"])[["total", "count"]].sum().unstack("period", fill_value=0)
+    grp = grp.reindex(columns=pd.MultiIndex.from_product([["total", "count"], ["current", "previous"]]), fill_value=0)
+
+    out = pd.DataFrame(index=grp.index)
+    for period in ("current", "previous"):
+        total, count = grp[("total", period)], grp[("count", period)]
+        if metric == "total":
+            out[period] = total
+        elif metric == "count":
+            out[period] = count
+        else:
+            out[period] = (total / count.replace(0, np.nan)).fillna(0.0)
+        out[f"{period}_rows"] = count
+    out["change"] = out["current"] - out["previous"]
+    out["pct_change"] = out["change"] / out["previous"].replace(0, np.nan) * 100
+    return out.reset_index().sort_values(["current", "doctor_name"], ascending=[False, True], kind="stable")
+
+
+def period_totals(table: pd.DataFrame, metric: str) -> dict:
+    """Network-wide current/previous for the same metric (avg is per row, not per doctor)."""
+    current_rows, previous_rows = int(table["current_rows"].sum()), int(table["previous_rows"].sum())
+    if metric == "avg":
+        # Re-derive totals from the per-doctor averages and row counts
+        current_total = float((table["current"] * table["current_rows"]).sum())
+        previous_total = float((table["previous"] * table["previous_rows"]).sum())
+        current = current_total / current_rows if current_rows else 0.0
+        previous = previous_total / previous_rows if previous_rows else 0.0
+    else:
+        current, previous = float(table["current"].sum()), float(table["previous"].sum())
+    change = current - previous
+    return {
+        "current": current,
+        "previous": previous,
+        "change": change,
+        "pctChange": change / previous * 100 if previous else None,
+    }
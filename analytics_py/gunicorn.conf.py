@@ -0,0 +1,16 @@
+# Multi-worker mode: gunicorn master preloads the app, runs the warm-up once and
+# forks workers that share the imported modules and built indexes (copy-on-write).
+#   gunicorn -c gunicorn.conf.py main:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    # Workers inherit the warmed-up state, so their lifespan warm-up is a no-op
+    import main
+
+    main.warmup()
@@ -0,0 +1,344 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from codes import normalize_code
+
+
+HON_TIERS = 5
+ANESTHETIST_CBO = "225151"
+# Always paid HON1 whatever their position; HON1 fallback when the table lacks them
+ALWAYS_HON1_CODES = {"04.01.02.010-0", "04.01.02.005-3"}
+ALWAYS_HON1_FALLBACK = 150.0
+# Otorrino: the first of these codes pays the combo ceiling minus the other 04.04.* lines
+OTORRINO_COMBO_CODES = {"04.04.01.048-2", "04.04.01.041-5", "04.04.01.002-4", "04.04.01.001-6", "04.04.01.003-2"}
+# Ortopedia Foz: a hip revision is paid alone; only the first knee code is paid;
+# video shoulder is only paid alongside 04.08.01.014-2
+FOZ_HIP_REVISION = "04.08.04.007-6"
+FOZ_KNEE_CODES = {"04.08.05.089-6", "04.08.05.016-0"}
+FOZ_VIDEO_SHOULDER = "04.08.06.071-9"
+FOZ_VIDEO_SHOULDER_REQUIRES = "04.08.01.014-2"
+
+# Specialty key -> fee table file (same files the frontend importers read)
+HON_TABLE_FILES = {
+    "cirurgia_geral": "VBA_CIRURGIA_GERAL.json",
+    "ginecologia": "VBAGINECOLOGIA.json",
+    "ortopedia": "VBAORTOPEDIA.json",
+    "ortopedia_foz": "VBAORTOPEDIAFOZ.json",
+    "otorrino": "VBA OTORRINO.json",
+    "otorrino_sao_jose": "VBA_OTORRINO_HOSPITAL_MUNICIPAL_SAO_JOSE.json",
+    "urologia": "VBAUROLOGIA.json",
+}
+
+# Specialty key -> calculator rules, one entry per TS importer:
+#   model: "ranked" walks the lines in order, skipping excluded CBOs and codes
+#          already paid (honCsv/gynXlsx/otoXlsx); "sorted" takes the 04.* lines
+#          by sequence, then value descending, with no duplicate rule (ortJson/uroJson/ortFozJson)
+#   excluded_cbos: never paid
+#   zero_as_hon1: a 0 in HON2..HON5 pays HON1 (`Number(HON2) || hon1` in the JSON importers)
+#   count_unfound: a code missing from the table still takes a position
+#   dup04: a repeated 04.* code is paid on one line only (Cirurgia Geral)
+#   always_hon1: ALWAYS_HON1_CODES pay HON1 (Cirurgia Geral)
+#   combo: otorrino combo ceilings (single code, two or more codes)
+#   foz: Ortopedia Foz exclusive rules
+HON_TABLE_RULES: Dict[str, Dict[str, Any]] = {
+    "cirurgia_geral": {"model": "ranked", "excluded_cbos": {"000000", ANESTHETIST_CBO}, "zero_as_hon1": False,
+                       "count_unfound": True, "dup04": True, "always_hon1": True},
+    "ginecologia": {"model": "ranked", "excluded_cbos": {"000000", ANESTHETIST_CBO}, "zero_as_hon1": False,
+                    "count_unfound": True},
+    "otorrino": {"model": "ranked", "excluded_cbos": {ANESTHETIST_CBO}, "zero_as_hon1": True,
+                 "count_unfound": False, "combo": (650.0, 800.0)},
+    "otorrino_sao_jose": {"model": "ranked", "excluded_cbos": {ANESTHETIST_CBO}, "zero_as_hon1": True,
+                          "count_unfound": False, "combo": (700.0, 700.0)},
+    "ortopedia": {"model": "sorted", "excluded_cbos": {ANESTHETIST_CBO}, "zero_as_hon1": True},
+    "ortopedia_foz": {"model": "sorted", "excluded_cbos": {ANESTHETIST_CBO}, "zero_as_hon1": True, "foz": True},
+    "urologia": {"model": "sorted", "excluded_cbos": {ANESTHETIST_CBO}, "zero_as_hon1": True},
+}
+
+
+def _to_number(raw: Any) -> Optional[float]:
+    if raw is None or raw == "":
+        return None
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    s = str(raw).strip().replace(".", "").replace(",", ".")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _iter_rows(data: Any):
+    """Yield (code, row) from the different VBA table shapes."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, dict) and normalize_code(key):
+                yield normalize_code(key), value
+            elif isinstance(value, (list, dict)):
+                # Wrapped table, e.g. {"VBA_ORTOPEDIA": {...}}
+                yield from _iter_rows(value)
+        return
+    for row in data or []:
+        if not isinstance(row, dict):
+            continue
+        # Code lives in whichever text column holds it ('Procedimentos', 'codigo', ...)
+        code = ""
+        for key, value in row.items():
+            if not key.upper().startswith("HON") and isinstance(value, str):
+                code = normalize_code(value)
+                if code:
+                    break
+        if code:
+            yield code, row
+
+
+class HonTable:
+    """Code-indexed matrix of HON1..HON5 values for one specialty table."""
+
+    def __init__(self, rows: List[Tuple[str, Dict[str, Any]]], source: str = "", zero_as_hon1: bool = False):
+        self.source = source
+        by_code: Dict[str, List[float]] = {}
+        for code, row in rows:
+            hon = [_to_number(row.get(f"HON{t}", row.get(f"hon{t}"))) for t in range(1, HON_TIERS + 1)]
+            hon1 = hon[0] or 0.0
+            # Missing tiers (e.g. otorrino tables with only HON1) pay HON1, and so
+            # do zeros when the table's importer does `Number(HONn) || hon1`;
+            # repeated codes keep the last row, like the frontend importers
+            by_code[code] = [hon1] + [hon1 if v is None or (zero_as_hon1 and not v) else v for v in hon[1:]]
+        self.index = pd.Index(list(by_code))
+        self.matrix = np.asarray(list(by_code.values()), dtype=np.float64).reshape(len(by_code), HON_TIERS)
+
+    @classmethod
+    def from_json(cls, path: str, zero_as_hon1: bool = False) -> "HonTable":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(list(_iter_rows(data)), source=path, zero_as_hon1=zero_as_hon1)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def lookup(self, codes: pd.Series, tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized (code, tier) -> value; returns (values, found mask)."""
+        rows = self.index.get_indexer(codes)
+        found = rows >= 0
+        values = np.zeros(len(rows), dtype=np.float64)
+        values[found] = self.matrix[rows[found], np.clip(tiers[found], 0, HON_TIERS - 1)]
+        return values, found
+
+
+_TABLE_CACHE: Dict[Tuple[str, bool], Tuple[float, HonTable]] = {}
+
+
+def load_hon_table(path: str, zero_as_hon1: bool = False) -> HonTable:
+    """Parse once per file; re-parse only when the file mtime changes."""
+    mtime = os.path.getmtime(path)
+    cached = _TABLE_CACHE.get((path, zero_as_hon1))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    table = HonTable.from_json(path, zero_as_hon1=zero_as_hon1)
+    _TABLE_CACHE[(path, zero_as_hon1)] = (mtime, table)
+    return table
+
+
+GROUP = ["aih_id", "doctor_name"]
+
+
+def compute_honorarium(lines: pd.DataFrame, table: HonTable, rules: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Honorarium per AIH procedure line, for a whole batch at once.
+
+    Expects columns aih_id, doctor_name, procedure_code and optionally
+    sequence, cbo and value_reais. Lines are paid per (AIH, doctor) with the
+    calculator of the table's TS importer (`rules`, an HON_TABLE_RULES entry;
+    Cirurgia Geral when omitted): the 1st paid position takes HON1, ..., the
+    5th on HON5.
+    """
+    rules = rules or HON_TABLE_RULES["cirurgia_geral"]
+    df = lines.copy()
+    # Normalize each distinct code once, then broadcast
+    raw_codes, uniques = pd.factorize(df["procedure_code"], use_na_sentinel=False)
+    df["code"] = np.asarray([normalize_code(c) for c in uniques], dtype=object)[raw_codes]
+    for column, default in (("sequence", np.nan), ("cbo", ""), ("value_reais", np.nan)):
+        if column not in df:
+            df[column] = default
+    df["sequence"] = pd.to_numeric(df["sequence"], errors="coerce")
+    df["value_reais"] = pd.to_numeric(df["value_reais"], errors="coerce")
+    df["_order"] = np.arange(len(df))
+    if rules["model"] == "sorted":
+        df = _sorted_model(df, table, rules)
+    else:
+        df = _ranked_model(df, table, rules)
+    return df.sort_values("_order").drop(columns="_order")
+
+
+def _cbo_excluded(df: pd.DataFrame, rules: Dict[str, Any]) -> np.ndarray:
+    return df["cbo"].fillna("").astype(str).str.strip().isin(rules["excluded_cbos"]).to_numpy()
+
+
+def _group_any(df: pd.DataFrame, mask: np.ndarray) -> np.ndarray:
+    """Broadcast `mask.any()` over each (AIH, doctor) group."""
+    return df[GROUP].assign(_mask=mask).groupby(GROUP, sort=False)["_mask"].transform("any").to_numpy()
+
+
+def _ranked_model(df: pd.DataFrame, table: HonTable, rules: Dict[str, Any]) -> pd.DataFrame:
+    """honCsv/gynXlsx/otoXlsx: one pass over the lines in sequence/input order.
+
+    Lines with an excluded CBO, dropped by dup04 (a repeated 04.* code is
+    paid on the sequence 1 line, else one with a paid CBO, else the first) or
+    whose code was already paid get no position; the others take the next
+    one, except unknown codes when count_unfound is off.
+    """
+    df = df.sort_values(GROUP + ["sequence", "_order"], na_position="last", kind="stable")
+    cbo_excluded = _cbo_excluded(df, rules)
+    dup04 = np.zeros(len(df), dtype=bool)
+    if rules.get("dup04"):
+        is04 = df["code"].str.startswith("04").to_numpy()
+        paid_cbo = ~cbo_excluded & (df["cbo"].fillna("").astype(str).str.strip() != "").to_numpy()
+        preference = np.select([df["sequence"].to_numpy() == 1, paid_cbo], [0, 1], default=2)
+        # Ties go to the first line in sequence order (df is already sorted)
+        candidates = df.loc[is04, GROUP + ["code"]].assign(_pref=preference[is04])
+        kept = candidates.sort_values("_pref", kind="stable").duplicated(GROUP + ["code"])
+        dup04[is04] = kept.reindex(candidates.index).to_numpy()
+    excluded = cbo_excluded | dup04
+
+    found = table.index.get_indexer(df["code"]) >= 0
+    # Only a code that was paid (found in the table) makes later lines duplicates
+    payable = ~excluded & found
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[payable] = df.loc[payable].duplicated(GROUP + ["code"]).to_numpy()
+    eligible = ~(excluded | duplicate)
+    counted = eligible if rules.get("count_unfound") else eligible & found
+
+    position = np.full(len(df), -1, dtype=np.int64)
+    position[counted] = df.loc[counted].groupby(GROUP, sort=False).cumcount().to_numpy()
+
+    always_hon1 = df["code"].isin(ALWAYS_HON1_CODES).to_numpy() & bool(rules.get("always_hon1"))
+    tier = np.where(always_hon1, 0, np.minimum(np.maximum(position, 0), HON_TIERS - 1))
+    values, _ = table.lookup(df["code"], tier)
+    fallback = always_hon1 & ~found
+    values[fallback] = ALWAYS_HON1_FALLBACK
+    paid = eligible & (found | fallback)
+    df["position"] = position + 1
+    df["hon_tier"] = np.where(paid, tier + 1, 0)
+    df["payment"] = np.where(paid, values, 0.0)
+    df["rule"] = np.select(
+        [dup04, cbo_excluded, duplicate, ~paid],
+        ["Duplicado 04.* (excluído)", "CBO excluído", "Duplicado (não pago)", "Sem regra HON para código"],
+        default="HON",
+    )
+    if rules.get("combo"):
+        _otorrino_combo(df, cbo_excluded, rules["combo"])
+    return df
+
+
+def _otorrino_combo(df: pd.DataFrame, cbo_excluded: np.ndarray, ceilings: Tuple[float, float]) -> None:
+    """The first combo code of a group pays the ceiling (single code or two
+    or more distinct codes) minus the other 04.04.* payments; the first line
+    of each other combo code pays nothing."""
+    combo = df["code"].isin(OTORRINO_COMBO_CODES).to_numpy() & ~cbo_excluded
+    if not combo.any():
+        return
+    firsts = np.flatnonzero(combo)[~df.loc[combo, GROUP + ["code"]].duplicated().to_numpy()]
+    heads = df.iloc[firsts][GROUP]
+    distinct = heads.groupby(GROUP, sort=False)[GROUP[0]].transform("size").to_numpy()
+    lead = ~heads.duplicated().to_numpy()
+    others = (df["code"].str.startswith("04.04.") & ~df["code"].isin(OTORRINO_COMBO_CODES)).to_numpy()
+    other_sum = (df[GROUP].assign(_pay=np.where(others, df["payment"].to_numpy(), 0.0))
+                 .groupby(GROUP, sort=False)["_pay"].transform("sum").to_numpy())
+    ceiling = np.where(distinct >= 2, ceilings[1], ceilings[0])
+    lead_pay = np.maximum(0.0, ceiling - other_sum[firsts])
+
+    payment, hon_tier, rule = df["payment"].to_numpy().copy(), df["hon_tier"].to_numpy().copy(), df["rule"].to_numpy().copy()
+    payment[firsts] = np.where(lead, lead_pay, 0.0)
+    hon_tier[firsts] = np.where(lead & (lead_pay > 0), 1, 0)
+    rule[firsts] = [f"Combo otorrino (teto {c:g})" for c in ceiling]
+    df["payment"], df["hon_tier"], df["rule"] = payment, hon_tier, rule
+
+
+def _sorted_model(df: pd.DataFrame, table: HonTable, rules: Dict[str, Any]) -> pd.DataFrame:
+    """ortJson/uroJson/ortFozJson: the 04.* lines sorted by sequence (missing
+    last), then value_reais descending.
+
+    Every table code takes the next position (no duplicate rule); its
+    payment goes to the first still unpaid line of that code in input order.
+    """
+    # df stays in input order, so row i has _order i
+    candidate = df["code"].str.startswith("04.").to_numpy() & ~_cbo_excluded(df, rules)
+    found = table.index.get_indexer(df["code"]) >= 0
+    cand = df.loc[candidate, GROUP + ["code", "_order"]].assign(
+        _seq=df.loc[candidate, "sequence"].fillna(9999).to_numpy(),
+        _value=df.loc[candidate, "value_reais"].fillna(0.0).to_numpy(),
+        _found=found[candidate],
+    )
+    ranked = cand.sort_values(GROUP + ["_seq", "_value", "_order"],
+                              ascending=[True, True, True, False, True], kind="stable")
+    counted = ranked["_found"].to_numpy().copy()
+    rule_of = np.full(len(df), "Sem regra HON para código", dtype=object)
+    rule_of[~candidate & df["code"].str.startswith("04.").to_numpy()] = "CBO excluído"
+
+    first_knee = np.zeros(len(ranked), dtype=bool)
+    if rules.get("foz"):
+        code = ranked["code"].to_numpy()
+        video_skipped = (code == FOZ_VIDEO_SHOULDER) & ~_group_any(ranked, code == FOZ_VIDEO_SHOULDER_REQUIRES)
+        knee = np.isin(code, list(FOZ_KNEE_CODES)) & counted
+        first_knee[knee] = ~ranked.loc[knee, GROUP].duplicated().to_numpy()
+        counted &= ~video_skipped & ~(knee & ~first_knee)
+        rule_of[ranked["_order"].to_numpy()[video_skipped]] = f"Vídeo ombro sem {FOZ_VIDEO_SHOULDER_REQUIRES}"
+        rule_of[ranked["_order"].to_numpy()[knee & ~first_knee]] = "Joelho exclusivo (só o primeiro)"
+
+    position = np.full(len(ranked), -1, dtype=np.int64)
+    position[counted] = ranked.loc[counted].groupby(GROUP, sort=False).cumcount().to_numpy()
+    tier = np.where(first_knee, 0, np.minimum(np.maximum(position, 0), HON_TIERS - 1))
+    values, _ = table.lookup(ranked["code"], tier)
+
+    # k-th paid entry of a code -> k-th candidate line of that code in input order
+    paid = ranked.loc[counted, GROUP + ["code"]].assign(
+        position=position[counted] + 1, hon_tier=tier[counted] + 1, payment=values[counted],
+        rule=np.where(first_knee[counted], "Joelho (principal)", "HON"),
+    )
+    paid["_k"] = paid.groupby(GROUP + ["code"], sort=False).cumcount()
+    targets = cand[GROUP + ["code", "_order"]]
+    targets = targets.assign(_k=targets.groupby(GROUP + ["code"], sort=False).cumcount())
+    assigned = targets.merge(paid, on=GROUP + ["code", "_k"], how="inner")
+    order = assigned["_order"].to_numpy()
+
+    position_of = np.zeros(len(df), dtype=np.int64)
+    hon_tier_of = np.zeros(len(df), dtype=np.int64)
+    payment_of = np.zeros(len(df), dtype=np.float64)
+    position_of[order] = assigned["position"].to_numpy()
+    hon_tier_of[order] = assigned["hon_tier"].to_numpy()
+    payment_of[order] = assigned["payment"].to_numpy()
+    rule_of[order] = assigned["rule"].to_numpy()
+
+    if rules.get("foz"):
+        # A hip revision is paid alone: HON1 on its first line, nothing else in the AIH/doctor group
+        hip = candidate & (df["code"] == FOZ_HIP_REVISION).to_numpy()
+        hip_group = _group_any(df, hip)
+        if hip_group.any():
+            position_of[hip_group] = hon_tier_of[hip_group] = 0
+            payment_of[hip_group] = 0.0
+            rule_of[hip_group] = f"Excluído por {FOZ_HIP_REVISION} (exclusivo)"
+            head = np.flatnonzero(hip)[~df.loc[hip, GROUP].duplicated().to_numpy()]
+            head = head[found[head]]
+            values, _ = table.lookup(df["code"].iloc[head], np.zeros(len(head), dtype=np.int64))
+            position_of[head] = hon_tier_of[head] = 1
+            payment_of[head] = values
+            rule_of[head] = "Revisão de quadril (exclusivo)"
+
+    df["position"] = position_of
+    df["hon_tier"] = hon_tier_of
+    df["payment"] = payment_of
+    df["rule"] = rule_of
+    return df
+
+
+def doctor_payouts(paid: pd.DataFrame) -> pd.DataFrame:
+    """Per-doctor totals from compute_honorarium output."""
+    grp = paid.assign(paid_line=paid["hon_tier"] > 0).groupby("doctor_name").agg(
+        total=("payment", "sum"),
+        aihs=("aih_id", "nunique"),
+        paid_lines=("paid_line", "sum"),
+    ).reset_index()
+    return grp.sort_values("total", ascending=False)
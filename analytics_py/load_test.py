@@ -0,0 +1,367 @@
+"""Load test: replay a ranking/series/share mix at increasing concurrency.
+
+    python load_test.py                                     # in-process ASGI app
+    python load_test.py --server uvicorn --workers 2 --concurrency 1,4,16,64
+    python load_test.py --rows 200,5000 --mix ranking=2,series=1,share=1 -o load.json
+
+Each concurrency level runs a closed loop (every virtual user sends its next
+request as soon as the previous one returns) for --duration seconds and
+reports throughput, latency percentiles, error/429 rates and CPU/RSS per
+server worker (from /proc; skipped where there is none). In --server asgi mode the load
+generator shares the process, so CPU includes the client side.
+Needs httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ("ranking", "series", "share")
+HAS_PROC = os.path.isdir("/proc")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'ranking=2,series=1' -> normalized weights."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {k: v / total for k, v in weights.items()}
+
+
+def make_body(rows: int, doctors: int, rng: random.Random, columnar: bool) -> bytes:
+    """Synthetic AIH rows over ~6 months, pre-encoded so the client does no JSON work per request."""
+    start = date(2024, 1, 1)
+    names = [f"DR {i:04d}" for i in range(doctors)]
+    picked = [rng.randrange(doctors) for _ in range(rows)]
+    dates = [(start + timedelta(days=rng.randrange(182))).isoformat() for _ in range(rows)]
+    values = [round(rng.lognormvariate(7, 0.6), 2) for _ in range(rows)]
+    if columnar:
+        body = {"filters": {}, "columns": {
+            "doctor_id": [str(i) for i in picked],
+            "doctor_name": [names[i] for i in picked],
+            "discharge_date": dates,
+            "aih_value": values,
+        }}
+    else:
+        body = {"filters": {}, "rows": [
+            {"doctor_id": str(i), "doctor_name": names[i], "doctor_cns": None, "discharge_date": d, "aih_value": v}
+            for i, d, v in zip(picked, dates, values)
+        ]}
+    return json.dumps(body).encode()
+
+
+@lru_cache(maxsize=None)
+def _sysconf(name: str) -> Optional[int]:
+    """os.sysconf value, or None where it does not exist (Windows)."""
+    try:
+        return os.sysconf(name)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _proc_cpu_seconds(pid: int) -> Optional[float]:
+    clk_tck = _sysconf("SC_CLK_TCK")
+    if not clk_tck:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / clk_tck  # utime + stime
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _proc_rss_mb(pid: int) -> Optional[float]:
+    page_size = _sysconf("SC_PAGE_SIZE")
+    if not page_size:
+        return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * page_size / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _children(pid: int) -> List[int]:
+    """Direct children of pid, minus multiprocessing's resource tracker."""
+    found = []
+    if not HAS_PROC:
+        return found
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid and b"resource_tracker" not in cmdline:
+            found.append(int(entry))
+    return sorted(found)
+
+
+class WorkerSampler:
+    """CPU seconds at start/end and peak RSS (sampled) for each worker pid.
+
+    Without /proc (Windows, macOS) nothing is sampled and no workers are reported.
+    """
+
+    def __init__(self, pids: List[int], interval: float = 0.2):
+        self.pids = pids if HAS_PROC else []
+        self.interval = interval
+        self._cpu_start: Dict[int, Optional[float]] = {}
+        self._peak_rss: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started = 0.0
+
+    async def _sample(self):
+        while True:
+            for pid in self.pids:
+                rss = _proc_rss_mb(pid)
+                if rss is not None:
+                    self._peak_rss[pid] = max(self._peak_rss.get(pid, 0.0), rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._cpu_start = {pid: _proc_cpu_seconds(pid) for pid in self.pids}
+        self._peak_rss = {}
+        if self.pids:
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> List[Dict[str, float]]:
+        wall = time.perf_counter() - self._started
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        out = []
+        for pid in self.pids:
+            start, end = self._cpu_start.get(pid), _proc_cpu_seconds(pid)
+            cpu = (end - start) if start is not None and end is not None else None
+            out.append({
+                "pid": pid,
+                "cpu_percent": round(100 * cpu / wall, 1) if cpu is not None and wall else None,
+                "peak_rss_mb": round(self._peak_rss.get(pid, 0.0), 1),
+            })
+        return out
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def summarize(samples: List[Tuple[str, int, float]], elapsed: float) -> Dict[str, object]:
+    """samples: (endpoint, status or 0 for a client-side failure, seconds)."""
+    def stats(group):
+        latencies = sorted(s for _, status, s in group if 200 <= status < 300)
+        n = len(group)
+        return {
+            "requests": n,
+            "ok": len(latencies),
+            "error_rate": round(sum(1 for _, st, _ in group if st != 429 and not 200 <= st < 300) / n, 4) if n else 0.0,
+            "rate_limited_rate": round(sum(1 for _, st, _ in group if st == 429) / n, 4) if n else 0.0,
+            "p50_ms": _ms(percentile(latencies, 0.50)),
+            "p90_ms": _ms(percentile(latencies, 0.90)),
+            "p99_ms": _ms(percentile(latencies, 0.99)),
+            "max_ms": _ms(latencies[-1] if latencies else None),
+        }
+
+    out = stats(samples)
+    out["throughput_rps"] = round(len(samples) / elapsed, 2) if elapsed else 0.0
+    out["endpoints"] = {name: stats([s for s in samples if s[0] == name]) for name in ENDPOINTS
+                        if any(s[0] == name for s in samples)}
+    return out
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, duration: float,
+                    bodies: List[bytes], mix: Dict[str, float], headers: Dict[str, str],
+                    seed: int) -> Tuple[List[Tuple[str, int, float]], float]:
+    names, weights = list(mix), list(mix.values())
+    samples: List[Tuple[str, int, float]] = []
+    deadline = time.perf_counter() + duration
+
+    async def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            body = rng.choice(bodies)
+            started = time.perf_counter()
+            try:
+                r = await client.post(f"/analytics/{name}", content=body, headers=headers)
+                await r.aread()
+                status = r.status_code
+            except httpx.HTTPError:
+                status = 0
+            samples.append((name, status, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def start_server(kind: str, workers: int) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+               "-w", str(workers), "--log-level", "warning", "main:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    env = {**os.environ, "ANALYTICS_WARMUP": os.environ.get("ANALYTICS_WARMUP", "blocking")}
+    proc = subprocess.Popen(cmd, cwd=HERE, env=env)
+    return proc, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            r = await client.get("/health/ready")
+            if r.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit("server did not become ready")
+
+
+def saturation_point(levels: List[Dict[str, object]], min_gain: float) -> Optional[int]:
+    """First concurrency whose throughput gain over the previous level is below min_gain."""
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["throughput_rps"] < prev["throughput_rps"] * (1 + min_gain):
+            return prev["concurrency"]
+    return None
+
+
+async def run(args) -> Dict[str, object]:
+    rng = random.Random(args.seed)
+    sizes = [int(s) for s in args.rows.split(",")]
+    bodies = [make_body(n, args.doctors, rng, args.format == "columns") for n in sizes]
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    headers = {"content-type": "application/json", "x-internal-token": os.getenv("INTERNAL_TOKEN", "dev-token")}
+    if args.accept_encoding:
+        headers["accept-encoding"] = args.accept_encoding
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    timeout = httpx.Timeout(args.timeout)
+
+    proc = None
+    if args.server == "asgi":
+        sys.path.insert(0, HERE)
+        import main
+        main.warmup()
+        transport = httpx.ASGITransport(app=main.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://asgi", limits=limits, timeout=timeout)
+        pids = [os.getpid()]
+    else:
+        proc, base_url = start_server(args.server, args.workers)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+    results = []
+    try:
+        if proc is not None:
+            await wait_ready(client)
+            pids = _children(proc.pid) if args.workers > 1 or args.server == "gunicorn" else [proc.pid]
+        if args.warmup:
+            await run_level(client, levels[0], args.warmup, bodies, mix, headers, args.seed)
+        for concurrency in levels:
+            sampler = WorkerSampler(pids)
+            sampler.start()
+            samples, elapsed = await run_level(client, concurrency, args.duration, bodies, mix, headers, args.seed)
+            level = {"concurrency": concurrency, **summarize(samples, elapsed), "workers": await sampler.stop()}
+            results.append(level)
+            _print_level(level)
+    finally:
+        await client.aclose()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    return {
+        "server": args.server,
+        "workers": args.workers if args.server != "asgi" else 1,
+        "cpus": os.cpu_count(),
+        "duration_seconds": args.duration,
+        "rows": sizes,
+        "format": args.format,
+        "mix": mix,
+        "levels": results,
+        "saturated_at": saturation_point(results, args.min_gain),
+    }
+
+
+def _print_level(level: Dict[str, object]):
+    workers = level["workers"]
+    cpu = "/".join(f"{w['cpu_percent']:.0f}" if w["cpu_percent"] is not None else "-" for w in workers)
+    rss = "/".join(f"{w['peak_rss_mb']:.0f}" for w in workers)
+    print(f"{level['concurrency']:>5} {level['throughput_rps']:>9.1f} {level['p50_ms'] or 0:>9.1f} "
+          f"{level['p99_ms'] or 0:>9.1f} {100 * level['error_rate']:>6.2f} {100 * level['rate_limited_rate']:>6.2f}  "
+          f"{cpu:>12}  {rss}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test and saturation curve for the analytics service")
+    parser.add_argument("--server", choices=["asgi", "uvicorn", "gunicorn"], default="asgi",
+                        help="asgi: in-process app (no sockets); uvicorn/gunicorn: spawned on a local port")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="comma-separated levels (the saturation curve)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load before the first level")
+    parser.add_argument("--rows", default="100,1000,10000", help="payload sizes (rows), picked at random per request")
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--format", choices=["rows", "columns"], default="rows")
+    parser.add_argument("--mix", default="ranking=1,series=1,share=1")
+    parser.add_argument("--accept-encoding", default=None, help="e.g. 'gzip' to include response compression")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--min-gain", type=float, default=0.10,
+                        help="saturation: throughput gain below this between levels")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default=None, help="write the full results as JSON")
+    args = parser.parse_args()
+
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'err%':>6} {'429%':>6}  {'CPU% /wkr':>12}  RSS MB /wkr")
+    report = asyncio.run(run(args))
+    knee = report["saturated_at"]
+    print(f"saturated at concurrency {knee}" if knee else "no saturation within the tested levels")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,123 @@
-from fastapi import FastAPI, Header, HTTPException
+import time
+
+_PROCESS_START = time.monotonic()
+
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional
+import logging
 import os
-import pandas as pd
-import numpy as np
+import threading
+
+# pandas/numpy and the modules built on them (honorarium, sigtap_validator) are
+# imported inside the handlers or by warmup(), so the process can answer
+# /health before they load
+from procedure_index import ProcedureIndex
+from transport import (
+    DEFAULT_MAX_BODY_BYTES,
+    DEFAULT_MAX_COMPRESSED_BYTES,
+    CompressionMiddleware,
+    UnsupportedEncoding,
+    columns_to_frame,
+    decode_body,
+)
 
 
 INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "dev-token")
 ALLOWED_ORIGINS = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "*").split(",") if o.strip()]
+SIGTAP_JSON_PATH = os.getenv("SIGTAP_JSON_PATH", "sigtap_structured.json")
+# Columnar snapshot (sigtap_processor.py --snapshot); preferred over the JSON when present
+SIGTAP_SNAPSHOT_DIR = os.getenv("SIGTAP_SNAPSHOT_DIR", "sigtap_snapshot")
+HON_TABLES_DIR = os.getenv("HON_TABLES_DIR", ".")
+# background: serve immediately, warm up in a thread; blocking: warm up before serving; off: lazy only
+WARMUP_MODE = os.getenv("ANALYTICS_WARMUP", "background").lower()
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(DEFAULT_MAX_BODY_BYTES)))
+MAX_COMPRESSED_BODY_BYTES = int(os.getenv("MAX_COMPRESSED_BODY_BYTES", str(DEFAULT_MAX_COMPRESSED_BYTES)))
+# HyperLogLog precision for distinct counts: 2**p registers, ~1.04/sqrt(2**p) error
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", "12"))
+BUCKET_FREQS = {"day": "D", "week": "W", "month": "M"}
+
+logger = logging.getLogger("analytics")
+
+_state: Dict[str, Any] = {"ready": False, "warmup": None, "ready_after_seconds": None, "first_response_seconds": None}
+_warmup_lock = threading.Lock()
+
+
+def warmup() -> Dict[str, Any]:
+    """Import heavy dependencies and prebuild every cache the endpoints use.
+
+    Idempotent; safe to call from a gunicorn master before forking workers.
+    """
+    with _warmup_lock:
+        if _state["warmup"] is not None:
+            return _state["warmup"]
+        started = time.monotonic()
+        components: Dict[str, Any] = {}
+        errors: List[str] = []
+
+        import numpy  # noqa: F401
+        import pandas
+        from honorarium import HON_TABLE_FILES, HON_TABLE_RULES, load_hon_table
+        from sigtap_validator import load_rule_index
+        components["pandas"] = pandas.__version__
+
+        source = sigtap_source()
+        if source:
+            components["sigtap_source"] = source
+            try:
+                components["procedure_index"] = len(get_procedure_index())
+                components["rule_index"] = len(load_rule_index(source))
+            except Exception as e:
+                errors.append(f"sigtap: {e}")
+        else:
+            components["procedure_index"] = components["rule_index"] = "missing"
+
+        hon_tables: Dict[str, Any] = {}
+        for key, file_name in HON_TABLE_FILES.items():
+            path = os.path.join(HON_TABLES_DIR, file_name)
+            if not os.path.exists(path):
+                continue
+            try:
+                hon_tables[key] = len(load_hon_table(path, HON_TABLE_RULES[key]["zero_as_hon1"]))
+            except Exception as e:
+                errors.append(f"hon table {key}: {e}")
+        components["hon_tables"] = hon_tables
 
-app = FastAPI(title="SIGTAP Analytics Service")
+        _state["warmup"] = {
+            "seconds": round(time.monotonic() - started, 3),
+            "components": components,
+            "errors": errors,
+        }
+        _state["ready"] = True
+        _state["ready_after_seconds"] = round(time.monotonic() - _PROCESS_START, 3)
+        logger.info("warm-up done in %.3fs", _state["warmup"]["seconds"])
+        return _state["warmup"]
+
+
+def _background_warmup():
+    try:
+        warmup()
+    except Exception:
+        logger.exception("warm-up failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "blocking":
+        warmup()
+    elif WARMUP_MODE == "off":
+        _state["ready"] = True
+    else:
+        threading.Thread(target=_background_warmup, name="warmup", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="SIGTAP Analytics Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +127,14 @@ app.add_middleware(
     ,
     allow_headers=["*"]
 )
+# gzip/zstd request bodies (token checked before inflating) and negotiated response compression
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESS_MIN_BYTES,
+    max_body_bytes=MAX_BODY_BYTES,
+    max_compressed_bytes=MAX_COMPRESSED_BODY_BYTES,
+    authorize=lambda headers: headers.get("x-internal-token") == INTERNAL_TOKEN,
+)
 
 
 class Filters(BaseModel):
@@ -37,6 +152,9 @@ class Row(BaseModel):
     doctor_cns: Optional[str]
     discharge_date: str
     aih_value: float
+    patient_id: Optional[str] = None
+    aih_id: Optional[str] = None
+    hospital_id: Optional[str] = None
 
 
 class Payload(BaseModel):
@@ -44,22 +162,115 @@ class Payload(BaseModel):
     rows: List[Row]
 
 
+class HonLine(BaseModel):
+    aih_id: str
+    doctor_name: str
+    doctor_cns: Optional[str] = None
+    procedure_code: str
+    sequence: Optional[int] = None
+    cbo: Optional[str] = None
+    value_reais: Optional[float] = None
+
+
+class HonPayload(BaseModel):
+    table: str
+    lines: List[HonLine]
+    includeLines: bool = False
+
+
+class ValidationLine(BaseModel):
+    procedure_code: str
+    patient_sex: Optional[str] = None
+    patient_age: Optional[float] = None
+    patient_age_months: Optional[float] = None
+    quantity: Optional[int] = None
+    cid: Optional[str] = None
+    cbo: Optional[str] = None
+
+
+class ValidationPayload(BaseModel):
+    lines: List[ValidationLine]
+
+
+class SketchEntry(BaseModel):
+    key: str
+    value: float = 0.0
+    rows: int = 0
+    sketches: Dict[str, str]
+
+
+class SketchMergePayload(BaseModel):
+    entries: List[SketchEntry]
+    includeSketches: bool = False
+
+
+@app.middleware("http")
+async def first_response_timer(request, call_next):
+    response = await call_next(request)
+    if _state["first_response_seconds"] is None:
+        _state["first_response_seconds"] = round(time.monotonic() - _PROCESS_START, 3)
+    return response
+
+
 def auth_guard(token: Optional[str]):
     if not token or token != INTERNAL_TOKEN:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+class RowsPayload:
+    """Decoded /analytics/* row body: filters plus a DataFrame of rows, and any
+    other top-level keys as endpoint options (e.g. anomaly `state`)."""
+
+    def __init__(self, filters: Filters, frame, options: Optional[Dict[str, Any]] = None):
+        self.filters = filters
+        self.frame = frame
+        self.options = options or {}
+
+
+async def rows_payload(request: Request, x_internal_token: Optional[str] = Header(None)) -> RowsPayload:
+    """Accepts {"filters", "rows": [...]} or columnar {"filters", "columns": {name: [...]}},
+    as JSON or MessagePack. Columnar bodies go straight into DataFrame columns."""
+    auth_guard(x_internal_token)  # before spending time decoding the body
+    import pandas as pd
+    try:
+        data = decode_body(request.headers.get("content-type"), await request.body())
+    except UnsupportedEncoding as e:
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Type: {e}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed request body")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be an object")
+
+    try:
+        if "columns" in data:
+            filters = Filters.model_validate(data.get("filters") or {})
+            try:
+                frame = columns_to_frame(data["columns"])
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        else:
+            payload = Payload.model_validate(data)
+            filters = payload.filters
+            frame = pd.DataFrame([r.model_dump() for r in payload.rows])
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    options = {k: v for k, v in data.items() if k not in ("filters", "rows", "columns")}
+    return RowsPayload(filters, frame, options)
+
+
 @app.post("/analytics/ranking")
-def ranking(payload: Payload, x_internal_token: Optional[str] = Header(None)):
+def ranking(data: RowsPayload = Depends(rows_payload), x_internal_token: Optional[str] = Header(None)):
     auth_guard(x_internal_token)
-    if not payload.rows:
+    if data.frame.empty:
         return {"ranking": []}
-    df = pd.DataFrame([r.model_dump() for r in payload.rows])
+    import numpy as np
+    import pandas as pd
+    df = data.frame
     df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
     grp = df.groupby("doctor_name").agg(total=("aih_value", "sum"), cnt=("aih_value", "size"))
     grp["avg"] = grp["total"] / grp["cnt"].replace(0, np.nan)
     grp = grp.sort_values("avg", ascending=False)
-    topn = int(payload.filters.topN or 6)
+    topn = int(data.filters.topN or 6)
     out = [
         {"doctor": name, "avg": float(row["avg"]) if row["cnt"] > 0 else 0.0}
         for name, row in grp.head(topn).iterrows()
@@ -68,21 +279,17 @@ def ranking(payload: Payload, x_internal_token: Optional[str] = Header(None)):
 
 
 @app.post("/analytics/series")
-def series(payload: Payload, x_internal_token: Optional[str] = Header(None)):
+def series(data: RowsPayload = Depends(rows_payload), x_internal_token: Optional[str] = Header(None)):
     auth_guard(x_internal_token)
-    if not payload.rows:
+    if data.frame.empty:
         return {"series": [], "bins": []}
-    df = pd.DataFrame([r.model_dump() for r in payload.rows])
+    import pandas as pd
+    from anomalies import weekly_means
+    df = data.frame
     df["discharge_date"] = pd.to_datetime(df["discharge_date"], errors="coerce")
     df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
-    # Daily average per doctor
-    daily = df.groupby(["doctor_name", pd.Grouper(key="discharge_date", freq="D")]).agg(
-        avg=("aih_value", "mean")
-    ).reset_index()
-    # Weekly average per doctor from daily
-    weekly = daily.copy()
-    weekly["week"] = weekly["discharge_date"].dt.to_period("W").apply(lambda r: r.start_time)
-    weekly = weekly.groupby(["doctor_name", "week"]).agg(avg=("avg", "mean")).reset_index()
+    # Weekly average per doctor from daily averages
+    weekly = weekly_means(df)
     # bins
     bins = sorted(weekly["week"].dropna().unique())
     bins_iso = [b.strftime("%Y-%m-%d") for b in bins]
@@ -96,12 +303,115 @@ def series(payload: Payload, x_internal_token: Optional[str] = Header(None)):
     return {"bins": bins_iso, "series": series}
 
 
+@app.post("/analytics/anomalies")
+def anomalies(
+    data: RowsPayload = Depends(rows_payload),
+    window: int = Query(8, ge=3, le=104),
+    threshold: float = Query(3.5, gt=0),
+    min_periods: Optional[int] = Query(None, ge=1),
+    limit: int = Query(100, ge=1, le=10000),
+    x_internal_token: Optional[str] = Header(None),
+):
+    """Doctor-weeks whose weekly value (as in /analytics/series) deviates from the
+    doctor's trailing `window` weeks, by modified z-score on median/MAD.
+
+    The response `state` holds each doctor's trailing window; posting it back
+    with only the new weeks' rows scores those weeks without resending history.
+    """
+    auth_guard(x_internal_token)
+    state = data.options.get("state")
+    empty = {"weeks": [], "anomalies": [], "scored": 0, "state": state}
+    if data.frame.empty:
+        return empty
+    import pandas as pd
+    from anomalies import flag, score_anomalies, weekly_means
+    df = data.frame
+    df["discharge_date"] = pd.to_datetime(df["discharge_date"], errors="coerce")
+    df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
+    weekly = weekly_means(df)
+    if weekly.empty:
+        return empty
+    try:
+        cells, new_state = score_anomalies(weekly, window, min_periods, state)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    flagged = flag(cells, threshold).head(limit)
+    out = [
+        {"doctor": str(r.doctor), "week": r.week.strftime("%Y-%m-%d"), "value": float(r.value),
+         "median": float(r.median), "mad": float(r.mad), "z": round(float(r.z), 3),
+         "direction": r.direction, "historyWeeks": int(r.history)}
+        for r in flagged.itertuples(index=False)
+    ]
+    weeks = sorted(cells["week"].unique())
+    return {
+        "weeks": [pd.Timestamp(w).strftime("%Y-%m-%d") for w in weeks],
+        "scored": int(cells["z"].notna().sum()),
+        "anomalies": out,
+        "state": new_state,
+    }
+
+
+@app.post("/analytics/compare")
+def compare(
+    data: RowsPayload = Depends(rows_payload),
+    offset: str = Query("month", pattern="^(month|year|previous)$"),
+    metric: str = Query("total", pattern="^(total|avg|count)$"),
+    x_internal_token: Optional[str] = Header(None),
+):
+    """Current period (filters.dateStart..dateEnd, default: latest month/year in
+    the rows) against the same period shifted by `offset`, per doctor.
+
+    `metric`: total (as in /share), avg per AIH (as in /ranking) or count.
+    The rows must cover both periods; they are aggregated per doctor-day once.
+    """
+    auth_guard(x_internal_token)
+    if data.frame.empty:
+        return {"period": None, "comparison": None, "total": None, "doctors": []}
+    import pandas as pd
+    from comparison import comparison_bounds, compare_periods, daily_aggregate, default_period, period_totals
+    df = data.frame
+    df["discharge_date"] = pd.to_datetime(df["discharge_date"], errors="coerce")
+    df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
+    daily = daily_aggregate(df)
+    if daily.empty:
+        return {"period": None, "comparison": None, "total": None, "doctors": []}
+
+    start, end = default_period(daily, offset)
+    try:
+        if data.filters.dateStart:
+            start = pd.Timestamp(data.filters.dateStart).normalize()
+        if data.filters.dateEnd:
+            end = pd.Timestamp(data.filters.dateEnd).normalize()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid date filter: {e}")
+    if end < start:
+        raise HTTPException(status_code=422, detail="dateEnd is before dateStart")
+    prev_start, prev_end = comparison_bounds(start, end, offset)
+
+    table = compare_periods(daily, start, end, prev_start, prev_end, metric)
+    iso = lambda ts: ts.strftime("%Y-%m-%d")
+    return {
+        "metric": metric,
+        "period": {"start": iso(start), "end": iso(end)},
+        "comparison": {"start": iso(prev_start), "end": iso(prev_end), "offset": offset},
+        "total": period_totals(table, metric),
+        "doctors": [
+            {"doctor": str(r.doctor_name), "current": float(r.current), "previous": float(r.previous),
+             "change": float(r.change), "pctChange": None if pd.isna(r.pct_change) else float(r.pct_change)}
+            for r in table.itertuples(index=False)
+        ],
+    }
+
+
 @app.post("/analytics/share")
-def share(payload: Payload, x_internal_token: Optional[str] = Header(None)):
+def share(data: RowsPayload = Depends(rows_payload), x_internal_token: Optional[str] = Header(None)):
     auth_guard(x_internal_token)
-    if not payload.rows:
+    if data.frame.empty:
         return {"share": []}
-    df = pd.DataFrame([r.model_dump() for r in payload.rows])
+    import numpy as np
+    import pandas as pd
+    df = data.frame
     df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
     grp = df.groupby("doctor_name").agg(total=("aih_value", "sum")).reset_index()
     total = grp["total"].sum()
@@ -114,8 +424,210 @@ def share(payload: Payload, x_internal_token: Optional[str] = Header(None)):
     return {"share": out}
 
 
+@app.post("/analytics/cardinality")
+def cardinality(
+    data: RowsPayload = Depends(rows_payload),
+    sketches: bool = Query(False),
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    x_internal_token: Optional[str] = Header(None),
+):
+    auth_guard(x_internal_token)
+    if data.frame.empty:
+        return {"total": None, "doctors": [], "hospitals": []}
+    import pandas as pd
+    from cardinality import METRICS, HyperLogLog, cardinality_by, entries
+    df = data.frame
+    df["aih_value"] = pd.to_numeric(df["aih_value"], errors="coerce").fillna(0.0)
+
+    def summarize(frame):
+        total = {"value": float(frame["aih_value"].sum()), "rows": int(len(frame))}
+        for metric, column in METRICS.items():
+            sketch = HyperLogLog(HLL_PRECISION).add(frame[column])
+            total[metric] = int(round(sketch.count()))
+            if sketches:
+                total.setdefault("sketches", {})[metric] = sketch.to_base64()
+        return {
+            "total": total,
+            "doctors": entries(cardinality_by(frame, "doctor_name", HLL_PRECISION), sketches),
+            "hospitals": entries(cardinality_by(frame, "hospital_id", HLL_PRECISION), sketches),
+        }
+
+    out = summarize(df)
+    if bucket:
+        # Per-period sketches for the caller's aggregate cache; any date range is
+        # then answered by /analytics/cardinality/merge over the cached buckets
+        dates = pd.to_datetime(df["discharge_date"], errors="coerce")
+        periods = dates.dt.to_period(BUCKET_FREQS[bucket]).dt.start_time
+        out["buckets"] = [
+            {"bucket": period.strftime("%Y-%m-%d"), **summarize(frame)}
+            for period, frame in df.groupby(periods, sort=True)
+        ]
+    return out
+
+
+@app.post("/analytics/cardinality/merge")
+def cardinality_merge(payload: SketchMergePayload, x_internal_token: Optional[str] = Header(None)):
+    """Union of stored sketches: entries sharing a key (e.g. one doctor over
+    several months) are merged; `total` merges every entry."""
+    auth_guard(x_internal_token)
+    from cardinality import METRICS, merge_sketches
+    groups: Dict[str, List[SketchEntry]] = {}
+    for entry in payload.entries:
+        missing = set(METRICS) - set(entry.sketches)
+        if missing:
+            raise HTTPException(status_code=422, detail=f"{entry.key}: missing sketches {', '.join(sorted(missing))}")
+        groups.setdefault(entry.key, []).append(entry)
+
+    def merged(group: List[SketchEntry], key: Optional[str]):
+        row: Dict[str, Any] = {"value": sum(e.value for e in group), "rows": sum(e.rows for e in group)}
+        if key is not None:
+            row = {"key": key, **row}
+        for metric in METRICS:
+            sketch = merge_sketches(e.sketches[metric] for e in group)
+            row[metric] = int(round(sketch.count()))
+            if payload.includeSketches:
+                row.setdefault("sketches", {})[metric] = sketch.to_base64()
+        return row
+
+    if not groups:
+        return {"total": None, "entries": []}
+    try:
+        out = [merged(group, key) for key, group in groups.items()]
+        total = merged(payload.entries, None)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    out.sort(key=lambda r: r["value"], reverse=True)
+    return {"total": total, "entries": out}
+
+
+@app.post("/analytics/honorarium")
+def honorarium(payload: HonPayload, x_internal_token: Optional[str] = Header(None)):
+    auth_guard(x_internal_token)
+    import pandas as pd
+    from honorarium import HON_TABLE_FILES, HON_TABLE_RULES, compute_honorarium, doctor_payouts, load_hon_table
+    file_name = HON_TABLE_FILES.get(payload.table)
+    if not file_name:
+        raise HTTPException(status_code=400, detail=f"Unknown HON table: {payload.table}")
+    path = os.path.join(HON_TABLES_DIR, file_name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=503, detail=f"HON table not available: {payload.table}")
+    if not payload.lines:
+        return {"total": 0.0, "doctors": []}
+    rules = HON_TABLE_RULES[payload.table]
+    table = load_hon_table(path, rules["zero_as_hon1"])
+    paid = compute_honorarium(pd.DataFrame([l.model_dump() for l in payload.lines]), table, rules)
+    doctors = doctor_payouts(paid)
+    out = {
+        "total": float(paid["payment"].sum()),
+        "doctors": [
+            {"doctor": str(r.doctor_name), "total": float(r.total), "aihs": int(r.aihs), "paidLines": int(r.paid_lines)}
+            for r in doctors.itertuples(index=False)
+        ],
+    }
+    if payload.includeLines:
+        out["lines"] = [
+            {"aih_id": r.aih_id, "procedure_code": r.code, "position": int(r.position),
+             "hon_tier": int(r.hon_tier), "payment": float(r.payment), "rule": r.rule}
+            for r in paid.itertuples(index=False)
+        ]
+    return out
+
+
+@app.post("/analytics/validate")
+def validate(payload: ValidationPayload, x_internal_token: Optional[str] = Header(None)):
+    auth_guard(x_internal_token)
+    source = sigtap_source()
+    if not source:
+        raise HTTPException(status_code=503, detail="SIGTAP data not loaded")
+    if not payload.lines:
+        return {"total": 0, "invalid": 0, "summary": {}, "violations": []}
+    import numpy as np
+    import pandas as pd
+    from sigtap_validator import load_rule_index, summarize, violation_names
+    rules = load_rule_index(source)
+    df = pd.DataFrame([l.model_dump() for l in payload.lines])
+    mask = rules.validate(df)
+    invalid = np.flatnonzero(mask)
+    return {
+        "total": len(mask),
+        "invalid": int(len(invalid)),
+        "summary": summarize(mask),
+        "violations": [{"index": int(i), "codes": violation_names(int(mask[i]))} for i in invalid],
+    }
+
+
+def sigtap_source() -> Optional[str]:
+    """Snapshot directory when complete (its manifest is written last), else the JSON."""
+    if os.path.isfile(os.path.join(SIGTAP_SNAPSHOT_DIR, "manifest.json")):
+        return SIGTAP_SNAPSHOT_DIR
+    return SIGTAP_JSON_PATH if os.path.exists(SIGTAP_JSON_PATH) else None
+
+
+_procedure_index: Optional[ProcedureIndex] = None
+
+
+def get_procedure_index() -> ProcedureIndex:
+    global _procedure_index
+    if _procedure_index is None:
+        source = sigtap_source()
+        if not source:
+            raise HTTPException(status_code=503, detail="SIGTAP data not loaded")
+        _procedure_index = ProcedureIndex.load(source)
+    return _procedure_index
+
+
+@app.get("/procedures/search")
+def procedures_search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    x_internal_token: Optional[str] = Header(None),
+):
+    auth_guard(x_internal_token)
+    index = get_procedure_index()
+    return {"procedures": [index.summary(r) for r in index.search(q, limit)]}
+
+
+@app.get("/procedures/hierarchy/{prefix}")
+def procedures_hierarchy(
+    prefix: str,
+    limit: int = Query(500, ge=1, le=10000),
+    x_internal_token: Optional[str] = Header(None),
+):
+    auth_guard(x_internal_token)
+    index = get_procedure_index()
+    return {"procedures": [index.summary(r) for r in index.by_prefix(prefix, limit)]}
+
+
+@app.get("/procedures/{code}")
+def procedure_by_code(code: str, x_internal_token: Optional[str] = Header(None)):
+    auth_guard(x_internal_token)
+    record = get_procedure_index().get(code)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Procedure not found")
+    return {"procedure": record}
+
+
 @app.get("/health")
 def health():
-    return {"ok": True}
+    """Liveness plus the readiness flag (kept backward compatible: always 200)."""
+    return {"ok": True, "ready": _state["ready"]}
+
+
+@app.get("/health/live")
+def health_live():
+    return {"ok": True, "uptime_seconds": round(time.monotonic() - _PROCESS_START, 3)}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """200 once warm-up finished (caches built), 503 before."""
+    body = {
+        "ready": _state["ready"],
+        "mode": WARMUP_MODE,
+        "warmup": _state["warmup"],
+        "ready_after_seconds": _state["ready_after_seconds"],
+        "first_response_seconds": _state["first_response_seconds"],
+    }
+    return JSONResponse(body, status_code=200 if _state["ready"] else 503)
 
 
@@ -0,0 +1,141 @@
+import bisect
+import heapq
+import json
+import os
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+
+SUMMARY_FIELDS = ("code", "description", "value_amb", "value_hosp", "value_prof", "complexity")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, accent-free, single-spaced text for matching."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def code_digits(code: str) -> str:
+    """'04.07.02.010-0' -> '0407020100' (also accepts partial codes)."""
+    return "".join(ch for ch in str(code or "") if ch.isdigit())
+
+
+def trigrams(text: str) -> List[str]:
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+def query_grams(token: str) -> List[str]:
+    """Trigrams of a query token; 1-2 char tokens match word starts (' a', ' ab')."""
+    return trigrams(token) if len(token) >= 3 else [" " + token]
+
+
+class ProcedureIndex:
+    """In-memory SIGTAP procedure index.
+
+    - exact lookup by code (formatted or digits only)
+    - prefix / hierarchy queries over the sorted digit codes (GG.SS.FF.PPP-D)
+    - accent-insensitive description search backed by a trigram index
+    """
+
+    def __init__(self, procedures: Iterable[Dict[str, Any]]):
+        self.records: List[Dict[str, Any]] = []
+        self._by_digits: Dict[str, int] = {}
+        for proc in procedures:
+            digits = code_digits(proc.get("code"))
+            if not digits or digits in self._by_digits:
+                continue
+            self._by_digits[digits] = len(self.records)
+            self.records.append(proc)
+
+        # Prefix index: digit codes sorted, with record ids in the same order
+        pairs = sorted((digits, i) for digits, i in self._by_digits.items())
+        self._sorted_digits = [d for d, _ in pairs]
+        self._sorted_ids = [i for _, i in pairs]
+        self._code_rank = [0] * len(self.records)
+        for rank, i in enumerate(self._sorted_ids):
+            self._code_rank[i] = rank
+
+        # Description search: normalized text + trigram and word-start posting lists
+        self._norm_desc = [normalize_text(r.get("description", "")) for r in self.records]
+        postings: Dict[str, set] = {}
+        for i, desc in enumerate(self._norm_desc):
+            grams = set(trigrams(desc))
+            for word in desc.split():
+                grams.update((" " + word[:1], " " + word[:2]))
+            for gram in grams:
+                postings.setdefault(gram, set()).add(i)
+        self._postings = {gram: frozenset(ids) for gram, ids in postings.items()}
+
+    @classmethod
+    def from_json(cls, path: str) -> "ProcedureIndex":
+        """Build from SigtapProcessor output (sigtap_structured.json)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("procedures", []))
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "ProcedureIndex":
+        """Build from a columnar snapshot directory (sigtap_processor.py --snapshot)."""
+        from sigtap_snapshot import SigtapSnapshot  # numpy; keep this module stdlib-only at import
+        return cls(SigtapSnapshot.load(path).records())
+
+    @classmethod
+    def load(cls, path: str) -> "ProcedureIndex":
+        """Snapshot directory or sigtap_structured.json."""
+        return cls.from_snapshot(path) if os.path.isdir(path) else cls.from_json(path)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def summary(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: record.get(k) for k in SUMMARY_FIELDS}
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        i = self._by_digits.get(code_digits(code))
+        return self.records[i] if i is not None else None
+
+    def by_prefix(self, prefix: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All procedures under a hierarchy prefix, e.g. '04.07' (group 04, subgroup 07)."""
+        digits = code_digits(prefix)
+        lo = bisect.bisect_left(self._sorted_digits, digits)
+        # ':' sorts right after '9', so this bounds every code that starts with `digits`
+        hi = bisect.bisect_left(self._sorted_digits, digits + ":", lo)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self.records[i] for i in self._sorted_ids[lo:hi]]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Accent-insensitive description search; code-like queries use the prefix index."""
+        query = (query or "").strip()
+        if not query:
+            return []
+        if code_digits(query) and not any(ch.isalpha() for ch in query):
+            return self.by_prefix(query, limit)
+
+        tokens = normalize_text(query).split()
+        if not tokens:
+            return []
+        candidates: Optional[frozenset] = None
+        for token in tokens:
+            grams = query_grams(token)
+            # Intersect smallest posting lists first; a missing trigram means no match
+            for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+                ids = self._postings.get(gram)
+                if not ids:
+                    return []
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+        # Rank: descriptions starting with the first token, then earlier match, then code
+        first, rest = tokens[0], tokens[1:]
+        norm_desc, code_rank = self._norm_desc, self._code_rank
+        hits = []
+        for i in candidates:
+            desc = norm_desc[i]
+            pos = desc.find(first)
+            if pos >= 0 and all(token in desc for token in rest):
+                hits.append((pos, code_rank[i], i))
+        return [self.records[i] for *_, i in heapq.nsmallest(limit, hits)]
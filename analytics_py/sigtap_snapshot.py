@@ -0,0 +1,148 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Columnar SIGTAP snapshot written by scripts/sigtap_snapshot.py (sigtap_processor.py --snapshot):
+#   manifest.json                   version, column kinds, row count (written last)
+#   <field>.npy                     float64/int64 columns
+#   <field>.data.npy/.offsets.npy   UTF-8 text concatenated + n+1 offsets
+#   <field>.list_offsets.npy        list fields (CID, CBO, ...) over the text items
+#   code_index.npy/code_order.npy   sorted fixed-width codes + record position
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def is_snapshot(path: str) -> bool:
+    """A snapshot directory is complete once its manifest exists."""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def snapshot_mtime(path: str) -> float:
+    return os.path.getmtime(os.path.join(path, MANIFEST_FILE))
+
+
+def _load_array(path: Path, mmap: bool) -> np.ndarray:
+    """Memory-map a .npy (empty arrays cannot be mapped)."""
+    if mmap:
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            pass
+    return np.load(path)
+
+
+class SigtapSnapshot:
+    """Memory-mapped SIGTAP snapshot; columns are mapped on first use."""
+
+    def __init__(self, snapshot_dir: str, mmap: bool = True):
+        self.path = Path(snapshot_dir)
+        with open(self.path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.manifest.get('version')}")
+
+        self.columns: Dict[str, str] = self.manifest["columns"]
+        self._mmap = mmap
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, snapshot_dir: str, mmap: bool = True) -> "SigtapSnapshot":
+        return cls(snapshot_dir, mmap=mmap)
+
+    def __len__(self) -> int:
+        return self.manifest["total_procedures"]
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.manifest.get("metadata", {})
+
+    def _array(self, file_stem: str) -> np.ndarray:
+        if file_stem not in self._arrays:
+            self._arrays[file_stem] = _load_array(self.path / f"{file_stem}.npy", self._mmap)
+        return self._arrays[file_stem]
+
+    def _decode(self, name: str) -> List[str]:
+        """Every value of a text/list column, sliced out of the memory-mapped blob
+        (no copy of the whole blob). ASCII blobs (codes, CID, CBO) decode once."""
+        blob = self._array(f"{name}.data")
+        data = memoryview(blob)
+        offsets = self._array(f"{name}.offsets").tolist()
+        if not (blob >= 0x80).any():
+            text = str(data, "ascii")
+            return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return [str(data[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Memory-mapped float64/int64 column."""
+        if self.columns.get(name) not in ("float", "int"):
+            raise KeyError(f"No numeric column: {name}")
+        return self._array(name)
+
+    def strings(self, name: str) -> List[str]:
+        """Whole text column."""
+        if self.columns.get(name) != "str":
+            raise KeyError(f"No text column: {name}")
+        return self._decode(name)
+
+    def lists(self, name: str) -> List[List[str]]:
+        """Whole list column (CID, CBO, ...)."""
+        if self.columns.get(name) != "list":
+            raise KeyError(f"No list column: {name}")
+        items = self._decode(name)
+        bounds = self._array(f"{name}.list_offsets").tolist()
+        return [items[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Sorted codes (fixed-width bytes)."""
+        return self._array("code_index")
+
+    def position(self, code: str) -> int:
+        """Record position of `code`, or -1 (binary search)."""
+        index = self.codes
+        key = code.encode("ascii", errors="ignore")
+        pos = int(np.searchsorted(index, key))
+        if pos < len(index) and index[pos] == key:
+            return int(self._array("code_order")[pos])
+        return -1
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """One full record, decoding only its own values."""
+        record: Dict[str, Any] = {}
+        for name, kind in self.columns.items():
+            if kind == "float":
+                record[name] = float(self._array(name)[position])
+            elif kind == "int":
+                record[name] = int(self._array(name)[position])
+            else:
+                data, offsets = memoryview(self._array(f"{name}.data")), self._array(f"{name}.offsets")
+                if kind == "str":
+                    start, end = position, position + 1
+                else:
+                    list_offsets = self._array(f"{name}.list_offsets")
+                    start, end = int(list_offsets[position]), int(list_offsets[position + 1])
+                values = [str(data[int(offsets[i]):int(offsets[i + 1])], "utf-8") for i in range(start, end)]
+                record[name] = values[0] if kind == "str" else values
+        return record
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Procedure by SIGTAP code ('GG.SS.FF.PPP-D')."""
+        position = self.position(code)
+        return self.record(position) if position >= 0 else None
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Every record in original order, decoded column by column
+        (same shape as the `procedures` of sigtap_structured.json)."""
+        columns: Dict[str, List[Any]] = {}
+        for name, kind in self.columns.items():
+            if kind in ("float", "int"):
+                columns[name] = self._array(name).tolist()
+            elif kind == "str":
+                columns[name] = self.strings(name)
+            else:
+                columns[name] = self.lists(name)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -0,0 +1,176 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from codes import normalize_code
+from sigtap_snapshot import SigtapSnapshot, is_snapshot, snapshot_mtime
+
+
+# Violation bit flags (combined per line in a single int mask)
+VIOLATIONS = {
+    "UNKNOWN_PROCEDURE": 1,
+    "SEX_INCOMPATIBLE": 2,
+    "AGE_BELOW_MIN": 4,
+    "AGE_ABOVE_MAX": 8,
+    "QUANTITY_EXCEEDED": 16,
+    "CID_INCOMPATIBLE": 32,
+    "CBO_INCOMPATIBLE": 64,
+}
+# SIGTAP uses 9999 (or 0 for max) when there is no age limit
+NO_AGE_LIMIT = 9999
+
+
+def _norm_cid(value: Any) -> Optional[str]:
+    if pd.isna(value):
+        return None
+    return str(value).replace(".", "").strip().upper()
+
+
+def _norm_cbo(value: Any) -> Optional[str]:
+    if pd.isna(value):
+        return None
+    return "".join(ch for ch in str(value) if ch.isdigit())
+
+
+def _age_in_months(age: Any, unit: str) -> int:
+    age = int(age or 0)
+    return age if (unit or "").upper().startswith("MES") else age * 12
+
+
+class RuleIndex:
+    """Per-code SIGTAP rules laid out as arrays aligned with a code index."""
+
+    def __init__(self, procedures: Iterable[Dict[str, Any]]):
+        by_code: Dict[str, Dict[str, Any]] = {}
+        for proc in procedures:
+            code = normalize_code(proc.get("code"))
+            if code and code not in by_code:
+                by_code[code] = proc
+        records = list(by_code.values())
+
+        self.index = pd.Index(list(by_code))
+        gender = [str(r.get("gender") or "").strip().upper()[:1] for r in records]
+        # Only 'M'/'F' restrict; 'I'/'A'/'' mean both
+        self.gender = np.array([g if g in ("M", "F") else "" for g in gender], dtype="U1")
+        self.min_age = np.array([
+            _age_in_months(r.get("min_age"), r.get("min_age_unit")) if int(r.get("min_age") or 0) < NO_AGE_LIMIT else 0
+            for r in records
+        ], dtype=np.int64)
+        self.max_age = np.array([
+            _age_in_months(r.get("max_age"), r.get("max_age_unit"))
+            if 0 < int(r.get("max_age") or 0) < NO_AGE_LIMIT else np.iinfo(np.int64).max
+            for r in records
+        ], dtype=np.int64)
+        max_quantity = np.array([int(r.get("max_quantity") or 0) for r in records], dtype=np.int64)
+        self.max_quantity = np.where(max_quantity > 0, max_quantity, np.iinfo(np.int64).max)
+
+        # Compatibility sets keyed by "code|value"; codes without a list accept anything
+        self.has_cid = np.array([bool(r.get("cid")) for r in records], dtype=bool)
+        self.has_cbo = np.array([bool(r.get("cbo")) for r in records], dtype=bool)
+        self.cid_pairs = frozenset(
+            f"{code}|{_norm_cid(cid)}" for code, r in by_code.items() for cid in (r.get("cid") or [])
+        )
+        self.cbo_pairs = frozenset(
+            f"{code}|{_norm_cbo(cbo)}" for code, r in by_code.items() for cbo in (r.get("cbo") or [])
+        )
+
+    @classmethod
+    def from_json(cls, path: str) -> "RuleIndex":
+        """Build from SigtapProcessor output (sigtap_structured.json)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("procedures", []))
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "RuleIndex":
+        """Build from a columnar snapshot directory (sigtap_processor.py --snapshot)."""
+        return cls(SigtapSnapshot.load(path).records())
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def validate(self, lines: pd.DataFrame) -> np.ndarray:
+        """Violation bitmask per line (0 = compatible).
+
+        Columns: procedure_code, and optionally patient_sex, patient_age
+        (years) or patient_age_months, quantity, cid, cbo. Missing values
+        skip the corresponding check.
+        """
+        n = len(lines)
+        mask = np.zeros(n, dtype=np.int64)
+        if n == 0:
+            return mask
+
+        raw_codes, uniques = pd.factorize(lines["procedure_code"], use_na_sentinel=False)
+        codes = np.asarray([normalize_code(c) for c in uniques], dtype=object)[raw_codes]
+        pos = self.index.get_indexer(codes)
+        known = pos >= 0
+        mask[~known] |= VIOLATIONS["UNKNOWN_PROCEDURE"]
+        p = pos[known]
+        known_idx = np.flatnonzero(known)
+
+        def column(name: str) -> pd.Series:
+            return lines[name] if name in lines else pd.Series([None] * n, index=lines.index)
+
+        sex = column("patient_sex").fillna("").astype(str).str.strip().str.upper().str[:1].to_numpy()[known]
+        rule_sex = self.gender[p]
+        bad = (rule_sex != "") & np.isin(sex, ["M", "F"]) & (sex != rule_sex)
+        mask[known_idx[bad]] |= VIOLATIONS["SEX_INCOMPATIBLE"]
+
+        # Per line: months when given, else years * 12
+        age = pd.to_numeric(column("patient_age_months"), errors="coerce").fillna(
+            pd.to_numeric(column("patient_age"), errors="coerce") * 12
+        ).to_numpy(dtype=float)[known]
+        has_age = ~np.isnan(age)
+        below = has_age & (age < self.min_age[p])
+        above = has_age & (age > self.max_age[p].astype(float))
+        mask[known_idx[below]] |= VIOLATIONS["AGE_BELOW_MIN"]
+        mask[known_idx[above]] |= VIOLATIONS["AGE_ABOVE_MAX"]
+
+        qty = pd.to_numeric(column("quantity"), errors="coerce").to_numpy(dtype=float)[known]
+        exceeded = ~np.isnan(qty) & (qty > self.max_quantity[p].astype(float))
+        mask[known_idx[exceeded]] |= VIOLATIONS["QUANTITY_EXCEEDED"]
+
+        known_codes = codes[known]
+        for name, norm, has_list, pairs, flag in (
+            ("cid", _norm_cid, self.has_cid, self.cid_pairs, "CID_INCOMPATIBLE"),
+            ("cbo", _norm_cbo, self.has_cbo, self.cbo_pairs, "CBO_INCOMPATIBLE"),
+        ):
+            values = column(name)[known].map(norm).to_numpy(dtype=object)
+            check = has_list[p] & pd.notna(values) & (values != "")
+            if not check.any():
+                continue
+            keys = known_codes[check] + "|" + values[check]
+            bad = np.zeros(len(p), dtype=bool)
+            bad[check] = ~pd.Series(keys, dtype=object).isin(pairs).to_numpy()
+            mask[known_idx[bad]] |= VIOLATIONS[flag]
+
+        return mask
+
+
+def violation_names(mask: int) -> List[str]:
+    return [name for name, bit in VIOLATIONS.items() if mask & bit]
+
+
+def summarize(mask: np.ndarray) -> Dict[str, int]:
+    """Count of lines per violation code."""
+    return {name: int(np.count_nonzero(mask & bit)) for name, bit in VIOLATIONS.items()}
+
+
+_RULE_CACHE: Dict[str, Tuple[float, RuleIndex]] = {}
+
+
+def load_rule_index(path: str) -> RuleIndex:
+    """Build once per snapshot directory or JSON file; rebuild only when its
+    mtime (the manifest's, for a snapshot) changes."""
+    snapshot = is_snapshot(path)
+    mtime = snapshot_mtime(path) if snapshot else os.path.getmtime(path)
+    cached = _RULE_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    rules = RuleIndex.from_snapshot(path) if snapshot else RuleIndex.from_json(path)
+    _RULE_CACHE[path] = (mtime, rules)
+    return rules
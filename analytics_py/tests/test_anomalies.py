@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomalies import flag, robust_scores, score_anomalies, weekly_means
+
+
+def _weekly(values_by_doctor, first="2024-01-01"):
+    weeks = pd.period_range(first, periods=max(len(v) for v in values_by_doctor.values()), freq="W").start_time
+    rows = [
+        {"doctor_name": doctor, "week": week, "avg": value}
+        for doctor, values in values_by_doctor.items()
+        for week, value in zip(weeks, values)
+        if value is not None
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_weekly_means_average_daily_means():
+    df = pd.DataFrame({
+        "doctor_name": ["A", "A", "A", "A"],
+        "discharge_date": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-03", None]),
+        "aih_value": [100.0, 300.0, 400.0, 9999.0],
+    })
+    weekly = weekly_means(df)
+    # Daily means 200 and 400 -> weekly 300; the undated row is dropped
+    assert weekly["avg"].tolist() == [300.0]
+    assert weekly["week"].tolist() == [pd.Timestamp("2024-01-01")]
+
+
+def test_robust_scores_match_reference_window():
+    rng = np.random.default_rng(3)
+    values = rng.normal(1000, 50, (4, 20))
+    history = np.full((4, 6), np.nan)
+    scores = robust_scores(values, history, min_periods=3)
+    full = np.concatenate([history, values], axis=1)
+    for doctor in range(4):
+        for week in range(20):
+            window = full[doctor, week:week + 6]
+            window = window[~np.isnan(window)]
+            if len(window) < 3:
+                assert np.isnan(scores["z"][doctor, week])
+                continue
+            median = np.median(window)
+            mad = np.median(np.abs(window - median))
+            expected = (values[doctor, week] - median) / (mad / 0.6745)
+            assert scores["z"][doctor, week] == pytest.approx(expected)
+
+
+def test_spike_on_constant_billing_is_flagged():
+    # MAD == 0 on a flat history; the scale floor keeps the score finite
+    weekly = _weekly({"A": [500.0] * 8 + [2000.0], "B": [400.0, 420.0, 390.0, 410.0, 405.0, 395.0, 415.0, 400.0, 402.0]})
+    cells, _ = score_anomalies(weekly, window=8)
+    flagged = flag(cells)
+    assert flagged["doctor"].tolist() == ["A"]
+    assert flagged["direction"].tolist() == ["high"]
+    assert np.isfinite(flagged["z"]).all()
+
+
+def test_short_history_is_not_scored():
+    weekly = _weekly({"A": [100.0, 5000.0]})
+    cells, _ = score_anomalies(weekly, window=8)
+    assert cells["z"].isna().all()
+    assert flag(cells).empty
+
+
+def test_incremental_state_matches_full_run():
+    rng = np.random.default_rng(7)
+    values = {doctor: list(rng.normal(1000, 80, 16)) for doctor in ("A", "B", "C")}
+    values["C"][5] = None
+    values["B"][12] = 5000.0
+    weekly = _weekly(values)
+    full, full_state = score_anomalies(weekly, window=6)
+
+    split = pd.period_range("2024-01-01", periods=10, freq="W").start_time[-1]
+    head, state = score_anomalies(weekly[weekly["week"] <= split], window=6)
+    tail, tail_state = score_anomalies(weekly[weekly["week"] > split], window=6, state=state)
+
+    incremental = pd.concat([head, tail], ignore_index=True)
+    key = ["doctor", "week"]
+    pd.testing.assert_frame_equal(
+        incremental.sort_values(key).reset_index(drop=True), full.sort_values(key).reset_index(drop=True)
+    )
+    assert tail_state == full_state
+
+
+def test_state_is_checked():
+    weekly = _weekly({"A": [100.0] * 6})
+    _, state = score_anomalies(weekly, window=4)
+    with pytest.raises(ValueError, match="window"):
+        score_anomalies(weekly, window=8, state=state)
+    with pytest.raises(ValueError, match="last week"):
+        score_anomalies(weekly, window=4, state=state)
+    with pytest.raises(ValueError, match="malformed"):
+        score_anomalies(weekly, window=4, state={"window": 4, "lastWeek": "2024-01-01", "doctors": {"A": [1.0]}})
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cardinality import (
+    HyperLogLog,
+    _bit_length,
+    cardinality_by,
+    entries,
+    group_sketches,
+    merge_sketches,
+)
+
+
+def _ids(start: int, stop: int) -> pd.Series:
+    return pd.Series([f"patient-{i}" for i in range(start, stop)])
+
+
+def test_bit_length_matches_python():
+    rng = np.random.default_rng(1)
+    words = np.concatenate([
+        np.array([0, 1, 2, 3, 2**32 - 1, 2**32, 2**63, 2**64 - 1], dtype=np.uint64),
+        rng.integers(0, 2**63, 1000, dtype=np.uint64) >> rng.integers(0, 63, 1000).astype(np.uint64),
+    ])
+    assert _bit_length(words).tolist() == [int(w).bit_length() for w in words]
+
+
+@pytest.mark.parametrize("n", [1, 50, 1000, 20000, 200000])
+def test_estimate_within_error_bound(n):
+    sketch = HyperLogLog(12).add(_ids(0, n))
+    # Hashes are deterministic, so this is a fixed check at 4 standard errors (1.04/sqrt(m))
+    assert abs(sketch.count() - n) <= max(1, 4 * 1.04 / np.sqrt(4096) * n)
+
+
+def test_duplicates_and_nulls_do_not_count():
+    values = pd.concat([_ids(0, 500), _ids(0, 500), pd.Series([None, np.nan])], ignore_index=True)
+    assert HyperLogLog(12).add(values).registers.tolist() == HyperLogLog(12).add(_ids(0, 500)).registers.tolist()
+
+
+def test_merge_is_the_union():
+    a, b = HyperLogLog(10).add(_ids(0, 3000)), HyperLogLog(10).add(_ids(2000, 5000))
+    union = HyperLogLog(10).add(_ids(0, 5000))
+
+    merged = merge_sketches([a.to_base64(), b.to_base64()])
+
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(11))
+
+
+def test_serialization_round_trip_and_rejects_garbage():
+    sketch = HyperLogLog(8).add(_ids(0, 100))
+    restored = HyperLogLog.from_base64(sketch.to_base64())
+    assert restored.p == 8 and restored.count() == sketch.count()
+
+    for bad in ["not base64!", HyperLogLog(8).to_base64()[:6], "SExMAQgAAAA="]:
+        with pytest.raises(ValueError):
+            HyperLogLog.from_base64(bad)
+    with pytest.raises(ValueError):
+        merge_sketches([])
+
+
+def test_group_sketches_match_per_group_sketches():
+    keys = pd.Series(["A", "B", "A", None, "B", "C"] * 200)
+    values = pd.Series([f"p{i % 37}" for i in range(len(keys))])
+
+    sketches = group_sketches(keys, values, p=10)
+
+    assert set(sketches) == {"A", "B", "C"}
+    for key, sketch in sketches.items():
+        expected = HyperLogLog(10).add(values[keys == key])
+        np.testing.assert_array_equal(sketch.registers, expected.registers)
+
+
+def test_cardinality_by_counts_patients_and_aihs_per_doctor():
+    df = pd.DataFrame({
+        "doctor_name": ["DR A", "DR A", "DR A", "DR B", "DR B", None],
+        "patient_id": ["p1", "p1", "p2", "p3", None, "p9"],
+        "aih_id": ["a1", "a2", "a3", "a4", "a5", "a9"],
+        "aih_value": [100.0, 50.0, 25.0, 500.0, 10.0, 1.0],
+    })
+
+    rows = entries(cardinality_by(df, "doctor_name", p=10))
+
+    assert rows == [
+        {"key": "DR B", "value": 510.0, "rows": 2, "patients": 1, "aihs": 2},
+        {"key": "DR A", "value": 175.0, "rows": 3, "patients": 2, "aihs": 3},
+    ]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparison import comparison_bounds, compare_periods, daily_aggregate, default_period, period_totals
+
+T = pd.Timestamp
+
+
+def _lines(rows):
+    df = pd.DataFrame(rows, columns=["doctor_name", "discharge_date", "aih_value"])
+    df["discharge_date"] = pd.to_datetime(df["discharge_date"], format="ISO8601")
+    return df
+
+
+@pytest.mark.parametrize("start, end, offset, expected", [
+    # Whole months stay whole, including the shorter February
+    (T("2024-03-01"), T("2024-03-31"), "month", (T("2024-02-01"), T("2024-02-29"))),
+    (T("2024-02-01"), T("2024-02-29"), "month", (T("2024-01-01"), T("2024-01-31"))),
+    (T("2024-02-01"), T("2024-02-29"), "year", (T("2023-02-01"), T("2023-02-28"))),
+    (T("2024-01-01"), T("2024-12-31"), "year", (T("2023-01-01"), T("2023-12-31"))),
+    # Partial months shift day by day
+    (T("2024-03-10"), T("2024-03-20"), "month", (T("2024-02-10"), T("2024-02-20"))),
+    (T("2024-03-10"), T("2024-03-19"), "previous", (T("2024-02-29"), T("2024-03-09"))),
+])
+def test_comparison_bounds(start, end, offset, expected):
+    assert comparison_bounds(start, end, offset) == expected
+
+
+def test_default_period_holds_the_latest_discharge():
+    daily = daily_aggregate(_lines([("A", "2024-02-10", 1.0), ("A", "2024-03-05", 1.0)]))
+    assert default_period(daily, "month") == (T("2024-03-01"), T("2024-03-31"))
+    assert default_period(daily, "year") == (T("2024-01-01"), T("2024-12-31"))
+
+
+def _daily():
+    return daily_aggregate(_lines([
+        ("A", "2024-02-05", 100.0), ("A", "2024-02-05T18:30:00", 300.0), ("A", "2024-03-02", 500.0),
+        ("B", "2024-03-15", 200.0), ("B", "2024-03-16", 400.0),
+        ("C", "2024-02-20", 50.0),
+        ("D", "2024-01-10", 999.0),
+        ("A", None, 777.0),
+    ]))
+
+
+def test_daily_aggregate_groups_by_calendar_day():
+    daily = _daily()
+    a = daily[daily["doctor_name"] == "A"]
+    assert a["day"].tolist() == [T("2024-02-05"), T("2024-03-02")]
+    assert a["total"].tolist() == [400.0, 500.0]
+    assert a["count"].tolist() == [2, 1]
+
+
+@pytest.mark.parametrize("metric, current, previous", [
+    ("total", {"A": 500.0, "B": 600.0, "C": 0.0}, {"A": 400.0, "B": 0.0, "C": 50.0}),
+    ("count", {"A": 1, "B": 2, "C": 0}, {"A": 2, "B": 0, "C": 1}),
+    ("avg", {"A": 500.0, "B": 300.0, "C": 0.0}, {"A": 200.0, "B": 0.0, "C": 50.0}),
+])
+def test_month_over_month(metric, current, previous):
+    table = compare_periods(_daily(), T("2024-03-01"), T("2024-03-31"), T("2024-02-01"), T("2024-02-29"), metric)
+    table = table.set_index("doctor_name")
+    # D only billed outside both periods
+    assert sorted(table.index) == ["A", "B", "C"]
+    assert table["current"].to_dict() == current
+    assert table["previous"].to_dict() == previous
+    assert table.loc["A", "pct_change"] == pytest.approx((current["A"] - previous["A"]) / previous["A"] * 100)
+    # No previous value -> no percentage
+    assert np.isnan(table.loc["B", "pct_change"])
+    assert table.loc["C", "pct_change"] == pytest.approx(-100.0)
+
+
+def test_rows_sorted_by_current_value():
+    table = compare_periods(_daily(), T("2024-03-01"), T("2024-03-31"), T("2024-02-01"), T("2024-02-29"))
+    assert table["doctor_name"].tolist() == ["B", "A", "C"]
+
+
+def test_period_totals_average_per_row():
+    table = compare_periods(_daily(), T("2024-03-01"), T("2024-03-31"), T("2024-02-01"), T("2024-02-29"), "avg")
+    totals = period_totals(table, "avg")
+    assert totals["current"] == pytest.approx((500.0 + 200.0 + 400.0) / 3)
+    assert totals["previous"] == pytest.approx((100.0 + 300.0 + 50.0) / 3)
+    assert totals["pctChange"] == pytest.approx((totals["current"] / totals["previous"] - 1) * 100)
+
+
+def test_period_totals_without_previous():
+    table = compare_periods(_daily(), T("2024-03-01"), T("2024-03-31"), T("2023-03-01"), T("2023-03-31"))
+    totals = period_totals(table, "total")
+    assert totals["current"] == 1100.0
+    assert totals["previous"] == 0.0
+    assert totals["pctChange"] is None
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from honorarium import HON_TABLE_FILES, HON_TABLE_RULES, HonTable, compute_honorarium, doctor_payouts
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PUBLIC = Path(__file__).resolve().parents[2] / "public"
+# calculatedPayment of the TS calculators (src/config/doctorPaymentRules/importers) for each
+# case, ranked tables fed in sequence order as the dashboards do
+TS_EXPECTED = json.loads((FIXTURES / "honorarium_ts_expected.json").read_text(encoding="utf-8"))
+
+
+def _table(key: str) -> HonTable:
+    return HonTable.from_json(str(PUBLIC / HON_TABLE_FILES[key]), HON_TABLE_RULES[key]["zero_as_hon1"])
+
+
+@pytest.mark.parametrize("key", sorted(HON_TABLE_FILES))
+def test_payments_match_ts_calculator(key):
+    cases = TS_EXPECTED[key]
+    # Pairs of cases share an AIH under different doctors, so grouping is exercised too
+    rows = [
+        {**line, "aih_id": str(i // 2), "doctor_name": f"DR {i % 2}"}
+        for i, case in enumerate(cases)
+        for line in case["lines"]
+    ]
+    paid = compute_honorarium(pd.DataFrame(rows), _table(key), HON_TABLE_RULES[key])
+
+    expected = [payment for case in cases for payment in case["payments"]]
+    np.testing.assert_allclose(paid["payment"].to_numpy(), expected)
+
+
+def _lines(codes, **extra):
+    return pd.DataFrame([{"aih_id": "1", "doctor_name": "DR", "procedure_code": c, "cbo": "225125", **extra} for c in codes])
+
+
+def test_zero_tiers_pay_hon1_only_where_the_importer_does():
+    rows = [("04.08.05.006-3", {"HON1": 500, "HON2": 0}), ("04.08.05.016-0", {"HON1": 900, "HON2": 0})]
+    lines = _lines(["04.08.05.016-0", "04.08.05.006-3"])
+
+    ortopedia = compute_honorarium(lines, HonTable(rows, zero_as_hon1=True), HON_TABLE_RULES["ortopedia"])
+    ginecologia = compute_honorarium(lines, HonTable(rows), HON_TABLE_RULES["ginecologia"])
+
+    assert ortopedia["payment"].tolist() == [900.0, 500.0]
+    assert ginecologia["payment"].tolist() == [900.0, 0.0]
+
+
+def test_sorted_tables_rank_by_sequence_then_value():
+    table = HonTable([("04.09.01.017-0", {"HON1": 300, "HON2": 100}), ("04.09.01.018-8", {"HON1": 400, "HON2": 200})])
+    lines = _lines(["04.09.01.017-0", "04.09.01.018-8"]).assign(value_reais=[100.0, 900.0])
+
+    paid = compute_honorarium(lines, table, HON_TABLE_RULES["urologia"])
+
+    assert paid["position"].tolist() == [2, 1]
+    assert paid["payment"].tolist() == [100.0, 400.0]
+
+
+def test_otorrino_combo_pays_the_ceiling_once():
+    table = _table("otorrino")
+    paid = compute_honorarium(_lines(["04.04.01.048-2", "04.04.01.041-5", "04.04.01.002-4"]), table,
+                              HON_TABLE_RULES["otorrino"])
+
+    assert paid["payment"].tolist() == [800.0, 0.0, 0.0]
+    assert paid["rule"].iloc[0] == "Combo otorrino (teto 800)"
+
+
+def test_foz_hip_revision_is_paid_alone():
+    table = HonTable([("04.08.05.089-6", {"HON1": 900}), ("04.08.04.007-6", {"HON1": 3000})], zero_as_hon1=True)
+    paid = compute_honorarium(_lines(["04.08.05.089-6", "04.08.04.007-6"]), table, HON_TABLE_RULES["ortopedia_foz"])
+
+    assert paid["payment"].tolist() == [0.0, 3000.0]
+
+
+def test_doctors_on_the_same_aih_are_ranked_apart():
+    table = _table("cirurgia_geral")
+    code = table.index[0]
+    lines = pd.DataFrame([
+        {"aih_id": "1", "doctor_name": "DR A", "procedure_code": code, "cbo": "225125"},
+        {"aih_id": "1", "doctor_name": "DR B", "procedure_code": code, "cbo": "225125"},
+    ])
+
+    paid = compute_honorarium(lines, table)
+    doctors = doctor_payouts(paid)
+
+    assert paid["position"].tolist() == [1, 1]
+    assert doctors["total"].tolist() == [table.matrix[0, 0]] * 2
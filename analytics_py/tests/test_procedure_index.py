@@ -0,0 +1,43 @@
+from procedure_index import ProcedureIndex, normalize_text
+
+PROCEDURES = [
+    {"code": "04.07.04.010-2", "description": "HERNIOPLASTIA INGUINAL (UNILATERAL)"},
+    {"code": "04.07.04.012-9", "description": "HERNIOPLASTIA UMBILICAL"},
+    {"code": "04.07.03.002-6", "description": "COLECISTECTOMIA VIDEOLAPAROSCÓPICA"},
+    {"code": "03.01.01.007-2", "description": "CONSULTA MÉDICA EM ATENÇÃO ESPECIALIZADA"},
+    {"code": "04.07.04.010-2", "description": "DUPLICADO"},
+    {"code": "04.07.03.001-8", "description": "COLECISTECTOMIA"},
+]
+
+
+def test_lookup_by_formatted_or_digit_code():
+    index = ProcedureIndex(PROCEDURES)
+    assert len(index) == 5
+    assert index.get("0407040102")["description"] == "HERNIOPLASTIA INGUINAL (UNILATERAL)"
+    assert index.get("04.07.04.010-2") is index.get("0407040102")
+    assert index.get("99.99.99.999-9") is None
+
+
+def test_prefix_queries_follow_the_hierarchy():
+    index = ProcedureIndex(PROCEDURES)
+    assert [r["code"] for r in index.by_prefix("04.07")] == [
+        "04.07.03.001-8", "04.07.03.002-6", "04.07.04.010-2", "04.07.04.012-9"
+    ]
+    assert [r["code"] for r in index.by_prefix("04.07.03")] == ["04.07.03.001-8", "04.07.03.002-6"]
+    assert [r["code"] for r in index.by_prefix("04.07", limit=1)] == ["04.07.03.001-8"]
+    assert index.by_prefix("05") == []
+
+
+def test_search_matches_a_brute_force_scan():
+    index = ProcedureIndex(PROCEDURES)
+    for query in ("hernio", "HERNIOPLASTIA umb", "colecistectomia", "atencao", "médica espec", "co", "xyz"):
+        tokens = normalize_text(query).split()
+        expected = [r for r in index.records if all(t in normalize_text(r["description"]) for t in tokens)]
+        assert sorted(r["code"] for r in index.search(query)) == sorted(r["code"] for r in expected), query
+
+
+def test_search_ranks_description_starts_first():
+    index = ProcedureIndex(PROCEDURES)
+    assert [r["code"] for r in index.search("colecistectomia")] == ["04.07.03.001-8", "04.07.03.002-6"]
+    assert [r["code"] for r in index.search("04.07.04")] == ["04.07.04.010-2", "04.07.04.012-9"]
+    assert len(index.search("hernioplastia", limit=1)) == 1
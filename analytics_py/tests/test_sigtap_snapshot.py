@@ -0,0 +1,85 @@
+import importlib.util
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from procedure_index import ProcedureIndex
+from sigtap_snapshot import SigtapSnapshot
+from sigtap_validator import RuleIndex, load_rule_index
+
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+
+
+def _writer():
+    """scripts/sigtap_snapshot.py (the writer lives next to SigtapProcessor) under its own name."""
+    if str(SCRIPTS) not in sys.path:
+        sys.path.append(str(SCRIPTS))
+    spec = importlib.util.spec_from_file_location("scripts_sigtap_snapshot", SCRIPTS / "sigtap_snapshot.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+writer = _writer()
+
+
+@pytest.fixture
+def procedures():
+    from sigtap_processor import SigtapProcedure
+    return [
+        asdict(SigtapProcedure(code="04.07.04.010-2", description="HERNIOPLASTIA INGUINAL (UNILATERAL)",
+                               value_hosp=350.55, gender="I", min_age=18, min_age_unit="ANOS",
+                               max_quantity=1, cid=["K40.9", "K40.2"], cbo=["225225"])),
+        asdict(SigtapProcedure(code="03.01.01.007-2", description="CONSULTA MÉDICA EM ATENÇÃO ESPECIALIZADA")),
+        asdict(SigtapProcedure(code="04.09.06.013-5", description="HISTERECTOMIA TOTAL", gender="F",
+                               value_prof=412.0, cid=["D25.9"])),
+    ]
+
+
+@pytest.fixture
+def sources(tmp_path, procedures):
+    snapshot = tmp_path / "sigtap_snapshot"
+    writer.write_snapshot(procedures, str(snapshot))
+    structured = tmp_path / "sigtap_structured.json"
+    structured.write_text(json.dumps({"procedures": procedures}, ensure_ascii=False), encoding="utf-8")
+    return str(snapshot), str(structured)
+
+
+def test_snapshot_round_trips_records(sources, procedures):
+    snapshot = SigtapSnapshot.load(sources[0])
+
+    assert snapshot.records() == procedures
+    assert snapshot.get("04.09.06.013-5") == procedures[2]
+    assert snapshot.get("99.99.99.999-9") is None
+    assert snapshot.strings("description")[1] == "CONSULTA MÉDICA EM ATENÇÃO ESPECIALIZADA"
+    assert snapshot.numeric("value_hosp").tolist() == [350.55, 0.0, 0.0]
+    # Text stays memory-mapped; values are decoded from slices of the mapping
+    assert isinstance(snapshot._array("description.data"), np.memmap)
+
+
+def test_procedure_index_loads_the_same_from_snapshot_and_json(sources):
+    from_snapshot, from_json = ProcedureIndex.load(sources[0]), ProcedureIndex.load(sources[1])
+
+    assert len(from_snapshot) == len(from_json) == 3
+    assert from_snapshot.get("0407040102") == from_json.get("0407040102")
+    assert from_snapshot.search("atencao espec") == from_json.search("atencao espec")
+    assert from_snapshot.by_prefix("04") == from_json.by_prefix("04")
+
+
+def test_rule_index_validates_the_same_from_snapshot_and_json(sources):
+    lines = pd.DataFrame([
+        {"procedure_code": "04.09.06.013-5", "patient_sex": "M", "cid": "D25.9"},
+        {"procedure_code": "04.07.04.010-2", "patient_age": 12, "quantity": 2, "cid": "K41", "cbo": "225225"},
+        {"procedure_code": "04.07.04.010-2", "patient_age": 40, "quantity": 1, "cid": "K40.9"},
+        {"procedure_code": "01.01.01.001-0"},
+    ])
+
+    expected = RuleIndex.from_json(sources[1]).validate(lines)
+    assert expected.tolist() == [2, 4 | 16 | 32, 0, 1]
+    np.testing.assert_array_equal(RuleIndex.from_snapshot(sources[0]).validate(lines), expected)
+    np.testing.assert_array_equal(load_rule_index(sources[0]).validate(lines), expected)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from codes import normalize_code
+from sigtap_validator import VIOLATIONS, RuleIndex, summarize, violation_names
+
+V = VIOLATIONS
+
+
+@pytest.fixture
+def rules():
+    return RuleIndex([
+        {"code": "04.09.03.002-3", "gender": "M", "min_age": 18, "min_age_unit": "ANOS", "max_age": 9999,
+         "max_quantity": 1, "cid": ["N40"], "cbo": ["225285"]},
+        {"code": "0310010039 PARTO NORMAL", "gender": "F", "min_age": 10, "min_age_unit": "ANOS",
+         "max_age": 60, "max_age_unit": "ANOS", "cid": ["O80.0"]},
+        {"code": "03.01.01.007-2", "gender": "I", "min_age": 6, "min_age_unit": "MESES", "max_age": 24,
+         "max_age_unit": "MESES", "cbo": ["2251-25"]},
+        # Duplicate code: the first record wins
+        {"code": "04.09.03.002-3", "gender": "F"},
+    ])
+
+
+@pytest.mark.parametrize("raw, code", [
+    ("04.01.02.004-5 EXCISÃO E SUTURA", "04.01.02.004-5"),
+    ("0401020045", "04.01.02.004-5"),
+    (" 04010200450 ", "04.01.02.004-5"),
+    ("040102", ""),
+    (None, ""),
+])
+def test_normalize_code(raw, code):
+    assert normalize_code(raw) == code
+
+
+def test_one_bit_per_rule(rules):
+    lines = pd.DataFrame({
+        "procedure_code": ["04.09.03.002-3", "04.09.03.002-3", "04.09.03.002-3", "04.09.03.002-3",
+                           "04.09.03.002-3", "0409030023", "99.99.99.999-9", "03.10.01.003-9"],
+        "patient_sex": ["F", "M", "m", "M", "M", None, "M", "F"],
+        "patient_age": [40, 17, 40, 40, 40, 40, 40, 61],
+        "quantity": [1, 1, 2, 1, 1, 1, 1, 1],
+        "cid": ["N40", "N40", "N40", "K40", "N40", "n4.0", "N40", "O800"],
+        "cbo": ["225285", "225285", "225285", "225285", "225125", "225285", "225285", None],
+    })
+    assert rules.validate(lines).tolist() == [
+        V["SEX_INCOMPATIBLE"],
+        V["AGE_BELOW_MIN"],
+        V["QUANTITY_EXCEEDED"],
+        V["CID_INCOMPATIBLE"],
+        V["CBO_INCOMPATIBLE"],
+        0,
+        V["UNKNOWN_PROCEDURE"],
+        V["AGE_ABOVE_MAX"],
+    ]
+
+
+def test_bits_combine(rules):
+    lines = pd.DataFrame({"procedure_code": ["04.09.03.002-3"], "patient_sex": ["F"], "patient_age": [12],
+                          "quantity": [3], "cid": ["K40"], "cbo": ["225125"]})
+    mask = int(rules.validate(lines)[0])
+    assert violation_names(mask) == ["SEX_INCOMPATIBLE", "AGE_BELOW_MIN", "QUANTITY_EXCEEDED",
+                                     "CID_INCOMPATIBLE", "CBO_INCOMPATIBLE"]
+
+
+def test_age_in_months_per_line(rules):
+    # Months when given, years otherwise, on a rule limited to 6-24 months
+    lines = pd.DataFrame({
+        "procedure_code": ["03.01.01.007-2"] * 5,
+        "patient_age_months": [3, 12, None, None, None],
+        "patient_age": [40, 40, 1, 3, None],
+    })
+    assert rules.validate(lines).tolist() == [V["AGE_BELOW_MIN"], 0, 0, V["AGE_ABOVE_MAX"], 0]
+
+
+def test_missing_columns_and_values_skip_checks(rules):
+    lines = pd.DataFrame({"procedure_code": ["04.09.03.002-3", "03.01.01.007-2"]})
+    assert rules.validate(lines).tolist() == [0, 0]
+    lines = pd.DataFrame({"procedure_code": ["04.09.03.002-3"], "patient_age_months": [None],
+                          "cid": [""], "cbo": [None], "patient_sex": ["I"]})
+    assert rules.validate(lines).tolist() == [0]
+
+
+def test_cbo_compared_by_digits(rules):
+    lines = pd.DataFrame({"procedure_code": ["03.01.01.007-2", "03.01.01.007-2"], "cbo": ["225125", "2251.26"]})
+    assert rules.validate(lines).tolist() == [0, V["CBO_INCOMPATIBLE"]]
+
+
+def test_summarize_counts_lines_per_violation():
+    mask = np.array([0, V["SEX_INCOMPATIBLE"] | V["CID_INCOMPATIBLE"], V["CID_INCOMPATIBLE"]])
+    summary = summarize(mask)
+    assert summary["CID_INCOMPATIBLE"] == 2
+    assert summary["SEX_INCOMPATIBLE"] == 1
+    assert sum(summary.values()) == 3
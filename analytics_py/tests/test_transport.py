@@ -0,0 +1,99 @@
+import gzip
+import json
+
+import pytest
+import zstandard
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from transport import BodyTooLarge, CompressionMiddleware, UnsupportedEncoding, compress, decompress, negotiate
+
+PAYLOAD = json.dumps({"rows": [{"doctor_name": f"DR {i}", "aih_value": i * 1.5} for i in range(2000)]}).encode()
+
+
+def _zstd_frames(data: bytes, parts: int) -> bytes:
+    step = len(data) // parts + 1
+    return b"".join(zstandard.ZstdCompressor().compress(data[i:i + step]) for i in range(0, len(data), step))
+
+
+def _zstd_streamed(data: bytes) -> bytes:
+    """Single frame without a content size, as a streaming client writes it."""
+    compressor = zstandard.ZstdCompressor(write_content_size=False).compressobj()
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize("encoding", ["zstd", "gzip"])
+def test_round_trip(encoding):
+    assert decompress(encoding, compress(encoding, PAYLOAD), len(PAYLOAD)) == PAYLOAD
+
+
+def test_zstd_reads_every_frame():
+    body = _zstd_frames(PAYLOAD, 4)
+    assert decompress("zstd", body, len(PAYLOAD)) == PAYLOAD
+    assert decompress("zstd", _zstd_streamed(PAYLOAD), len(PAYLOAD)) == PAYLOAD
+
+
+def test_gzip_reads_every_member():
+    half = len(PAYLOAD) // 2
+    body = gzip.compress(PAYLOAD[:half]) + gzip.compress(PAYLOAD[half:])
+    assert decompress("gzip", body, len(PAYLOAD)) == PAYLOAD
+
+
+@pytest.mark.parametrize("body", [
+    compress("zstd", PAYLOAD), _zstd_frames(PAYLOAD, 3), _zstd_streamed(PAYLOAD), compress("gzip", PAYLOAD),
+])
+def test_output_beyond_the_limit_is_refused(body):
+    encoding = "gzip" if body[:2] == b"\x1f\x8b" else "zstd"
+    assert decompress(encoding, body, len(PAYLOAD)) == PAYLOAD
+    with pytest.raises(BodyTooLarge):
+        decompress(encoding, body, len(PAYLOAD) - 1)
+
+
+def test_unknown_encoding():
+    with pytest.raises(UnsupportedEncoding):
+        decompress("br", b"", 10)
+
+
+def test_negotiate_prefers_zstd_and_honours_q0():
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("zstd;q=0, gzip") == "gzip"
+    assert negotiate("br") is None
+
+
+async def _echo(request: Request):
+    return JSONResponse(json.loads(await request.body()))
+
+
+def _client(**options) -> TestClient:
+    app = Starlette(routes=[Route("/echo", _echo, methods=["POST"])])
+    app.add_middleware(CompressionMiddleware, authorize=lambda h: h.get("x-token") == "ok", **options)
+    return TestClient(app)
+
+
+def test_middleware_decodes_multi_frame_request_and_compresses_response():
+    client = _client()
+    response = client.post("/echo", content=_zstd_frames(PAYLOAD, 4),
+                           headers={"content-encoding": "zstd", "x-token": "ok", "accept-encoding": "zstd"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "zstd"
+    # httpx decodes zstd when it can; otherwise decode the raw body here
+    body = response.content
+    if body[:4] == b"\x28\xb5\x2f\xfd":
+        body = decompress("zstd", body, len(PAYLOAD) * 2)
+    assert json.loads(body) == json.loads(PAYLOAD)
+
+
+def test_middleware_enforces_size_caps_and_auth():
+    client = _client(max_body_bytes=len(PAYLOAD) - 1)
+    headers = {"content-encoding": "zstd", "x-token": "ok"}
+
+    assert client.post("/echo", content=_zstd_frames(PAYLOAD, 2), headers=headers).status_code == 413
+    assert client.post("/echo", content=b"not zstd", headers=headers).status_code == 400
+    assert client.post("/echo", content=_zstd_frames(PAYLOAD, 2),
+                       headers={"content-encoding": "zstd"}).status_code == 401
+    small = _client(max_compressed_bytes=16)
+    assert small.post("/echo", content=compress("zstd", PAYLOAD), headers=headers).status_code == 413
@@ -0,0 +1,250 @@
+import gzip
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+# Optional codecs: without them the service still speaks JSON/gzip and answers 415
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+MSGPACK_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/msgpack")
+# Columnar row bodies: {"filters": {...}, "columns": {"doctor_name": [...], ...}}
+ROW_COLUMNS = ["doctor_id", "doctor_name", "doctor_cns", "discharge_date", "aih_value",
+               "patient_id", "aih_id", "hospital_id"]
+REQUIRED_ROW_COLUMNS = ("doctor_name", "discharge_date", "aih_value")
+DEFAULT_MAX_BODY_BYTES = 64 * 1024 * 1024        # decompressed
+DEFAULT_MAX_COMPRESSED_BYTES = 16 * 1024 * 1024  # as received
+DECOMPRESS_CHUNK_BYTES = 1024 * 1024
+
+
+class UnsupportedEncoding(Exception):
+    pass
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def available_encodings() -> List[str]:
+    """Response encodings in server preference order."""
+    return (["zstd"] if zstandard else []) + ["gzip"]
+
+
+def decompress(encoding: str, body: bytes, limit: int) -> bytes:
+    """Decode a gzip/zstd request body, refusing more than `limit` output bytes.
+
+    Concatenated gzip members / zstd frames (e.g. a streaming client that
+    flushes per chunk) are decoded to the end.
+    """
+    if encoding in ("gzip", "x-gzip"):
+        reader = gzip.GzipFile(fileobj=io.BytesIO(body))
+    elif encoding == "zstd" and zstandard:
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body), read_across_frames=True)
+    else:
+        raise UnsupportedEncoding(encoding)
+    # read(n) may return short before EOF, so loop until EOF or one byte past the limit
+    chunks, total = [], 0
+    while True:
+        chunk = reader.read(min(DECOMPRESS_CHUNK_BYTES, limit + 1 - total))
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+        total += len(chunk)
+        if total > limit:
+            raise BodyTooLarge()
+
+
+def compress(encoding: str, body: bytes, gzip_level: int = 6, zstd_level: int = 3) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best encoding allowed by an Accept-Encoding header (q=0 excludes)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token.strip().lower()] = q
+    for encoding in available_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def decode_body(content_type: Optional[str], body: bytes) -> Any:
+    """JSON or MessagePack request body -> Python object."""
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    if media_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedEncoding(media_type)
+        return msgpack.unpackb(body, raw=False)
+    if media_type == "application/json":
+        return json.loads(body or b"null")
+    raise UnsupportedEncoding(media_type)
+
+
+def columns_to_frame(columns: Dict[str, List[Any]]):
+    """Columnar rows -> DataFrame with ROW_COLUMNS, no per-row objects."""
+    import pandas as pd
+
+    if not isinstance(columns, dict):
+        raise ValueError("columns must be an object of arrays")
+    missing = [c for c in REQUIRED_ROW_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    not_lists = [c for c in ROW_COLUMNS if c in columns and not isinstance(columns[c], list)]
+    if not_lists:
+        raise ValueError(f"columns must be arrays: {', '.join(not_lists)}")
+    # Same contract as the JSON rows (Row model): required fields are never null
+    with_nulls = [c for c in REQUIRED_ROW_COLUMNS if any(v is None for v in columns[c])]
+    if with_nulls:
+        raise ValueError(f"null values in required columns: {', '.join(with_nulls)}")
+    lengths = {len(columns[c]) for c in ROW_COLUMNS if c in columns}
+    if len(lengths) > 1:
+        raise ValueError("columns must have the same length")
+    n = lengths.pop() if lengths else 0
+    frame = pd.DataFrame({c: columns[c] if c in columns else [None] * n for c in ROW_COLUMNS})
+    frame["doctor_name"] = frame["doctor_name"].astype(str)
+    frame["discharge_date"] = frame["discharge_date"].astype(str)
+    try:
+        frame["aih_value"] = frame["aih_value"].astype(float)
+    except (TypeError, ValueError):
+        raise ValueError("aih_value must be numeric")
+    return frame
+
+
+class CompressionMiddleware:
+    """Decompresses gzip/zstd request bodies and compresses negotiated responses.
+
+    `authorize(headers)` is checked before a compressed body is read, so an
+    unauthenticated client cannot make the server inflate anything (401).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 max_compressed_bytes: int = DEFAULT_MAX_COMPRESSED_BYTES,
+                 authorize: Optional[Callable[[Headers], bool]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_body_bytes = max_body_bytes
+        self.max_compressed_bytes = max_compressed_bytes
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = headers.get("content-encoding", "").strip().lower()
+        if encoding and encoding != "identity":
+            if self.authorize is not None and not self.authorize(headers):
+                await JSONResponse({"detail": "Unauthorized"}, 401)(scope, receive, send)
+                return
+            scope, receive, error = await self._decoded_request(scope, receive, encoding)
+            if error is not None:
+                await error(scope, receive, send)
+                return
+
+        response_encoding = negotiate(headers.get("accept-encoding", ""))
+        if response_encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, response_encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+    async def _decoded_request(self, scope, receive, encoding: str) -> Tuple[Any, Any, Optional[JSONResponse]]:
+        too_large = JSONResponse({"detail": "Request body too large"}, 413)
+        declared = Headers(scope=scope).get("content-length", "")
+        if declared.isdigit() and int(declared) > self.max_compressed_bytes:
+            return scope, receive, too_large
+        chunks = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_compressed_bytes:
+                return scope, receive, too_large
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        try:
+            body = decompress(encoding, b"".join(chunks), self.max_body_bytes)
+        except UnsupportedEncoding:
+            return scope, receive, JSONResponse({"detail": f"Unsupported Content-Encoding: {encoding}"}, 415)
+        except BodyTooLarge:
+            return scope, receive, too_large
+        except Exception:
+            return scope, receive, JSONResponse({"detail": f"Invalid {encoding} body"}, 400)
+
+        raw_headers = [
+            (k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")
+        ]
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        scope = {**scope, "headers": raw_headers}
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return scope, replay, None
+
+
+class _CompressingResponder:
+    """Buffers a response and compresses it when worthwhile."""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start = None
+        self._chunks: List[bytes] = []
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._start is None:
+            await self._send(message)
+            return
+
+        self._chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+
+        body = b"".join(self._chunks)
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        content_type = headers.get("content-type", "")
+        if (len(body) >= self.minimum_size and "content-encoding" not in headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)):
+            body = compress(self.encoding, body)
+            headers["content-encoding"] = self.encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+        await self._send({**self._start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": body, "more_body": False})
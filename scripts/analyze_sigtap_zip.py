@@ -11,17 +11,44 @@ import chardet
 from pathlib import Path
 import json
 import re
-from typing import Dict, List, Any
+import heapq
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import sys
+import argparse
+
+from sigtap_parallel import default_workers, run_partitioned
+from sigtap_profiling import StageProfiler, add_profile_arguments, run_profiled
+from sigtap_zip_reader import iter_fixed_width_lines, parse_layout
+
+# Sketches KMV (k menores hashes) para a contenção entre colunas; a unicidade
+# da coluna referenciada usa a contagem exata de distintos
+SKETCH_SIZE = 256
+HASH_SPACE = 2 ** 64
+FK_MIN_CONTAINMENT = 0.95   # fração dos valores do filho presentes no pai
+FK_MIN_UNIQUENESS = 0.95    # distintos/linhas exigido na coluna referenciada
+LAYOUT_SUFFIX = '_layout.txt'
 
 class SigtapZipAnalyzer:
-    def __init__(self, zip_path: str):
+    def __init__(self, zip_path: str, workers: int = 1,
+                 member_data: Optional[Dict[str, bytes]] = None,
+                 report_path: str = 'sigtap_analysis_report.json',
+                 profile: bool = False):
         self.zip_path = zip_path
+        self.workers = max(1, workers)
+        # Conteúdo já descomprimido (ex.: pipeline), evita ler o membro de novo
+        self.member_data = member_data or {}
+        self.report_path = report_path
+        self.profiler = StageProfiler(enabled=profile)
+        # Sketches por arquivo/coluna-chave (não vão para o relatório JSON)
+        self.key_sketches: Dict[str, Dict[str, Dict[str, Any]]] = {}
         self.analysis_results = {
             'file_structure': {},
             'data_samples': {},
             'column_mappings': {},
             'relationships': {},
+            'foreign_keys': [],
             'import_strategy': {},
             'encoding_info': {}
         }
@@ -34,17 +61,7 @@ class SigtapZipAnalyzer:
         
         try:
             with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-                # Etapa 1: Estrutura dos arquivos
-                self._analyze_file_structure(zip_ref)
-                
-                # Etapa 2: Análise de conteúdo
-                self._analyze_file_contents(zip_ref)
-                
-                # Etapa 3: Detectar relacionamentos
-                self._detect_relationships()
-                
-                # Etapa 4: Sugerir estratégia de importação
-                self._suggest_import_strategy()
+                self.analyze_zip(zip_ref)
                 
                 # Etapa 5: Gerar relatório
                 self._generate_report()
@@ -55,6 +72,28 @@ class SigtapZipAnalyzer:
         
         return self.analysis_results
     
+    def analyze_zip(self, zip_ref: zipfile.ZipFile) -> Dict[str, Any]:
+        """Etapas 1-4 sobre um ZipFile já aberto (sem gravar relatório)"""
+        # Etapa 1: Estrutura dos arquivos
+        with self.profiler.stage('file_structure'):
+            self._analyze_file_structure(zip_ref)
+        
+        # Etapa 2: Análise de conteúdo
+        with self.profiler.stage('file_contents'):
+            self._analyze_file_contents(zip_ref)
+        
+        # Etapa 3: Detectar relacionamentos
+        with self.profiler.stage('relationships'):
+            self._detect_relationships()
+        
+        # Etapa 4: Sugerir estratégia de importação
+        with self.profiler.stage('import_strategy'):
+            self._suggest_import_strategy()
+        
+        if self.profiler.enabled:
+            self.analysis_results['profile'] = self.profiler.results()
+        return self.analysis_results
+    
     def _analyze_file_structure(self, zip_ref: zipfile.ZipFile):
         """Analisa estrutura básica dos arquivos"""
         print("\n📊 ETAPA 1: ESTRUTURA DOS ARQUIVOS")
@@ -90,66 +129,51 @@ class SigtapZipAnalyzer:
         print("\n📖 ETAPA 2: ANÁLISE DE CONTEÚDO")
         print("-" * 40)
         
-        for file_name, file_info in self.analysis_results['file_structure'].items():
-            if not file_info['is_data_file']:
-                continue
-                
-            print(f"\n🔍 Analisando: {file_name}")
-            
-            try:
-                # Ler bytes do arquivo
-                file_data = zip_ref.read(file_name)
-                
-                # Detectar encoding
-                encoding_result = chardet.detect(file_data)
-                encoding = encoding_result.get('encoding', 'utf-8')
-                confidence = encoding_result.get('confidence', 0)
-                
-                self.analysis_results['encoding_info'][file_name] = {
-                    'encoding': encoding,
-                    'confidence': confidence
-                }
-                
-                print(f"   📝 Encoding: {encoding} (confiança: {confidence:.2f})")
-                
-                # Decodificar conteúdo
-                content = file_data.decode(encoding, errors='ignore')
-                lines = content.split('\n')[:10]  # Primeiras 10 linhas
-                
-                # Detectar delimitador
-                delimiter = self._detect_delimiter(lines[0] if lines else "")
-                print(f"   🔧 Delimitador detectado: '{delimiter}'")
-                
-                # Analisar primeira linha (cabeçalho)
-                if lines:
-                    header_line = lines[0].strip()
-                    columns = [col.strip() for col in header_line.split(delimiter)]
-                    
-                    print(f"   📋 Colunas ({len(columns)}): {columns[:5]}...")
-                    
-                    self.analysis_results['column_mappings'][file_name] = {
-                        'delimiter': delimiter,
-                        'columns': columns,
-                        'total_columns': len(columns),
-                        'sample_lines': lines[:5]
-                    }
-                    
-                    # Tentar identificar chaves primárias
-                    potential_keys = self._identify_potential_keys(columns)
-                    if potential_keys:
-                        print(f"   🔑 Possíveis chaves: {potential_keys}")
-                        self.analysis_results['column_mappings'][file_name]['potential_keys'] = potential_keys
-                
-                # Mostrar amostra de dados
-                print(f"   📊 Amostra (primeiras 3 linhas):")
-                for i, line in enumerate(lines[1:4], 1):
-                    if line.strip():
-                        print(f"      {i}: {line[:100]}...")
-                        
-            except Exception as e:
-                print(f"   ❌ Erro ao analisar {file_name}: {e}")
+        data_files = {
+            file_name: file_info['size_bytes']
+            for file_name, file_info in self.analysis_results['file_structure'].items()
+            if file_info['is_data_file']
+        }
+        
+        if self.workers > 1:
+            # Cada processo abre seu próprio ZipFile e analisa uma partição
+            print(f"⚡ Modo paralelo: {self.workers} processos")
+            member_results = run_partitioned(_analyze_partition, self.zip_path, data_files, self.workers)
+        else:
+            member_results = {}
+            for file_name in data_files:
+                layout_name = _layout_member_name(file_name, data_files)
+                layout_data = self._read_member(zip_ref, layout_name) if layout_name else None
+                member_results[file_name] = _analyze_member(file_name, self._read_member(zip_ref, file_name),
+                                                            layout_data)
+        
+        # Mesclar na ordem original dos arquivos (saída determinística)
+        for file_name in data_files:
+            self._merge_member_result(file_name, member_results.get(file_name, {}))
     
-    def _detect_delimiter(self, line: str) -> str:
+    def _read_member(self, zip_ref: zipfile.ZipFile, file_name: str) -> bytes:
+        """Conteúdo do membro, reaproveitando o que já foi descomprimido"""
+        if file_name in self.member_data:
+            return self.member_data[file_name]
+        return zip_ref.read(file_name)
+    
+    def _merge_member_result(self, file_name: str, result: Dict[str, Any]):
+        """Incorpora o resultado de um membro às estruturas do relatório"""
+        for message in result.get('messages', []):
+            print(message)
+        
+        if 'encoding_info' in result:
+            self.analysis_results['encoding_info'][file_name] = result['encoding_info']
+        if 'column_mapping' in result:
+            self.analysis_results['column_mappings'][file_name] = result['column_mapping']
+        if result.get('key_sketches'):
+            self.key_sketches[file_name] = result['key_sketches']
+            self.analysis_results['column_mappings'][file_name]['key_profiles'] = {
+                col: _sketch_profile(sketch) for col, sketch in result['key_sketches'].items()
+            }
+    
+    @staticmethod
+    def _detect_delimiter(line: str) -> str:
         """Detecta o delimitador mais provável"""
         delimiters = [';', ',', '\t', '|']
         delimiter_counts = {}
@@ -161,11 +185,13 @@ class SigtapZipAnalyzer:
         best_delimiter = max(delimiter_counts, key=delimiter_counts.get)
         return best_delimiter if delimiter_counts[best_delimiter] > 0 else ';'
     
-    def _identify_potential_keys(self, columns: List[str]) -> List[str]:
+    @staticmethod
+    def _identify_potential_keys(columns: List[str]) -> List[str]:
         """Identifica possíveis chaves primárias nos nomes das colunas"""
         key_patterns = [
             r'.*id.*', r'.*cod.*', r'.*codigo.*', r'.*key.*',
-            r'.*pk.*', r'.*primary.*', r'.*seq.*', r'.*numero.*'
+            r'.*pk.*', r'.*primary.*', r'.*seq.*', r'.*numero.*',
+            r'^co_.*'  # padrão DATASUS: CO_PROCEDIMENTO, CO_CID, CO_GRUPO...
         ]
         
         potential_keys = []
@@ -179,55 +205,107 @@ class SigtapZipAnalyzer:
         return potential_keys
     
     def _detect_relationships(self):
-        """Detecta relacionamentos entre arquivos"""
+        """Detecta relacionamentos entre arquivos
+
+        Usa um índice invertido coluna -> arquivos: todos os pares que
+        compartilham colunas saem de uma única passada linear. Quando há
+        sketches das colunas-chave, a contenção de valores indica a direção
+        da chave estrangeira (filho -> tabela referenciada).
+        """
         print("\n🧩 ETAPA 3: DETECTANDO RELACIONAMENTOS")
         print("-" * 40)
         
-        # Coletar todas as colunas de todos os arquivos
-        all_columns = {}
+        # Índice invertido: coluna -> arquivos que a contêm (layouts descrevem
+        # tabelas, não são tabelas: ficam fora do grafo)
+        column_index: Dict[str, List[str]] = defaultdict(list)
         for file_name, mapping in self.analysis_results['column_mappings'].items():
-            all_columns[file_name] = mapping.get('columns', [])
+            if _is_layout(file_name):
+                continue
+            for col in dict.fromkeys(mapping.get('columns', [])):
+                if col:
+                    column_index[col].append(file_name)
+        
+        # Pares de arquivos com colunas comuns
+        pair_columns: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for col, files in column_index.items():
+            if len(files) < 2:
+                continue
+            files = sorted(files)
+            for i, file1 in enumerate(files):
+                for file2 in files[i + 1:]:
+                    pair_columns[(file1, file2)].append(col)
         
-        # Procurar colunas comuns
         relationships = {}
+        foreign_keys = []
         
-        for file1, cols1 in all_columns.items():
-            for file2, cols2 in all_columns.items():
-                if file1 >= file2:  # Evitar duplicatas
-                    continue
-                
-                common_columns = set(cols1) & set(cols2)
-                if common_columns:
-                    relationship_key = f"{file1} <-> {file2}"
-                    relationships[relationship_key] = list(common_columns)
-                    
-                    print(f"🔗 {Path(file1).stem} <-> {Path(file2).stem}")
-                    print(f"   Colunas comuns: {list(common_columns)}")
+        for (file1, file2), common_columns in sorted(pair_columns.items()):
+            relationship_key = f"{file1} <-> {file2}"
+            relationships[relationship_key] = common_columns
+            
+            print(f"🔗 {Path(file1).stem} <-> {Path(file2).stem}")
+            print(f"   Colunas comuns: {common_columns}")
+            
+            for col in common_columns:
+                fk = self._infer_foreign_key(file1, file2, col)
+                if fk:
+                    foreign_keys.append(fk)
+                    print(f"   🔑 FK: {Path(fk['from_file']).stem}.{col} -> "
+                          f"{Path(fk['to_file']).stem}.{col} (contenção: {fk['containment']:.2f})")
         
         self.analysis_results['relationships'] = relationships
+        self.analysis_results['foreign_keys'] = foreign_keys
+    
+    def _infer_foreign_key(self, file1: str, file2: str, col: str) -> Dict[str, Any]:
+        """Infere direção de FK a partir dos sketches de valores da coluna"""
+        sketch1 = self.key_sketches.get(file1, {}).get(col)
+        sketch2 = self.key_sketches.get(file2, {}).get(col)
+        if not sketch1 or not sketch2 or not sketch1['hashes'] or not sketch2['hashes']:
+            return {}
+        
+        candidates = []
+        for child, child_sketch, parent, parent_sketch in (
+            (file1, sketch1, file2, sketch2),
+            (file2, sketch2, file1, sketch1)
+        ):
+            containment = _sketch_containment(child_sketch, parent_sketch)
+            uniqueness = _sketch_profile(parent_sketch)['uniqueness']
+            if containment >= FK_MIN_CONTAINMENT and uniqueness >= FK_MIN_UNIQUENESS:
+                candidates.append({
+                    'from_file': child,
+                    'to_file': parent,
+                    'column': col,
+                    'containment': round(containment, 4),
+                    'referenced_uniqueness': round(uniqueness, 4)
+                })
+        
+        if len(candidates) == 2:
+            # Ambos únicos e contidos (1:1): a tabela com mais linhas referencia a menor
+            candidates.sort(key=lambda fk: self.key_sketches[fk['from_file']][col]['rows'], reverse=True)
+        return candidates[0] if candidates else {}
     
     def _suggest_import_strategy(self):
         """Sugere estratégia de importação"""
         print("\n🎯 ETAPA 4: ESTRATÉGIA DE IMPORTAÇÃO")
         print("-" * 40)
         
-        # Analisar arquivos por tamanho e dependências
+        # Analisar arquivos por tamanho e dependências (layouts não são importados)
         file_sizes = {}
         for file_name, info in self.analysis_results['file_structure'].items():
-            if info['is_data_file']:
+            if info['is_data_file'] and not _is_layout(file_name):
                 file_sizes[file_name] = info['size_bytes']
         
-        # Ordenar por tamanho (menor primeiro - geralmente são tabelas de referência)
-        sorted_files = sorted(file_sizes.items(), key=lambda x: x[1])
+        # Tabelas referenciadas antes das que as referenciam (menor primeiro no empate)
+        import_order = self._topological_import_order(file_sizes, self.analysis_results['foreign_keys'])
         
         strategy = {
-            'import_order': [file_name for file_name, _ in sorted_files],
+            'import_order': import_order,
             'recommendations': [],
             'table_mapping': {}
         }
         
         print("📋 Ordem sugerida de importação:")
-        for i, (file_name, size) in enumerate(sorted_files, 1):
+        for i, file_name in enumerate(import_order, 1):
+            size = file_sizes[file_name]
             base_name = Path(file_name).stem
             table_name = self._suggest_table_name(base_name)
             strategy['table_mapping'][file_name] = table_name
@@ -237,7 +315,7 @@ class SigtapZipAnalyzer:
         
         # Adicionar recomendações
         strategy['recommendations'].extend([
-            "Importar arquivos menores primeiro (tabelas de referência)",
+            "Importar tabelas referenciadas antes das que dependem delas (ordem acima)",
             "Verificar encoding antes da importação",
             "Criar índices nas colunas de chave identificadas",
             "Validar integridade referencial entre tabelas"
@@ -245,6 +323,37 @@ class SigtapZipAnalyzer:
         
         self.analysis_results['import_strategy'] = strategy
     
+    @staticmethod
+    def _topological_import_order(file_sizes: Dict[str, int], foreign_keys: List[Dict[str, Any]]) -> List[str]:
+        """Ordena arquivos pelo grafo de FKs (Kahn), desempate por tamanho
+
+        Arquivos presos em ciclos entram no final, do menor para o maior.
+        """
+        dependents: Dict[str, set] = defaultdict(set)
+        pending: Dict[str, int] = {file_name: 0 for file_name in file_sizes}
+        for fk in foreign_keys:
+            child, parent = fk['from_file'], fk['to_file']
+            if child == parent or child not in pending or parent not in pending:
+                continue
+            if child not in dependents[parent]:
+                dependents[parent].add(child)
+                pending[child] += 1
+        
+        ready = [(size, name) for name, size in file_sizes.items() if pending[name] == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, file_name = heapq.heappop(ready)
+            order.append(file_name)
+            for child in dependents[file_name]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    heapq.heappush(ready, (file_sizes[child], child))
+        
+        placed = set(order)
+        remaining = sorted((size, name) for name, size in file_sizes.items() if name not in placed)
+        return order + [name for _, name in remaining]
+    
     def _suggest_table_name(self, base_name: str) -> str:
         """Sugere nome de tabela baseado no nome do arquivo"""
         # Remover prefixos/sufixos comuns
@@ -269,9 +378,10 @@ class SigtapZipAnalyzer:
         print(f"📄 Total de arquivos de dados: {total_files}")
         print(f"💾 Tamanho total: {total_size/(1024*1024):.1f} MB")
         print(f"🔗 Relacionamentos encontrados: {len(self.analysis_results['relationships'])}")
+        print(f"🔑 Chaves estrangeiras inferidas: {len(self.analysis_results['foreign_keys'])}")
         
         # Salvar resultados em JSON
-        output_file = 'sigtap_analysis_report.json'
+        output_file = self.report_path
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(self.analysis_results, f, indent=2, ensure_ascii=False)
         
@@ -283,19 +393,216 @@ class SigtapZipAnalyzer:
         print("3. Implementar validação de integridade referencial")
         print("4. Criar interface para seleção de versão dos dados")
 
+def _is_layout(file_name: str) -> bool:
+    return Path(file_name).name.lower().endswith(LAYOUT_SUFFIX)
+
+def _layout_member_name(file_name: str, names) -> Optional[str]:
+    """Membro *_layout.txt da tabela (tb_x.txt -> tb_x_layout.txt), se existir"""
+    if _is_layout(file_name):
+        return None
+    target = (Path(file_name).stem + LAYOUT_SUFFIX).lower()
+    parent = str(Path(file_name).parent).lower()
+    for name in names:
+        if Path(name).name.lower() == target and str(Path(name).parent).lower() == parent:
+            return name
+    return None
+
+def _analyze_member(file_name: str, file_data: bytes, layout_data: Optional[bytes] = None) -> Dict[str, Any]:
+    """Analisa um membro do ZIP (encoding, delimitador ou layout, colunas)
+
+    Tabelas DATASUS (tb_*/rl_*) são de largura fixa e sem cabeçalho: com o
+    *_layout.txt correspondente, as colunas vêm do layout e os sketches das
+    colunas CO_* são construídos sobre os valores fatiados.
+
+    Função de módulo para poder rodar em processos separados. As mensagens
+    de console são acumuladas e impressas pelo processo principal.
+    """
+    result: Dict[str, Any] = {'messages': [f"\n🔍 Analisando: {file_name}"]}
+    messages = result['messages']
+    
+    try:
+        # Detectar encoding
+        encoding_result = chardet.detect(file_data)
+        encoding = encoding_result.get('encoding') or 'utf-8'
+        confidence = encoding_result.get('confidence', 0)
+        
+        result['encoding_info'] = {
+            'encoding': encoding,
+            'confidence': confidence
+        }
+        
+        messages.append(f"   📝 Encoding: {encoding} (confiança: {confidence:.2f})")
+        
+        # Decodificar conteúdo
+        content = file_data.decode(encoding, errors='ignore')
+        lines = content.split('\n')[:10]  # Primeiras 10 linhas
+        
+        layout = parse_layout(layout_data) if layout_data else []
+        if layout:
+            columns = [col for col, _, _ in layout]
+            messages.append(f"   📐 Largura fixa (layout): {len(columns)} colunas {columns[:5]}...")
+            result['column_mapping'] = {
+                'format': 'fixed_width',
+                'columns': columns,
+                'layout': [list(entry) for entry in layout],
+                'total_columns': len(columns),
+                'sample_lines': lines[:5]
+            }
+            potential_keys = [col for col in columns if col.startswith('CO_')]
+            if potential_keys:
+                messages.append(f"   🔑 Possíveis chaves: {potential_keys}")
+                result['column_mapping']['potential_keys'] = potential_keys
+                rows = iter_fixed_width_lines(content.splitlines(), layout)
+                result['key_sketches'] = _build_key_sketches(rows, potential_keys)
+            return result
+        
+        # Detectar delimitador
+        delimiter = SigtapZipAnalyzer._detect_delimiter(lines[0] if lines else "")
+        messages.append(f"   🔧 Delimitador detectado: '{delimiter}'")
+        
+        # Analisar primeira linha (cabeçalho)
+        if lines:
+            header_line = lines[0].strip()
+            columns = [col.strip() for col in header_line.split(delimiter)]
+            
+            messages.append(f"   📋 Colunas ({len(columns)}): {columns[:5]}...")
+            
+            result['column_mapping'] = {
+                'delimiter': delimiter,
+                'columns': columns,
+                'total_columns': len(columns),
+                'sample_lines': lines[:5]
+            }
+            
+            # Tentar identificar chaves primárias
+            potential_keys = SigtapZipAnalyzer._identify_potential_keys(columns)
+            if potential_keys:
+                messages.append(f"   🔑 Possíveis chaves: {potential_keys}")
+                result['column_mapping']['potential_keys'] = potential_keys
+                rows = (dict(zip(columns, line.split(delimiter)))
+                        for line in content.splitlines()[1:] if line.strip())
+                result['key_sketches'] = _build_key_sketches(rows, potential_keys)
+        
+        # Mostrar amostra de dados
+        messages.append(f"   📊 Amostra (primeiras 3 linhas):")
+        for i, line in enumerate(lines[1:4], 1):
+            if line.strip():
+                messages.append(f"      {i}: {line[:100]}...")
+                
+    except Exception as e:
+        messages.append(f"   ❌ Erro ao analisar {file_name}: {e}")
+    
+    return result
+
+def _stable_hash(value: str) -> int:
+    """Hash de 64 bits estável entre processos (hash() é randomizado)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def _build_key_sketches(rows: Iterable[Dict[str, str]], key_columns: List[str],
+                        k: int = SKETCH_SIZE) -> Dict[str, Dict[str, Any]]:
+    """Constrói sketches KMV (k menores hashes distintos) das colunas-chave
+
+    rows: linhas já separadas em {coluna: valor}. A contagem de distintos é
+    exata (um conjunto de hashes por coluna; tabelas SIGTAP cabem em memória);
+    o sketch guarda só os k menores hashes, usados na contenção entre arquivos.
+    """
+    positions = list(dict.fromkeys(key_columns))
+    heaps = {col: [] for col in positions}        # max-heap (negativos)
+    seen = {col: set() for col in positions}
+    count = 0
+    
+    for row in rows:
+        count += 1
+        for col in positions:
+            value = (row.get(col) or '').strip()
+            if not value:
+                continue
+            h = _stable_hash(value)
+            if h in seen[col]:
+                continue
+            seen[col].add(h)
+            heap = heaps[col]
+            if len(heap) < k:
+                heapq.heappush(heap, -h)
+            elif h < -heap[0]:
+                heapq.heappushpop(heap, -h)
+    
+    return {
+        col: {'rows': count, 'k': k, 'distinct': len(seen[col]), 'hashes': sorted(-h for h in heaps[col])}
+        for col in positions
+    }
+
+def _sketch_threshold(sketch: Dict[str, Any]) -> int:
+    """Maior hash coberto pelo sketch (sketch incompleto = conjunto exato)"""
+    if len(sketch['hashes']) < sketch['k']:
+        return HASH_SPACE
+    return sketch['hashes'][-1]
+
+def _sketch_profile(sketch: Dict[str, Any]) -> Dict[str, Any]:
+    """Cardinalidade e unicidade de uma coluna (exatas; estimadas pelo sketch
+    quando a contagem exata não veio junto)"""
+    hashes = sketch['hashes']
+    if 'distinct' in sketch:
+        distinct = sketch['distinct']
+    elif len(hashes) < sketch['k']:
+        distinct = len(hashes)
+    else:
+        distinct = int((sketch['k'] - 1) * HASH_SPACE / (hashes[-1] + 1))
+    rows = sketch['rows']
+    return {
+        'rows': rows,
+        'distinct': distinct,
+        'uniqueness': round(min(1.0, distinct / rows), 4) if rows else 0.0
+    }
+
+def _sketch_containment(child: Dict[str, Any], parent: Dict[str, Any]) -> float:
+    """Estima a fração dos valores distintos de child presentes em parent
+
+    Abaixo do menor limiar dos dois sketches, pertencer ao sketch equivale a
+    pertencer à coluna, então a amostra de child é comparada exatamente.
+    """
+    tau = min(_sketch_threshold(child), _sketch_threshold(parent))
+    sample = [h for h in child['hashes'] if h <= tau]
+    if not sample:
+        return 0.0
+    parent_hashes = set(parent['hashes'])
+    return sum(1 for h in sample if h in parent_hashes) / len(sample)
+
+def _analyze_partition(zip_path: str, file_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Worker: abre um ZipFile próprio e analisa uma partição de membros"""
+    results = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        names = zip_ref.namelist()
+        for file_name in file_names:
+            try:
+                layout_name = _layout_member_name(file_name, names)
+                layout_data = zip_ref.read(layout_name) if layout_name else None
+                results[file_name] = _analyze_member(file_name, zip_ref.read(file_name), layout_data)
+            except Exception as e:
+                results[file_name] = {'messages': [f"\n🔍 Analisando: {file_name}",
+                                                   f"   ❌ Erro ao analisar {file_name}: {e}"]}
+    return results
+
 def main():
-    if len(sys.argv) != 2:
-        print("❌ Uso: python analyze_sigtap_zip.py <caminho_para_arquivo.zip>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Analisador automático de ZIP SIGTAP")
+    parser.add_argument('zip_path', help="caminho para o arquivo .zip")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"processos para análise paralela (0 = todos os núcleos: {default_workers()})")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
-    zip_path = sys.argv[1]
+    zip_path = args.zip_path
     
     if not os.path.exists(zip_path):
         print(f"❌ Arquivo não encontrado: {zip_path}")
         sys.exit(1)
     
-    analyzer = SigtapZipAnalyzer(zip_path)
-    results = analyzer.analyze()
+    workers = args.workers if args.workers > 0 else default_workers()
+    analyzer = SigtapZipAnalyzer(zip_path, workers=workers, profile=args.profile or bool(args.profile_out))
+    results = run_profiled(analyzer.analyze, analyzer.profiler, args.profile_out, name=zip_path)
+    if analyzer.profiler.enabled:
+        analyzer.profiler.stop()
+        analyzer.profiler.print_summary()
     
     print(f"\n✅ Análise concluída! Verifique o arquivo 'sigtap_analysis_report.json'")
 
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+🧪 Gerador de corpus sintético SIGTAP
+Planilhas no formato do Excel DATASUS (várias abas, cabeçalhos variados) e
+ZIPs no formato oficial (tb_*/rl_* de largura fixa + *_layout.txt), em
+escalas configuráveis e determinísticas (mesma semente, mesmos arquivos)
+"""
+
+import random
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+SCALES = {
+    'small': 1_000,
+    'medium': 10_000,
+    'large': 50_000,
+}
+WORDS = ['TRATAMENTO', 'CIRURGIA', 'EXCISÃO', 'RESSECÇÃO', 'BIÓPSIA', 'DRENAGEM', 'SUTURA',
+         'ARTROPLASTIA', 'REVISÃO', 'LAPAROTOMIA', 'VIDEOLAPAROSCOPIA', 'DE', 'EM', 'COM',
+         'LESÃO', 'JOELHO', 'QUADRIL', 'ABDOME', 'PELE', 'TECIDO', 'SUBCUTÂNEO', 'MÚLTIPLA']
+COMPLEXITIES = ['1', '2', '3']
+GENDERS = ['I', 'M', 'F']
+CBOS = ['225125', '225225', '225250', '225270', '225285', '000000']
+
+# Cabeçalhos por aba: mesmo conteúdo com nomes diferentes (como nas planilhas reais)
+SHEET_HEADERS = [
+    ('Procedimentos', {
+        'code': 'Código do Procedimento', 'description': 'Descrição', 'value_amb': 'Valor Ambulatorial',
+        'value_hosp': 'Valor Hospitalar', 'value_prof': 'Valor Profissional', 'complexity': 'Complexidade',
+        'gender': 'Sexo', 'min_age': 'Idade Mínima', 'max_age': 'Idade Máxima', 'cid': 'CID', 'cbo': 'CBO',
+    }),
+    ('Tabela Cirurgias', {
+        'code': 'COD_PROC', 'description': 'NOME PROC', 'value_amb': 'VAL_AMB', 'value_hosp': 'VAL_HOSP',
+        'value_prof': 'VAL_PROF', 'complexity': 'NIVEL', 'gender': 'GENERO', 'cid': 'CIDs', 'cbo': 'CBOs',
+    }),
+]
+
+# Tabelas do ZIP: (coluna, largura)
+TABLE_LAYOUTS: Dict[str, List[Tuple[str, int]]] = {
+    'tb_procedimento': [
+        ('CO_PROCEDIMENTO', 10), ('NO_PROCEDIMENTO', 250), ('TP_COMPLEXIDADE', 1), ('TP_SEXO', 1),
+        ('QT_MAXIMA_EXECUCAO', 4), ('QT_DIAS_PERMANENCIA', 4), ('QT_PONTOS', 4), ('VL_IDADE_MINIMA', 4),
+        ('VL_IDADE_MAXIMA', 4), ('VL_SH', 12), ('VL_SA', 12), ('VL_SP', 12), ('CO_FINANCIAMENTO', 2),
+        ('CO_RUBRICA', 6), ('QT_TEMPO_PERMANENCIA', 4), ('DT_COMPETENCIA', 6),
+    ],
+    'tb_grupo': [('CO_GRUPO', 2), ('NO_GRUPO', 100), ('DT_COMPETENCIA', 6)],
+    'tb_sub_grupo': [('CO_GRUPO', 2), ('CO_SUB_GRUPO', 2), ('NO_SUB_GRUPO', 100), ('DT_COMPETENCIA', 6)],
+    'tb_cid': [('CO_CID', 4), ('NO_CID', 100), ('TP_AGRAVO', 1), ('TP_SEXO', 1), ('TP_ESTADIO', 1)],
+    'tb_ocupacao': [('CO_OCUPACAO', 6), ('NO_OCUPACAO', 150)],
+    'rl_procedimento_cid': [('CO_PROCEDIMENTO', 10), ('CO_CID', 4), ('ST_PRINCIPAL', 1), ('DT_COMPETENCIA', 6)],
+    'rl_procedimento_ocupacao': [('CO_PROCEDIMENTO', 10), ('CO_OCUPACAO', 6), ('DT_COMPETENCIA', 6)],
+}
+
+# Chaves estrangeiras que o analisador de ZIP deve inferir: (filho, pai, coluna)
+EXPECTED_FOREIGN_KEYS = {
+    ('rl_procedimento_cid.txt', 'tb_procedimento.txt', 'CO_PROCEDIMENTO'),
+    ('rl_procedimento_cid.txt', 'tb_cid.txt', 'CO_CID'),
+    ('rl_procedimento_ocupacao.txt', 'tb_procedimento.txt', 'CO_PROCEDIMENTO'),
+    ('rl_procedimento_ocupacao.txt', 'tb_ocupacao.txt', 'CO_OCUPACAO'),
+    ('tb_sub_grupo.txt', 'tb_grupo.txt', 'CO_GRUPO'),
+}
+
+
+def format_code(digits: str) -> str:
+    return f"{digits[0:2]}.{digits[2:4]}.{digits[4:6]}.{digits[6:9]}-{digits[9]}"
+
+
+def generate_procedures(count: int, seed: int = 42) -> List[Dict]:
+    """Procedimentos sintéticos com hierarquia grupo/subgrupo/forma realista"""
+    rng = random.Random(seed)
+    cids = [f"{chr(65 + i % 26)}{i % 100:02d}{i % 10}" for i in range(500)]
+    procedures = []
+    for i in range(count):
+        group = 1 + i % 8
+        digits = f"{group:02d}{1 + (i // 8) % 9:02d}{1 + (i // 72) % 9:02d}{i % 1000:03d}{i % 10}"
+        procedures.append({
+            'code': format_code(digits),
+            'digits': digits,
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))),
+            'value_amb': round(rng.uniform(0, 500), 2),
+            'value_hosp': round(rng.uniform(0, 5000), 2),
+            'value_prof': round(rng.uniform(0, 1500), 2),
+            'complexity': rng.choice(COMPLEXITIES),
+            'gender': rng.choice(GENDERS),
+            'min_age': rng.choice([0, 1, 18]),  # anos, como na planilha
+            'max_age': rng.choice([110, 9999]),
+            'cid': rng.sample(cids, rng.randint(0, 6)),
+            'cbo': rng.sample(CBOS, rng.randint(0, 3)),
+        })
+    return procedures
+
+
+def write_workbook(path: str, procedures: List[Dict], duplicate_ratio: float = 0.05) -> Path:
+    """Planilha com abas de procedimentos (cabeçalhos diferentes) e uma aba de leia-me
+
+    Uma fração dos códigos aparece nas duas abas, para exercitar a deduplicação.
+    """
+    out = Path(path)
+    half = len(procedures) // 2
+    duplicates = int(len(procedures) * duplicate_ratio)
+    chunks = [procedures[:half], procedures[half - duplicates:]]
+
+    with pd.ExcelWriter(out, engine='openpyxl') as writer:
+        pd.DataFrame({'Instruções': ['Tabela SIGTAP sintética', 'Gerada para benchmark']}).to_excel(
+            writer, sheet_name='Leia-me', index=False)
+        for (sheet_name, headers), chunk in zip(SHEET_HEADERS, chunks):
+            rows = []
+            for p in chunk:
+                row = {}
+                for field, header in headers.items():
+                    value = p[field]
+                    row[header] = ', '.join(value) if isinstance(value, list) else value
+                rows.append(row)
+            pd.DataFrame(rows, columns=list(headers.values())).to_excel(writer, sheet_name=sheet_name, index=False)
+    return out
+
+
+def _age_months(years: int) -> int:
+    """O ZIP guarda idades em meses; 9999 (sem limite) não é convertido"""
+    return years if years >= 9999 else years * 12
+
+
+def _layout_text(columns: List[Tuple[str, int]]) -> str:
+    """*_layout.txt no formato DATASUS (posições 1-based)"""
+    lines = ['Coluna,Tamanho,Inicio,Fim,Tipo']
+    start = 1
+    for column, width in columns:
+        kind = 'NUMBER' if column.startswith(('VL_', 'QT_')) else 'VARCHAR2'
+        lines.append(f"{column},{width},{start},{start + width - 1},{kind}")
+        start += width
+    return '\n'.join(lines) + '\n'
+
+
+def _fixed_width(columns: List[Tuple[str, int]], rows: List[Dict[str, str]]) -> bytes:
+    """Linhas de largura fixa (números à direita com zeros, texto à esquerda)"""
+    lines = []
+    for row in rows:
+        parts = []
+        for column, width in columns:
+            value = str(row.get(column, ''))[:width]
+            parts.append(value.zfill(width) if column.startswith(('VL_', 'QT_')) else value.ljust(width))
+        lines.append(''.join(parts))
+    return ('\r\n'.join(lines) + '\r\n').encode('latin-1')
+
+
+def write_zip(path: str, procedures: List[Dict], competencia: str = '202410') -> Path:
+    """ZIP no formato oficial: tabelas tb_*, relacionamentos rl_* e layouts"""
+    tables: Dict[str, List[Dict[str, str]]] = {name: [] for name in TABLE_LAYOUTS}
+    groups, subgroups, cids, cbos = set(), set(), set(), set()
+
+    for p in procedures:
+        digits = p['digits']
+        groups.add(digits[0:2])
+        subgroups.add((digits[0:2], digits[2:4]))
+        tables['tb_procedimento'].append({
+            'CO_PROCEDIMENTO': digits, 'NO_PROCEDIMENTO': p['description'],
+            'TP_COMPLEXIDADE': p['complexity'], 'TP_SEXO': p['gender'], 'QT_MAXIMA_EXECUCAO': '1',
+            'QT_DIAS_PERMANENCIA': '2', 'QT_PONTOS': '0', 'VL_IDADE_MINIMA': str(_age_months(p['min_age'])),
+            'VL_IDADE_MAXIMA': str(_age_months(p['max_age'])), 'VL_SH': str(round(p['value_hosp'] * 100)),
+            'VL_SA': str(round(p['value_amb'] * 100)), 'VL_SP': str(round(p['value_prof'] * 100)),
+            'CO_FINANCIAMENTO': '06', 'QT_TEMPO_PERMANENCIA': '0', 'DT_COMPETENCIA': competencia,
+        })
+        for cid in p['cid']:
+            cids.add(cid)
+            tables['rl_procedimento_cid'].append({'CO_PROCEDIMENTO': digits, 'CO_CID': cid,
+                                                  'ST_PRINCIPAL': 'S', 'DT_COMPETENCIA': competencia})
+        for cbo in p['cbo']:
+            cbos.add(cbo)
+            tables['rl_procedimento_ocupacao'].append({'CO_PROCEDIMENTO': digits, 'CO_OCUPACAO': cbo,
+                                                       'DT_COMPETENCIA': competencia})
+
+    tables['tb_grupo'] = [{'CO_GRUPO': g, 'NO_GRUPO': f'GRUPO {g}', 'DT_COMPETENCIA': competencia}
+                          for g in sorted(groups)]
+    tables['tb_sub_grupo'] = [{'CO_GRUPO': g, 'CO_SUB_GRUPO': s, 'NO_SUB_GRUPO': f'SUBGRUPO {g}.{s}',
+                               'DT_COMPETENCIA': competencia} for g, s in sorted(subgroups)]
+    tables['tb_cid'] = [{'CO_CID': c, 'NO_CID': f'DOENÇA {c}', 'TP_AGRAVO': '0', 'TP_SEXO': 'I',
+                         'TP_ESTADIO': 'N'} for c in sorted(cids)]
+    tables['tb_ocupacao'] = [{'CO_OCUPACAO': c, 'NO_OCUPACAO': f'OCUPAÇÃO {c}'} for c in sorted(cbos)]
+
+    out = Path(path)
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, columns in TABLE_LAYOUTS.items():
+            zf.writestr(f'{name}.txt', _fixed_width(columns, tables[name]))
+            zf.writestr(f'{name}_layout.txt', _layout_text(columns))
+    return out
+
+
+def build_corpus(output_dir: str, scale: str = 'small', count: int = 0, seed: int = 42) -> Dict[str, Path]:
+    """Gera (ou reaproveita) planilha e ZIP de uma escala; retorna os caminhos"""
+    count = count or SCALES[scale]
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    workbook = out / f'sigtap_bench_{count}_{seed}.xlsx'
+    archive = out / f'sigtap_bench_{count}_{seed}.zip'
+
+    procedures = None
+    if not workbook.exists() or not archive.exists():
+        procedures = generate_procedures(count, seed)
+    if not workbook.exists():
+        write_workbook(str(workbook), procedures)
+    if not archive.exists():
+        write_zip(str(archive), procedures)
+    return {'workbook': workbook, 'zip': archive, 'procedures': count}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gerador de corpus sintético SIGTAP (planilha + ZIP)")
+    parser.add_argument('output_dir', help="diretório de saída")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--procedures', type=int, default=0, help="quantidade explícita (sobrepõe --scale)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.output_dir, args.scale, args.procedures, args.seed)
+    print(f"🧪 Corpus gerado ({corpus['procedures']} procedimentos):")
+    print(f"   📊 {corpus['workbook']}")
+    print(f"   📦 {corpus['zip']}")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+📏 Benchmark e regressão dos scripts SIGTAP
+Mede SigtapProcessor.process, save_json, SimpleSigtapAnalyzer.analyze e
+SigtapZipAnalyzer.analyze sobre o corpus sintético, registra vazão e pico
+de memória, e falha se algum caso regredir além do limite em relação à
+baseline gravada
+"""
+
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from analyze_sigtap_zip import SigtapZipAnalyzer
+from sigtap_bench_fixtures import EXPECTED_FOREIGN_KEYS, SCALES, build_corpus
+from sigtap_processor import SigtapProcessor
+from simple_sigtap_analyzer import SimpleSigtapAnalyzer
+
+DEFAULT_BASELINE = Path(__file__).with_name('sigtap_benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.25         # +25% de tempo
+DEFAULT_MEMORY_THRESHOLD = 0.25  # +25% de pico de memória
+# Diferenças de tempo abaixo disso são ruído (casos de poucos ms oscilam >25%)
+MIN_TIME_DELTA = 0.05
+
+
+@contextmanager
+def _quiet(workdir: Path):
+    """Silencia console/logs e executa no diretório de trabalho (relatórios vão para lá)"""
+    previous_dir = os.getcwd()
+    logging.disable(logging.INFO)
+    os.chdir(workdir)
+    try:
+        with redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.chdir(previous_dir)
+        logging.disable(logging.NOTSET)
+
+
+def _measure(fn: Callable[[], Any], setup: Callable[[], Any], repeat: int, workdir: Path) -> Dict[str, float]:
+    """Mediana do tempo de parede em `repeat` execuções + uma execução com tracemalloc
+
+    O pico de memória é medido à parte para o tracemalloc não distorcer o tempo.
+    Como no timeit, o GC fica desligado durante as execuções cronometradas.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        with _quiet(workdir):
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                fn(state)
+                timings.append(time.perf_counter() - started)
+            finally:
+                gc.enable()
+
+    state = setup()
+    with _quiet(workdir):
+        tracemalloc.start()
+        try:
+            fn(state)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'seconds': round(statistics.median(timings), 4),
+        'min_seconds': round(min(timings), 4),
+        'peak_memory_mb': round(peak / (1024 * 1024), 2)
+    }
+
+
+def run_benchmarks(corpus: Dict[str, Any], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Executa os quatro casos e calcula vazão (procedimentos/s ou MB/s)"""
+    workbook, archive, count = corpus['workbook'], corpus['zip'], corpus['procedures']
+    zip_mb = archive.stat().st_size / (1024 * 1024)
+    results: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory(prefix='sigtap_bench_') as tmp:
+        workdir = Path(tmp)
+
+        def processed():
+            processor = SigtapProcessor(str(workbook))
+            with _quiet(workdir):
+                processor.process()
+            return processor
+
+        cases = {
+            'processor.process': (lambda _: SigtapProcessor(str(workbook)).process(), lambda: None, count),
+            'processor.save_json': (lambda p: p.save_json(str(workdir / 'sigtap_structured.json')), processed, count),
+            'simple_analyzer.analyze': (lambda _: SimpleSigtapAnalyzer(str(archive)).analyze(), lambda: None, None),
+            'zip_analyzer.analyze': (lambda _: SigtapZipAnalyzer(str(archive)).analyze(), lambda: None, None),
+        }
+        for name, (fn, setup, rows) in cases.items():
+            print(f"⏱️ {name}...")
+            result = _measure(fn, setup, repeat, workdir)
+            if rows:
+                result['procedures_per_second'] = round(rows / result['seconds'], 1)
+            else:
+                result['zip_mb_per_second'] = round(zip_mb / result['seconds'], 2)
+            results[name] = result
+
+    return results
+
+
+def check_relationships(corpus: Dict[str, Any]) -> list:
+    """Chaves estrangeiras esperadas do corpus que o analisador de ZIP não inferiu"""
+    with tempfile.TemporaryDirectory(prefix='sigtap_check_') as tmp:
+        with _quiet(Path(tmp)):
+            results = SigtapZipAnalyzer(str(corpus['zip'])).analyze()
+    found = {(fk['from_file'], fk['to_file'], fk['column']) for fk in results.get('foreign_keys', [])}
+    return sorted(EXPECTED_FOREIGN_KEYS - found)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+            threshold: float, memory_threshold: float) -> Dict[str, list]:
+    """Regressões: tempo ou pico de memória acima da baseline + limite
+
+    Compara a melhor das --repeat execuções; o tempo só conta como regressão
+    se também passar de MIN_TIME_DELTA segundos.
+    """
+    regressions, report = [], []
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            report.append(f"   ➖ {name:<26} sem baseline")
+            continue
+        # Melhor execução de cada lado: menos sensível a ruído que a mediana
+        current_seconds = current.get('min_seconds', current['seconds'])
+        base_seconds = base.get('min_seconds', base['seconds'])
+        time_ratio = current_seconds / base_seconds if base_seconds else 1.0
+        memory_ratio = (current['peak_memory_mb'] / base['peak_memory_mb']) if base['peak_memory_mb'] else 1.0
+        failed = []
+        if time_ratio > 1 + threshold and current_seconds - base_seconds > MIN_TIME_DELTA:
+            failed.append(f"tempo {time_ratio:.2f}x")
+        if memory_ratio > 1 + memory_threshold:
+            failed.append(f"memória {memory_ratio:.2f}x")
+        status = '❌' if failed else '✅'
+        report.append(f"   {status} {name:<26} tempo {time_ratio:.2f}x  memória {memory_ratio:.2f}x")
+        if failed:
+            regressions.append(f"{name}: {', '.join(failed)}")
+    return {'report': report, 'regressions': regressions}
+
+
+def _environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine()
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark/regressão dos scripts SIGTAP")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--procedures', type=int, default=0, help="quantidade explícita (sobrepõe --scale)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="execuções cronometradas por caso (mediana)")
+    parser.add_argument('--corpus-dir', default=None,
+                        help="diretório do corpus (reaproveitado entre execuções; padrão: temporário, apagado ao final)")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="arquivo de baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="grava os resultados como nova baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="regressão de tempo tolerada (0.25 = +25%%)")
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help="regressão de pico de memória tolerada")
+    parser.add_argument('-o', '--output', default=None, help="grava resultados desta execução em JSON")
+    args = parser.parse_args()
+
+    if args.corpus_dir:
+        _benchmark(args, args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix='sigtap_corpus_') as corpus_dir:
+            _benchmark(args, corpus_dir)
+
+
+def _benchmark(args, corpus_dir: str):
+    """Gera o corpus, confere as relações, mede e compara com a baseline"""
+    print(f"🧪 Preparando corpus em {corpus_dir}...")
+    corpus = build_corpus(corpus_dir, args.scale, args.procedures, args.seed)
+
+    missing = check_relationships(corpus)
+    if missing:
+        print("❌ Analisador de ZIP não inferiu as chaves estrangeiras esperadas:")
+        for child, parent, column in missing:
+            print(f"   - {child}.{column} -> {parent}")
+        sys.exit(1)
+    print("✅ Chaves estrangeiras do corpus inferidas")
+
+    results = run_benchmarks(corpus, repeat=max(1, args.repeat))
+    run = {
+        'scale': args.scale,
+        'procedures': corpus['procedures'],
+        'seed': args.seed,
+        'environment': _environment(),
+        'generated_at': datetime.now().isoformat(),
+        'results': results
+    }
+
+    print("\n📏 RESULTADOS:")
+    for name, result in results.items():
+        rate = (f"{result['procedures_per_second']:,.0f} proc/s" if 'procedures_per_second' in result
+                else f"{result['zip_mb_per_second']:.2f} MB/s")
+        print(f"   {name:<26} {result['seconds']:>8.3f}s  {rate:>16}  pico {result['peak_memory_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline salva em: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\n❌ Baseline não encontrada ({baseline_path}); use --save-baseline para criar")
+        sys.exit(2)
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if (baseline.get('procedures'), baseline.get('seed')) != (corpus['procedures'], args.seed):
+        print(f"\n❌ Baseline é de outro corpus ({baseline.get('procedures')} procedimentos, "
+              f"semente {baseline.get('seed')})")
+        sys.exit(2)
+    if baseline.get('environment') != run['environment']:
+        print("\n⚠️ Baseline gravada em outro ambiente; comparações de tempo podem não ser significativas")
+
+    comparison = compare(results, baseline, args.threshold, args.memory_threshold)
+    print(f"\n📊 COMPARAÇÃO COM A BASELINE (limite +{args.threshold:.0%} tempo, +{args.memory_threshold:.0%} memória):")
+    for line in comparison['report']:
+        print(line)
+
+    if comparison['regressions']:
+        print("\n❌ Regressões detectadas:")
+        for regression in comparison['regressions']:
+            print(f"   - {regression}")
+        sys.exit(1)
+    print("\n✅ Sem regressões")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+🔄 SIGTAP Diff entre competências
+Compara duas competências (ZIP x ZIP ou ZIP x sigtap_structured.json) e
+gera apenas os procedimentos novos, removidos e alterados para upsert
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sigtap_zip_reader import iter_zip_procedures
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Campos comparados entre competências (valores primeiro: são o que mais muda)
+DIFF_FIELDS = (
+    'value_hosp', 'value_prof', 'value_amb',
+    'description', 'gender', 'min_age', 'max_age',
+    'max_quantity', 'average_stay', 'points'
+)
+MONEY_FIELDS = {'value_hosp', 'value_prof', 'value_amb'}
+INT_FIELDS = {'max_quantity', 'average_stay', 'points'}
+# Idades comparadas em meses: o ZIP traz meses (unidade 'MESES'), o JSON da
+# planilha traz anos (unidade ''); 9999 = sem limite em qualquer unidade
+AGE_FIELDS = {'min_age', 'max_age'}
+NO_AGE_LIMIT = 9999
+
+
+def iter_source(path: str) -> Iterator[Dict[str, Any]]:
+    """Itera procedimentos de um ZIP SIGTAP ou de um sigtap_structured.json"""
+    if Path(path).suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from data.get('procedures', [])
+    else:
+        for procedure in iter_zip_procedures(path):
+            yield asdict(procedure)
+
+
+def age_in_months(age: Any, unit: Any) -> int:
+    """Idade na unidade do registro -> meses (sem limite continua 9999)"""
+    age = int(age or 0)
+    if age >= NO_AGE_LIMIT:
+        return NO_AGE_LIMIT
+    return age if str(unit or '').strip().upper().startswith('MES') else age * 12
+
+
+def normalize_fields(record: Dict[str, Any], fields: Tuple[str, ...] = DIFF_FIELDS) -> Tuple[Any, ...]:
+    """Valores comparáveis de um registro (dinheiro em centavos, idades em meses)"""
+    values = []
+    for field in fields:
+        value = record.get(field)
+        if field in AGE_FIELDS:
+            value = age_in_months(value, record.get(f'{field}_unit'))
+        elif field in MONEY_FIELDS:
+            value = round(float(value or 0), 2)
+        elif field in INT_FIELDS:
+            value = int(value or 0)
+        else:
+            value = str(value or '').strip()
+        values.append(value)
+    return tuple(values)
+
+
+def record_digest(values: Tuple[Any, ...]) -> bytes:
+    """Hash estável dos campos comparados de um procedimento"""
+    payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class SigtapDiff:
+    """Diff por código entre duas competências SIGTAP"""
+
+    def __init__(self, previous_path: str, current_path: str, fields: Tuple[str, ...] = DIFF_FIELDS):
+        self.previous_path = previous_path
+        self.current_path = current_path
+        self.fields = fields
+        self.added: List[Dict[str, Any]] = []
+        self.removed: List[str] = []
+        self.changed: List[Dict[str, Any]] = []
+        self.stats = {
+            'previous_procedures': 0,
+            'current_procedures': 0,
+            'unchanged': 0,
+            'added': 0,
+            'removed': 0,
+            'changed': 0,
+            'value_changes': 0
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Executa o diff: indexa a competência anterior e percorre a atual em streaming"""
+        logger.info(f"🔄 Diff SIGTAP: {self.previous_path} -> {self.current_path}")
+
+        # Lado anterior: código -> (hash, valores comparados)
+        previous: Dict[str, Tuple[bytes, Tuple[Any, ...]]] = {}
+        for record in iter_source(self.previous_path):
+            values = normalize_fields(record, self.fields)
+            previous[record['code']] = (record_digest(values), values)
+        self.stats['previous_procedures'] = len(previous)
+        logger.info(f"📚 Competência anterior: {len(previous)} procedimentos")
+
+        seen = set()
+        for record in iter_source(self.current_path):
+            code = record['code']
+            if code in seen:
+                continue
+            seen.add(code)
+            values = normalize_fields(record, self.fields)
+
+            if code not in previous:
+                self.added.append(record)
+                continue
+
+            old_digest, old_values = previous[code]
+            if record_digest(values) == old_digest:
+                self.stats['unchanged'] += 1
+                continue
+
+            changes = {
+                field: {'old': old, 'new': new}
+                for field, old, new in zip(self.fields, old_values, values)
+                if old != new
+            }
+            if any(field in MONEY_FIELDS for field in changes):
+                self.stats['value_changes'] += 1
+            self.changed.append({'code': code, 'changes': changes, 'record': record})
+
+        self.removed = sorted(code for code in previous if code not in seen)
+
+        self.stats['current_procedures'] = len(seen)
+        self.stats['added'] = len(self.added)
+        self.stats['removed'] = len(self.removed)
+        self.stats['changed'] = len(self.changed)
+
+        logger.info(f"✅ Diff concluído: +{self.stats['added']} novos, -{self.stats['removed']} removidos, "
+                    f"~{self.stats['changed']} alterados ({self.stats['value_changes']} com mudança de valor)")
+        return self._generate_output()
+
+    def _generate_output(self) -> Dict[str, Any]:
+        """Gera output com os deltas e a lista de upsert (novos + alterados)"""
+        return {
+            'metadata': {
+                'previous_source': str(self.previous_path),
+                'current_source': str(self.current_path),
+                'compared_fields': list(self.fields),
+                'diff_stats': self.stats,
+                'generated_at': datetime.now().isoformat()
+            },
+            'added': [record['code'] for record in self.added],
+            'removed': self.removed,
+            'changed': [{'code': c['code'], 'changes': c['changes']} for c in self.changed],
+            'upsert': self.added + [c['record'] for c in self.changed]
+        }
+
+    def save_json(self, output_path: str):
+        """Salva o diff em JSON"""
+        output = self._generate_output()
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"💾 Diff salvo: {output_path}")
+        return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff SIGTAP entre competências")
+    parser.add_argument('current', help="ZIP da competência nova (ou sigtap_structured.json)")
+    parser.add_argument('previous', help="ZIP da competência anterior ou sigtap_structured.json")
+    parser.add_argument('-o', '--output', default='sigtap_diff.json', help="arquivo JSON de saída")
+    args = parser.parse_args()
+
+    for path in (args.current, args.previous):
+        if not Path(path).exists():
+            print(f"❌ Arquivo não encontrado: {path}")
+            sys.exit(1)
+
+    diff = SigtapDiff(args.previous, args.current)
+    diff.run()
+    json_path = diff.save_json(args.output)
+    print(f"🎉 Diff concluído! {len(diff.added) + len(diff.changed)} procedimentos para upsert em {json_path}")
+
+
+if __name__ == "__main__":
+    main()
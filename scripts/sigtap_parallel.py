@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Utilitários de paralelismo para análise de ZIPs SIGTAP
+Distribui membros do ZIP entre processos (cada um com seu próprio ZipFile)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+def default_workers() -> int:
+    """Número padrão de processos (núcleos disponíveis)"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def partition_members(sizes: Dict[str, int], workers: int) -> List[List[str]]:
+    """Divide membros em partições de tamanho descomprimido equilibrado
+
+    Usa a heurística LPT: maiores arquivos primeiro, sempre na partição
+    menos carregada. Partições vazias são descartadas.
+    """
+    workers = max(1, workers)
+    partitions: List[List[str]] = [[] for _ in range(workers)]
+    loads = [0] * workers
+
+    for name, size in sorted(sizes.items(), key=lambda x: x[1], reverse=True):
+        target = loads.index(min(loads))
+        partitions[target].append(name)
+        loads[target] += size
+
+    return [p for p in partitions if p]
+
+
+def run_partitioned(worker_fn: Callable[[str, List[str]], Dict[str, Any]],
+                    zip_path: str,
+                    sizes: Dict[str, int],
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Executa worker_fn(zip_path, partição) em paralelo e junta os resultados
+
+    worker_fn deve ser uma função de módulo (picklable) que abre seu próprio
+    ZipFile e retorna um dicionário {membro: resultado}.
+    """
+    partitions = partition_members(sizes, workers or default_workers())
+    merged: Dict[str, Any] = {}
+
+    if len(partitions) <= 1:
+        for partition in partitions:
+            merged.update(worker_fn(zip_path, partition))
+        return merged
+
+    with ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+        futures = [executor.submit(worker_fn, zip_path, p) for p in partitions]
+        for future in futures:
+            merged.update(future.result())
+
+    return merged
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+🔁 Pipeline SIGTAP multi-competência
+Processa um diretório de ZIPs oficiais e planilhas SIGTAP em um único comando:
+cada entrada é lida do disco uma vez, e inspeção, análise e extração
+compartilham o mesmo conteúdo descomprimido. Competências rodam em paralelo
+e um manifest com checksums permite pular entradas já concluídas
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from analyze_sigtap_zip import SigtapZipAnalyzer
+from sigtap_parallel import default_workers
+from sigtap_processor import SigtapProcessor, _guess_competencia
+from sigtap_zip_reader import iter_member_procedures
+
+MANIFEST_FILE = 'pipeline_manifest.json'
+MANIFEST_VERSION = 1
+ZIP_EXTENSIONS = {'.zip'}
+WORKBOOK_EXTENSIONS = {'.xlsx', '.xls'}
+# Mesma lista de extensões de dados do inspetor e do analisador
+DATA_EXTENSIONS = {'.csv', '.txt', '.tsv', '.xls', '.xlsx'}
+HASH_CHUNK = 1024 * 1024
+
+
+def discover_inputs(input_dir: str) -> Dict[str, Path]:
+    """Entradas do diretório -> nome do diretório de saída de cada uma
+
+    O nome é o do arquivo sem extensão; se dois arquivos tiverem o mesmo
+    nome base (ex.: 202410.zip e 202410.xlsx), a extensão é acrescentada.
+    """
+    paths = sorted(
+        p for p in Path(input_dir).iterdir()
+        if p.is_file() and p.suffix.lower() in ZIP_EXTENSIONS | WORKBOOK_EXTENSIONS
+    )
+    stems: Dict[str, int] = {}
+    for p in paths:
+        stems[p.stem] = stems.get(p.stem, 0) + 1
+    return {
+        (p.stem if stems[p.stem] == 1 else f"{p.stem}_{p.suffix.lower().lstrip('.')}"): p
+        for p in paths
+    }
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 do arquivo em blocos (sem carregar tudo em memória)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PipelineManifest:
+    """Registro das entradas concluídas (checksum, tamanho, saídas)"""
+
+    def __init__(self, output_dir: str):
+        self.path = Path(output_dir) / MANIFEST_FILE
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+
+    def is_complete(self, path: Path, snapshot: bool = False) -> bool:
+        """Entrada já processada com o mesmo conteúdo, as saídas pedidas e
+        essas saídas ainda presentes"""
+        entry = self.entries.get(path.name)
+        if not entry or entry.get('status') != 'ok':
+            return False
+        # Rodada anterior sem --snapshot não gerou o snapshot pedido agora
+        if snapshot and not entry.get('options', {}).get('snapshot'):
+            return False
+
+        stat = path.stat()
+        if entry.get('size') != stat.st_size:
+            return False
+        if not all(Path(output).exists() for output in entry.get('outputs', [])):
+            return False
+        if entry.get('mtime') == stat.st_mtime:
+            return True
+
+        # mtime mudou (cópia, touch): confirmar pelo conteúdo
+        if file_sha256(path) != entry.get('sha256'):
+            return False
+        entry['mtime'] = stat.st_mtime
+        return True
+
+    def record(self, result: Dict[str, Any]):
+        self.entries[result['input']] = result
+
+    def save(self):
+        """Grava de forma atômica (arquivo temporário + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _save_json(data: Any, path: Path) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return str(path)
+
+
+def _inspect_zip(zip_ref: zipfile.ZipFile) -> Dict[str, Any]:
+    """Etapa de inspeção: lista e categoriza membros (só o diretório central)"""
+    data_files, other_files = {}, {}
+    for info in zip_ref.infolist():
+        if info.is_dir():
+            continue
+        target = data_files if Path(info.filename).suffix.lower() in DATA_EXTENSIONS else other_files
+        target[info.filename] = info.file_size
+
+    largest = sorted(data_files.items(), key=lambda x: x[1], reverse=True)[:5]
+    return {
+        'total_files': len(data_files) + len(other_files),
+        'data_files': data_files,
+        'other_files': other_files,
+        'total_data_bytes': sum(data_files.values()),
+        'largest_data_files': [name for name, _ in largest]
+    }
+
+
+def _run_zip_stages(path: Path, data: bytes, out: Path, competencia: str,
+                    snapshot: bool, result: Dict[str, Any]):
+    """Inspeção, análise e extração sobre o mesmo ZIP em memória"""
+    stages, outputs = result['stages'], result['outputs']
+
+    with zipfile.ZipFile(io.BytesIO(data), 'r') as zip_ref:
+        started = time.perf_counter()
+        inspection = _inspect_zip(zip_ref)
+        outputs.append(_save_json(inspection, out / 'inspection.json'))
+        stages['inspect'] = {'seconds': round(time.perf_counter() - started, 3),
+                             'data_files': len(inspection['data_files'])}
+
+        # Cada membro de dados é descomprimido uma única vez
+        started = time.perf_counter()
+        members = {name: zip_ref.read(name) for name in inspection['data_files']}
+        stages['decompress'] = {'seconds': round(time.perf_counter() - started, 3),
+                                'bytes': sum(len(b) for b in members.values())}
+
+        started = time.perf_counter()
+        analyzer = SigtapZipAnalyzer(str(path), member_data=members)
+        analysis = analyzer.analyze_zip(zip_ref)
+        outputs.append(_save_json(analysis, out / 'analysis_report.json'))
+        stages['analyze'] = {'seconds': round(time.perf_counter() - started, 3),
+                             'foreign_keys': len(analysis['foreign_keys'])}
+
+    started = time.perf_counter()
+    try:
+        procedures = list(iter_member_procedures(members))
+    except FileNotFoundError as e:
+        # ZIP sem tb_procedimento: inspeção e análise continuam válidas
+        stages['extract'] = {'seconds': round(time.perf_counter() - started, 3), 'skipped': str(e)}
+        return
+    processor = SigtapProcessor.from_procedures(str(path), procedures)
+    _extract_outputs(processor, out, competencia, snapshot, outputs)
+    stages['extract'] = {'seconds': round(time.perf_counter() - started, 3),
+                         'procedures': processor.stats['valid_procedures']}
+
+
+def _run_workbook_stages(path: Path, data: bytes, out: Path, competencia: str,
+                         snapshot: bool, result: Dict[str, Any]):
+    """Planilhas só têm a etapa de extração (SigtapProcessor)"""
+    started = time.perf_counter()
+    processor = SigtapProcessor(str(path), data=data)
+    processor.process()
+    _extract_outputs(processor, out, competencia, snapshot, result['outputs'])
+    result['stages']['extract'] = {'seconds': round(time.perf_counter() - started, 3),
+                                   'procedures': processor.stats['valid_procedures']}
+
+
+def _extract_outputs(processor: SigtapProcessor, out: Path, competencia: str,
+                     snapshot: bool, outputs: List[str]):
+    outputs.append(processor.save_json(str(out / 'sigtap_structured.json')))
+    if snapshot:
+        outputs.append(processor.save_snapshot(str(out / 'snapshot'), competencia))
+
+
+def process_input(input_path: str, output_dir: str, snapshot: bool = False) -> Dict[str, Any]:
+    """Worker: processa uma entrada completa e devolve o registro do manifest
+
+    Função de módulo para rodar em processos separados. A saída de console
+    das etapas vai para <saída>/pipeline.log.
+    """
+    path = Path(input_path)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    stat = path.stat()
+    data = path.read_bytes()  # única leitura do disco
+    competencia = _guess_competencia(path.name)
+    result: Dict[str, Any] = {
+        'input': path.name,
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'competencia': competencia,
+        'output_dir': str(out),
+        'options': {'snapshot': snapshot},
+        'stages': {},
+        'outputs': []
+    }
+
+    with open(out / 'pipeline.log', 'w', encoding='utf-8') as log, redirect_stdout(log):
+        try:
+            if path.suffix.lower() in ZIP_EXTENSIONS:
+                _run_zip_stages(path, data, out, competencia, snapshot, result)
+            else:
+                _run_workbook_stages(path, data, out, competencia, snapshot, result)
+            result['status'] = 'ok'
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            result['status'] = 'error'
+            result['error'] = str(e)
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    result['completed_at'] = datetime.now().isoformat()
+    return result
+
+
+def run_pipeline(input_dir: str, output_dir: str, workers: int = 1,
+                 snapshot: bool = False, force: bool = False) -> Dict[str, Any]:
+    """Processa todas as entradas pendentes do diretório"""
+    inputs = discover_inputs(input_dir)
+    manifest = PipelineManifest(output_dir)
+
+    pending = {name: path for name, path in inputs.items() if force or not manifest.is_complete(path, snapshot)}
+    skipped = [path.name for name, path in inputs.items() if name not in pending]
+    for name in skipped:
+        print(f"⏭️ {name}: já processado (checksum confere)")
+
+    summary = {'processed': [], 'failed': [], 'skipped': skipped}
+
+    def _collect(result: Dict[str, Any]):
+        manifest.record(result)
+        manifest.save()
+        status = '✅' if result['status'] == 'ok' else '❌'
+        print(f"{status} {result['input']}: {result['seconds']}s -> {result['output_dir']}")
+        summary['processed' if result['status'] == 'ok' else 'failed'].append(result['input'])
+
+    jobs = [(str(path), str(Path(output_dir) / name)) for name, path in pending.items()]
+    if workers <= 1 or len(jobs) <= 1:
+        for input_path, out in jobs:
+            _collect(process_input(input_path, out, snapshot))
+    else:
+        # Uma competência por processo
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(process_input, input_path, out, snapshot) for input_path, out in jobs]
+            for future in as_completed(futures):
+                _collect(future.result())
+
+    manifest.save()
+    return summary
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline SIGTAP multi-competência (ZIPs e planilhas)")
+    parser.add_argument('input_dir', help="diretório com ZIPs SIGTAP e/ou planilhas .xlsx/.xls")
+    parser.add_argument('-o', '--output-dir', default='sigtap_pipeline', help="diretório de saída")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"competências em paralelo (0 = todos os núcleos: {default_workers()})")
+    parser.add_argument('--snapshot', action='store_true', help="também grava snapshot colunar por competência")
+    parser.add_argument('--force', action='store_true', help="reprocessa mesmo entradas já concluídas")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Diretório não encontrado: {args.input_dir}")
+        sys.exit(1)
+
+    workers = args.workers if args.workers > 0 else default_workers()
+    summary = run_pipeline(args.input_dir, args.output_dir, workers=workers,
+                           snapshot=args.snapshot, force=args.force)
+
+    print(f"\n🎉 Pipeline concluído: {len(summary['processed'])} processados, "
+          f"{len(summary['skipped'])} pulados, {len(summary['failed'])} com erro")
+    print(f"📋 Manifest: {Path(args.output_dir) / MANIFEST_FILE}")
+    if summary['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,18 @@ Processa e estrutura dados SIGTAP desestruturados do Excel DATASUS
 Gera arquivo JSON limpo para importação no sistema
 """
 
+import argparse
+import io
 import pandas as pd
 import json
 import re
 import logging
+import typing
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields, replace
+
+from sigtap_profiling import StageProfiler, add_profile_arguments, run_profiled
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -56,11 +61,118 @@ class SigtapProcedure:
         if self.habilitation_group is None:
             self.habilitation_group = []
 
+# Políticas de merge por campo para procedimentos com o mesmo código
+MERGE_POLICIES = ('first', 'longest', 'union')
+DEFAULT_MERGE_POLICIES = {'description': 'longest'}
+
+def _merge_first(current, incoming):
+    """Primeiro valor não vazio vence (texto preenchido, número diferente de zero)"""
+    return current if current else incoming
+
+def _merge_longest(current, incoming):
+    """Texto mais longo vence (empate mantém o atual)"""
+    return incoming if len(str(incoming or '')) > len(str(current or '')) else current
+
+def _merge_union(current, incoming):
+    """Listas: união preservando a ordem de chegada"""
+    seen = set(current)
+    extra = [item for item in incoming if item not in seen]
+    return current + extra if extra else current
+
+_MERGERS = {
+    'first': _merge_first,
+    'longest': _merge_longest,
+    'union': _merge_union,
+}
+
+def _default_merge_policy(hint) -> str:
+    if typing.get_origin(hint) is list or hint is list:
+        return 'union'
+    return 'first'
+
+class ProcedureMergeStore:
+    """Deduplicação incremental por código com política de merge por campo
+    
+    Cada registro que chega é incorporado ao já armazenado e descartado, então
+    a memória é proporcional ao número de códigos únicos. Padrões: texto e
+    números 'first', descrição 'longest', listas (CID, CBO...) 'union'.
+    O primeiro registro de cada código é copiado; o objeto recebido não é alterado.
+    """
+    
+    def __init__(self, policies: Optional[Dict[str, str]] = None):
+        hints = typing.get_type_hints(SigtapProcedure)
+        self.policies = {
+            field.name: _default_merge_policy(hints[field.name])
+            for field in fields(SigtapProcedure) if field.name != 'code'
+        }
+        for field, policy in {**DEFAULT_MERGE_POLICIES, **(policies or {})}.items():
+            if field not in self.policies:
+                raise ValueError(f"Campo sem política de merge: {field}")
+            if policy not in _MERGERS:
+                raise ValueError(f"Política de merge inválida para '{field}': {policy} (use {', '.join(MERGE_POLICIES)})")
+            self.policies[field] = policy
+        
+        self._list_fields = [name for name, hint in hints.items() if _default_merge_policy(hint) == 'union']
+        self._by_code: Dict[str, SigtapProcedure] = {}
+        self.received = 0
+        self.duplicates = 0
+        # Por política: valores diferentes encontrados / valores substituídos
+        self.conflicts = {policy: 0 for policy in MERGE_POLICIES}
+        self.updates = {policy: 0 for policy in MERGE_POLICIES}
+    
+    def __len__(self) -> int:
+        return len(self._by_code)
+    
+    def __contains__(self, code: str) -> bool:
+        return code in self._by_code
+    
+    def add(self, procedure: SigtapProcedure):
+        """Incorpora um procedimento (novo código ou merge com o existente)"""
+        self.received += 1
+        existing = self._by_code.get(procedure.code)
+        if existing is None:
+            # Cópia: os merges seguintes não podem alterar o objeto de quem chamou
+            self._by_code[procedure.code] = replace(procedure, **{
+                name: list(getattr(procedure, name)) for name in self._list_fields
+            })
+            return
+        
+        self.duplicates += 1
+        for field, policy in self.policies.items():
+            current, incoming = getattr(existing, field), getattr(procedure, field)
+            if not incoming or incoming == current:
+                continue
+            if current:
+                self.conflicts[policy] += 1
+            merged = _MERGERS[policy](current, incoming)
+            if merged is not current:
+                setattr(existing, field, merged)
+                self.updates[policy] += 1
+    
+    def procedures(self) -> List[SigtapProcedure]:
+        return list(self._by_code.values())
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'received': self.received,
+            'unique': len(self._by_code),
+            'duplicates': self.duplicates,
+            'conflicts_by_policy': dict(self.conflicts),
+            'updates_by_policy': dict(self.updates),
+            'policies': dict(self.policies)
+        }
+
 class SigtapProcessor:
     """Processador principal de dados SIGTAP"""
     
-    def __init__(self, excel_path: str):
+    def __init__(self, excel_path: str, data: Optional[bytes] = None, profile: bool = False,
+                 merge_policies: Optional[Dict[str, str]] = None):
         self.excel_path = Path(excel_path)
+        # Conteúdo já lido (ex.: pipeline), evita reabrir o arquivo
+        self.data = data
+        self.profiler = StageProfiler(enabled=profile)
+        # Procedimentos são deduplicados à medida que chegam
+        self.merge_store = ProcedureMergeStore(merge_policies)
         self.procedures: List[SigtapProcedure] = []
         self.stats = {
             'total_sheets': 0,
@@ -76,7 +188,8 @@ class SigtapProcessor:
         
         try:
             # Ler todas as abas do Excel
-            excel_file = pd.ExcelFile(self.excel_path)
+            with self.profiler.stage('load_workbook'):
+                excel_file = pd.ExcelFile(io.BytesIO(self.data) if self.data is not None else self.excel_path)
             self.stats['total_sheets'] = len(excel_file.sheet_names)
             
             logger.info(f"📊 Encontradas {self.stats['total_sheets']} abas: {excel_file.sheet_names}")
@@ -99,17 +212,39 @@ class SigtapProcessor:
         except Exception as e:
             logger.error(f"❌ Erro fatal: {str(e)}")
             raise
+        finally:
+            self._collect_profile()
+    
+    def _collect_profile(self):
+        """Copia as métricas por etapa para processing_stats (modo perfil)"""
+        if self.profiler.enabled:
+            self.stats['profile'] = self.profiler.results()
+    
+    @classmethod
+    def from_procedures(cls, source_path: str, procedures: List[SigtapProcedure]) -> 'SigtapProcessor':
+        """Consolida procedimentos extraídos de outra fonte (ex.: ZIP oficial)"""
+        processor = cls(source_path)
+        for procedure in procedures:
+            processor.merge_store.add(procedure)
+        processor.stats['total_procedures'] = processor.merge_store.received
+        processor._post_process()
+        return processor
     
     def _process_sheet(self, excel_file: pd.ExcelFile, sheet_name: str):
         """Processa uma aba específica do Excel"""
         logger.info(f"📋 Processando aba: {sheet_name}")
         
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        with self.profiler.stage(f'sheet:{sheet_name}'):
+            with self.profiler.stage('sheet_load'):
+                df = pd.read_excel(excel_file, sheet_name=sheet_name)
+            
+            # Detectar tipo de aba e aplicar processamento específico
+            with self.profiler.stage('detect', rows=len(df)):
+                is_procedure_sheet = self._is_procedure_sheet(df, sheet_name)
+            if is_procedure_sheet:
+                self._extract_procedures_from_sheet(df, sheet_name)
         
-        # Detectar tipo de aba e aplicar processamento específico
-        if self._is_procedure_sheet(df, sheet_name):
-            self._extract_procedures_from_sheet(df, sheet_name)
-        else:
+        if not is_procedure_sheet:
             logger.info(f"⏭️ Aba '{sheet_name}' ignorada (não contém procedimentos)")
     
     def _is_procedure_sheet(self, df: pd.DataFrame, sheet_name: str) -> bool:
@@ -131,20 +266,22 @@ class SigtapProcessor:
         logger.info(f"🔍 Extraindo procedimentos da aba '{sheet_name}' ({len(df)} linhas)")
         
         # Mapear colunas para campos padrão
-        column_mapping = self._map_columns(df.columns)
+        with self.profiler.stage('mapping'):
+            column_mapping = self._map_columns(df.columns)
         
         valid_count = 0
-        for index, row in df.iterrows():
-            try:
-                procedure = self._create_procedure_from_row(row, column_mapping)
-                if procedure and self._validate_procedure(procedure):
-                    self.procedures.append(procedure)
-                    valid_count += 1
-                    self.stats['total_procedures'] += 1
-            except Exception as e:
-                error_msg = f"Erro linha {index + 1} da aba '{sheet_name}': {str(e)}"
-                logger.warning(error_msg)
-                self.stats['errors'].append(error_msg)
+        with self.profiler.stage('extract_rows', rows=len(df)):
+            for index, row in df.iterrows():
+                try:
+                    procedure = self._create_procedure_from_row(row, column_mapping)
+                    if procedure and self._validate_procedure(procedure):
+                        self.merge_store.add(procedure)
+                        valid_count += 1
+                        self.stats['total_procedures'] += 1
+                except Exception as e:
+                    error_msg = f"Erro linha {index + 1} da aba '{sheet_name}': {str(e)}"
+                    logger.warning(error_msg)
+                    self.stats['errors'].append(error_msg)
         
         logger.info(f"✅ Extraídos {valid_count} procedimentos válidos da aba '{sheet_name}'")
     
@@ -272,21 +409,15 @@ class SigtapProcessor:
     
     def _post_process(self):
         """Pós-processamento: limpeza e consolidação"""
-        logger.info(f"🧹 Pós-processamento de {len(self.procedures)} procedimentos")
-        
-        # Remover duplicatas
-        unique_procedures = {}
-        for proc in self.procedures:
-            if proc.code not in unique_procedures:
-                unique_procedures[proc.code] = proc
-            else:
-                # Manter o mais completo em caso de duplicata
-                existing = unique_procedures[proc.code]
-                if len(proc.description) > len(existing.description):
-                    unique_procedures[proc.code] = proc
+        store = self.merge_store
+        logger.info(f"🧹 Pós-processamento de {store.received} procedimentos "
+                    f"({store.duplicates} duplicados mesclados)")
         
-        self.procedures = list(unique_procedures.values())
+        # Duplicatas já foram mescladas na chegada; aqui só materializa a lista
+        with self.profiler.stage('dedup', rows=store.received):
+            self.procedures = store.procedures()
         self.stats['valid_procedures'] = len(self.procedures)
+        self.stats['merge'] = store.summary()
         
         logger.info(f"✅ Dados consolidados: {self.stats['valid_procedures']} procedimentos únicos")
     
@@ -303,26 +434,87 @@ class SigtapProcessor:
         }
     
     def save_json(self, output_path: str):
-        """Salva resultado em JSON estruturado"""
-        output = self._generate_output()
+        """Salva resultado em JSON estruturado
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        O perfil gravado no arquivo vai até 'json_build': o arquivo não pode
+        conter o tempo da própria escrita. 'json_dump' entra em
+        self.stats['profile'] (e no resumo do console) depois da escrita.
+        """
+        with self.profiler.stage('json_build', rows=len(self.procedures)):
+            output = self._generate_output()
+        self._collect_profile()
+        
+        with self.profiler.stage('json_dump', rows=len(self.procedures)):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+        self._collect_profile()
         
         logger.info(f"💾 Arquivo JSON salvo: {output_path}")
         return output_path
+    
+    def save_snapshot(self, output_dir: str, competencia: str = ""):
+        """Salva snapshot colunar (.npy + índice por código) para carga via memory-map"""
+        from sigtap_snapshot import write_snapshot
+        
+        metadata = {
+            'source_file': str(self.excel_path),
+            'competencia': competencia,
+            'total_procedures': self.stats['valid_procedures']
+        }
+        write_snapshot(self.procedures, output_dir, metadata)
+        
+        logger.info(f"💽 Snapshot colunar salvo: {output_dir}")
+        return output_dir
+
+def parse_merge_policy(item: str) -> typing.Tuple[str, str]:
+    """argparse type de --merge-policy: 'CAMPO=POLÍTICA' com campo e política válidos"""
+    field, sep, policy = item.partition('=')
+    field, policy = field.strip(), policy.strip()
+    mergeable = [f.name for f in fields(SigtapProcedure) if f.name != 'code']
+    if not sep or not field or not policy:
+        raise argparse.ArgumentTypeError(f"use CAMPO=POLÍTICA, não '{item}'")
+    if field not in mergeable:
+        raise argparse.ArgumentTypeError(f"campo desconhecido '{field}' (use {', '.join(mergeable)})")
+    if policy not in MERGE_POLICIES:
+        raise argparse.ArgumentTypeError(f"política inválida '{policy}' (use {', '.join(MERGE_POLICIES)})")
+    return field, policy
+
+def _guess_competencia(file_name: str) -> str:
+    """Extrai competência AAAAMM do nome do arquivo, se houver"""
+    match = re.search(r'(20\d{2})(0[1-9]|1[0-2])', Path(file_name).stem)
+    return match.group(0) if match else ""
 
 # Script de uso
 if __name__ == "__main__":
-    import sys
+    parser = argparse.ArgumentParser(description="Processador SIGTAP (Excel DATASUS)")
+    parser.add_argument('excel_path', help="arquivo Excel SIGTAP")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="também grava snapshot colunar (sigtap_snapshot_<competência>/)")
+    parser.add_argument('--competencia', default=None, help="competência AAAAMM (padrão: do nome do arquivo)")
+    parser.add_argument('--merge-policy', action='append', default=[], type=parse_merge_policy,
+                        metavar='CAMPO=POLÍTICA',
+                        help=f"política de merge de duplicatas por campo ({', '.join(MERGE_POLICIES)}); pode repetir")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
-    if len(sys.argv) != 2:
-        print("Uso: python sigtap_processor.py <arquivo_excel>")
-        sys.exit(1)
+    merge_policies = dict(args.merge_policy)
+    input_file = args.excel_path
+    processor = SigtapProcessor(input_file, profile=args.profile or bool(args.profile_out),
+                                merge_policies=merge_policies)
     
-    input_file = sys.argv[1]
-    processor = SigtapProcessor(input_file)
-    result = processor.process()
+    def run():
+        processor.process()
+        
+        json_path = processor.save_json('sigtap_structured.json')
+        print(f"🎉 Processamento concluído! Arquivo salvo: {json_path}")
+        
+        if args.snapshot:
+            competencia = args.competencia if args.competencia is not None else _guess_competencia(input_file)
+            snapshot_dir = f"sigtap_snapshot_{competencia}" if competencia else "sigtap_snapshot"
+            processor.save_snapshot(snapshot_dir, competencia)
+            print(f"💽 Snapshot salvo em: {snapshot_dir}")
     
-    json_path = processor.save_json('sigtap_structured.json')
-    print(f"🎉 Processamento concluído! Arquivo salvo: {json_path}") 
\ No newline at end of file
+    run_profiled(run, processor.profiler, args.profile_out, name=str(input_file))
+    if processor.profiler.enabled:
+        processor.profiler.stop()
+        processor.profiler.print_summary()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+⏱️ Perfilamento opcional dos scripts SIGTAP
+Tempo de parede, tempo de CPU, pico de memória (tracemalloc) e linhas/s por
+etapa, e dump de um perfil cProfile (.prof) ou trace speedscope (.json)
+Apenas biblioteca padrão (usado também pelo analisador sem pandas)
+"""
+
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+
+class StageProfiler:
+    """Acumula métricas por etapa; desabilitado, stage() não custa nada
+
+    Etapas podem ser aninhadas (ex.: 'sheet:Procedimentos' > 'extract_rows') e
+    repetidas (uma vez por aba): as métricas são somadas por nome.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        # Eventos abrir/fechar para o trace speedscope
+        self.events: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._owns_tracemalloc = False
+
+    def start(self):
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def stop(self):
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        if not self.enabled:
+            yield
+            return
+
+        self.start()
+        # O pico é zerado a cada etapa; o pai guarda o que já viu antes do filho
+        if self._stack:
+            parent = self._stack[-1]
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame = {
+            'name': name,
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'memory': tracemalloc.get_traced_memory()[0],
+            'peak': 0
+        }
+        self._stack.append(frame)
+        self.events.append({'type': 'O', 'frame': name, 'at': frame['wall'] - self._origin})
+        try:
+            yield
+        finally:
+            wall_end, cpu_end = time.perf_counter(), time.process_time()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame['peak'], peak)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            self.events.append({'type': 'C', 'frame': name, 'at': wall_end - self._origin})
+
+            stats = self.stages.setdefault(name, {
+                'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_memory_mb': 0.0, 'rows': 0
+            })
+            stats['calls'] += 1
+            stats['wall_seconds'] += wall_end - frame['wall']
+            stats['cpu_seconds'] += cpu_end - frame['cpu']
+            # Pico acima da memória do início da etapa
+            stats['peak_memory_mb'] = max(stats['peak_memory_mb'], (peak - frame['memory']) / (1024 * 1024))
+            if rows is not None:
+                stats['rows'] += rows
+
+    def results(self) -> Dict[str, Dict[str, float]]:
+        """Métricas por etapa (arredondadas), com linhas/s quando houver linhas"""
+        output = {}
+        for name, stats in self.stages.items():
+            entry = {
+                'calls': stats['calls'],
+                'wall_seconds': round(stats['wall_seconds'], 4),
+                'cpu_seconds': round(stats['cpu_seconds'], 4),
+                'peak_memory_mb': round(stats['peak_memory_mb'], 2)
+            }
+            if stats['rows']:
+                entry['rows'] = stats['rows']
+                entry['rows_per_second'] = round(stats['rows'] / stats['wall_seconds'], 1) if stats['wall_seconds'] else None
+            output[name] = entry
+        return output
+
+    def print_summary(self):
+        """Tabela de etapas no console"""
+        print("\n⏱️ PERFIL POR ETAPA:")
+        print(f"   {'etapa':<32} {'parede (s)':>10} {'CPU (s)':>10} {'pico MB':>9} {'linhas/s':>11}")
+        for name, entry in self.results().items():
+            rate = entry.get('rows_per_second')
+            print(f"   {name:<32} {entry['wall_seconds']:>10.3f} {entry['cpu_seconds']:>10.3f} "
+                  f"{entry['peak_memory_mb']:>9.2f} {(f'{rate:,.0f}' if rate else '-'):>11}")
+
+    def save_speedscope(self, output_path: str, name: str = 'sigtap'):
+        """Trace das etapas no formato 'evented' do speedscope"""
+        frames: List[Dict[str, str]] = []
+        index: Dict[str, int] = {}
+        events = []
+        for event in self.events:
+            if event['frame'] not in index:
+                index[event['frame']] = len(frames)
+                frames.append({'name': event['frame']})
+            events.append({'type': event['type'], 'frame': index[event['frame']], 'at': event['at']})
+
+        end = self.events[-1]['at'] if self.events else 0
+        trace = {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'evented',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': end,
+                'events': events
+            }],
+            'name': name,
+            'exporter': 'sigtap_profiling'
+        }
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+
+
+def run_profiled(fn: Callable[[], Any], profiler: StageProfiler,
+                 profile_out: Optional[str] = None, name: str = 'sigtap') -> Any:
+    """Executa fn() e grava o perfil pedido
+
+    - '*.prof': cProfile por função (abrir com snakeviz ou pstats)
+    - '*.json': trace speedscope das etapas do StageProfiler
+    """
+    if not profile_out:
+        return fn()
+
+    if Path(profile_out).suffix.lower() == '.json':
+        result = fn()
+        profiler.save_speedscope(profile_out, name)
+    else:
+        profile = cProfile.Profile()
+        result = profile.runcall(fn)
+        profile.dump_stats(profile_out)
+    print(f"📈 Perfil salvo em: {profile_out}")
+    return result
+
+
+def add_profile_arguments(parser):
+    """Opções de linha de comando comuns aos scripts"""
+    parser.add_argument('--profile', action='store_true',
+                        help="mede tempo, CPU, pico de memória e linhas/s por etapa")
+    parser.add_argument('--profile-out', default=None,
+                        help="grava perfil da execução: .prof (cProfile) ou .json (speedscope)")
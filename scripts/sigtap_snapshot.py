@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+💽 Snapshot colunar SIGTAP
+Grava os procedimentos de uma competência em colunas NumPy (.npy) com
+índice por código. A leitura via memory-map (início em milissegundos,
+páginas compartilhadas entre processos) fica em analytics_py/sigtap_snapshot.py,
+que o serviço de analytics usa no lugar do sigtap_structured.json
+
+Layout do diretório:
+    manifest.json                 metadados, tipos e contagem
+    <campo>.npy                   colunas numéricas (float64/int64)
+    <campo>.data.npy/.offsets.npy texto UTF-8 concatenado + offsets
+    <campo>.list_offsets.npy      campos lista (CID, CBO...) sobre o texto
+    code_index.npy/code_order.npy códigos ordenados + posição do registro
+"""
+
+import json
+import typing
+from dataclasses import asdict, fields, is_dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+CODE_WIDTH = 14  # 'GG.SS.FF.PPP-D'
+
+
+def _column_kinds() -> Dict[str, str]:
+    """Tipo de coluna de cada campo do SigtapProcedure: float, int, str ou list
+
+    Import tardio: a leitura do snapshot não deve carregar pandas.
+    """
+    from sigtap_processor import SigtapProcedure
+
+    hints = typing.get_type_hints(SigtapProcedure)
+    kinds = {}
+    for field in fields(SigtapProcedure):
+        hint = hints[field.name]
+        if hint is float:
+            kinds[field.name] = 'float'
+        elif hint is int:
+            kinds[field.name] = 'int'
+        elif typing.get_origin(hint) is list:
+            kinds[field.name] = 'list'
+        else:
+            kinds[field.name] = 'str'
+    return kinds
+
+
+def _encode_strings(values: List[str]):
+    """Texto -> (bytes UTF-8 concatenados, offsets int64 com n+1 posições)"""
+    encoded = [str(v or '').encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _encode_codes(codes: List[str]) -> List[bytes]:
+    """Códigos ASCII de até CODE_WIDTH bytes; o dtype S truncaria os maiores em silêncio"""
+    encoded = []
+    for code in codes:
+        raw = str(code or '').encode('ascii', errors='replace')
+        if len(raw) > CODE_WIDTH or raw != str(code or '').encode('ascii', errors='ignore'):
+            raise ValueError(f"Código SIGTAP inválido para o índice (ASCII, até {CODE_WIDTH} caracteres): {code!r}")
+        encoded.append(raw)
+    return encoded
+
+
+def write_snapshot(procedures: Iterable[Any],
+                   output_dir: str,
+                   metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """Grava snapshot colunar de procedimentos (SigtapProcedure ou dicts)"""
+    column_kinds = _column_kinds()
+    records = [asdict(p) if is_dataclass(p) else p for p in procedures]
+    # Valida antes de gravar qualquer arquivo
+    codes = np.array(_encode_codes([r['code'] for r in records]), dtype=f'S{CODE_WIDTH}')
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    for name, kind in column_kinds.items():
+        values = [r.get(name) for r in records]
+        if kind == 'float':
+            np.save(out / f'{name}.npy', np.array([float(v or 0) for v in values], dtype=np.float64))
+        elif kind == 'int':
+            np.save(out / f'{name}.npy', np.array([int(v or 0) for v in values], dtype=np.int64))
+        elif kind == 'str':
+            data, offsets = _encode_strings(values)
+            np.save(out / f'{name}.data.npy', data)
+            np.save(out / f'{name}.offsets.npy', offsets)
+        else:
+            items = [v or [] for v in values]
+            list_offsets = np.zeros(len(items) + 1, dtype=np.int64)
+            if items:
+                list_offsets[1:] = np.cumsum([len(i) for i in items])
+            data, offsets = _encode_strings([x for i in items for x in i])
+            np.save(out / f'{name}.data.npy', data)
+            np.save(out / f'{name}.offsets.npy', offsets)
+            np.save(out / f'{name}.list_offsets.npy', list_offsets)
+
+    # Índice por código: busca binária em códigos de largura fixa
+    order = np.argsort(codes, kind='stable')
+    np.save(out / 'code_index.npy', codes[order])
+    np.save(out / 'code_order.npy', order.astype(np.int64))
+
+    # Manifest por último: snapshot só é válido quando ele existe
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'total_procedures': len(records),
+        'columns': column_kinds,
+        'metadata': metadata or {},
+        'generated_at': datetime.now().isoformat()
+    }
+    with open(out / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return out
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Leitor de ZIP oficial do SIGTAP (DATASUS)
+Lê tabelas de largura fixa usando os arquivos *_layout.txt e converte
+tb_procedimento.txt em registros no formato do SigtapProcessor
+"""
+
+import io
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sigtap_processor import SigtapProcedure
+
+ZIP_ENCODING = 'latin-1'
+PROCEDURE_TABLE = 'tb_procedimento.txt'
+
+# Colunas do tb_procedimento -> campos do SigtapProcedure
+PROCEDURE_COLUMNS = {
+    'CO_PROCEDIMENTO': 'code',
+    'NO_PROCEDIMENTO': 'description',
+    'TP_COMPLEXIDADE': 'complexity',
+    'TP_SEXO': 'gender',
+    'QT_MAXIMA_EXECUCAO': 'max_quantity',
+    'QT_DIAS_PERMANENCIA': 'average_stay',
+    'QT_PONTOS': 'points',
+    'VL_IDADE_MINIMA': 'min_age',
+    'VL_IDADE_MAXIMA': 'max_age',
+    'VL_SH': 'value_hosp',
+    'VL_SA': 'value_amb',
+    'VL_SP': 'value_prof',
+    'CO_FINANCIAMENTO': 'financing'
+}
+MONEY_FIELDS = {'value_hosp', 'value_amb', 'value_prof'}
+INT_FIELDS = {'max_quantity', 'average_stay', 'points', 'min_age', 'max_age'}
+
+
+def format_procedure_code(raw: str) -> str:
+    """Converte '0301010072' no formato SIGTAP '03.01.01.007-2'"""
+    digits = ''.join(ch for ch in raw if ch.isdigit())
+    if len(digits) != 10:
+        return raw.strip()
+    return f"{digits[0:2]}.{digits[2:4]}.{digits[4:6]}.{digits[6:9]}-{digits[9]}"
+
+
+def find_member(zip_ref: zipfile.ZipFile, file_name: str) -> Optional[str]:
+    """Localiza um membro pelo nome base (ignora pastas e maiúsculas)"""
+    target = file_name.lower()
+    for name in zip_ref.namelist():
+        if Path(name).name.lower() == target:
+            return name
+    return None
+
+
+def read_layout(zip_ref: zipfile.ZipFile, table_member: str) -> List[Tuple[str, int, int]]:
+    """Lê o *_layout.txt de uma tabela: [(coluna, início 0-based, fim exclusivo)]
+
+    Formato DATASUS: cabeçalho 'Coluna,Tamanho,Inicio,Fim,Tipo', posições 1-based.
+    Retorna lista vazia se o layout não existir.
+    """
+    layout_member = find_member(zip_ref, Path(table_member).stem + '_layout.txt')
+    if not layout_member:
+        return []
+
+    return parse_layout(zip_ref.read(layout_member))
+
+
+def parse_layout(content: bytes) -> List[Tuple[str, int, int]]:
+    """Converte o conteúdo de um *_layout.txt em [(coluna, início, fim)]"""
+    content = content.decode(ZIP_ENCODING, errors='ignore')
+    layout = []
+    for line in content.splitlines()[1:]:
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < 4 or not parts[2].isdigit() or not parts[3].isdigit():
+            continue
+        layout.append((parts[0].upper(), int(parts[2]) - 1, int(parts[3])))
+    return layout
+
+
+def iter_fixed_width(zip_ref: zipfile.ZipFile, table_member: str,
+                     layout: List[Tuple[str, int, int]]) -> Iterator[Dict[str, str]]:
+    """Itera linhas de uma tabela de largura fixa sem descomprimir tudo em memória"""
+    with zip_ref.open(table_member) as raw:
+        yield from iter_fixed_width_lines(io.TextIOWrapper(raw, encoding=ZIP_ENCODING, newline=''), layout)
+
+
+def iter_fixed_width_lines(lines: Iterable[str],
+                           layout: List[Tuple[str, int, int]]) -> Iterator[Dict[str, str]]:
+    """Fatia linhas de largura fixa conforme o layout (ignora linhas vazias)"""
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        yield {col: line[start:end].strip() for col, start, end in layout}
+
+
+def procedure_from_columns(row: Dict[str, str]) -> Optional[SigtapProcedure]:
+    """Cria SigtapProcedure a partir de uma linha do tb_procedimento"""
+    fields: Dict[str, Any] = {}
+    for column, field in PROCEDURE_COLUMNS.items():
+        value = row.get(column, '')
+        if field in MONEY_FIELDS:
+            # Valores monetários vêm em centavos, sem separador
+            fields[field] = int(value) / 100 if value.isdigit() else 0.0
+        elif field in INT_FIELDS:
+            fields[field] = int(value) if value.isdigit() else 0
+        else:
+            fields[field] = value
+
+    fields['code'] = format_procedure_code(fields.get('code', ''))
+    if not fields['code'] or not fields.get('description'):
+        return None
+
+    procedure = SigtapProcedure(**fields)
+    # Idades do SIGTAP são expressas em meses
+    procedure.min_age_unit = 'MESES'
+    procedure.max_age_unit = 'MESES'
+    return procedure
+
+
+def iter_zip_procedures(zip_path: str) -> Iterator[SigtapProcedure]:
+    """Itera procedimentos do tb_procedimento.txt de um ZIP SIGTAP (streaming)"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        member = find_member(zip_ref, PROCEDURE_TABLE)
+        if not member:
+            raise FileNotFoundError(f"{PROCEDURE_TABLE} não encontrado em {zip_path}")
+
+        layout = read_layout(zip_ref, member)
+        if not layout:
+            raise FileNotFoundError(f"Layout de {PROCEDURE_TABLE} não encontrado em {zip_path}")
+
+        for row in iter_fixed_width(zip_ref, member, layout):
+            procedure = procedure_from_columns(row)
+            if procedure:
+                yield procedure
+
+
+def iter_member_procedures(members: Dict[str, bytes]) -> Iterator[SigtapProcedure]:
+    """Itera procedimentos a partir de membros já descomprimidos {nome: bytes}
+
+    Usado quando o ZIP já foi lido em memória (ex.: pipeline), sem reabrir o arquivo.
+    """
+    by_base = {Path(name).name.lower(): data for name, data in members.items()}
+    table = by_base.get(PROCEDURE_TABLE)
+    if table is None:
+        raise FileNotFoundError(f"{PROCEDURE_TABLE} não encontrado")
+
+    layout = parse_layout(by_base.get(Path(PROCEDURE_TABLE).stem + '_layout.txt', b''))
+    if not layout:
+        raise FileNotFoundError(f"Layout de {PROCEDURE_TABLE} não encontrado")
+
+    lines = table.decode(ZIP_ENCODING).split('\n')
+    for row in iter_fixed_width_lines(lines, layout):
+        procedure = procedure_from_columns(row)
+        if procedure:
+            yield procedure
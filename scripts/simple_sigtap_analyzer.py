@@ -9,11 +9,17 @@ import os
 import sys
 import json
 import re
+import argparse
 from pathlib import Path
 
+from sigtap_parallel import default_workers, run_partitioned
+from sigtap_profiling import StageProfiler, add_profile_arguments, run_profiled
+
 class SimpleSigtapAnalyzer:
-    def __init__(self, zip_path: str):
+    def __init__(self, zip_path: str, workers: int = 1, profile: bool = False):
         self.zip_path = zip_path
+        self.workers = max(1, workers)
+        self.profiler = StageProfiler(enabled=profile)
         self.results = {
             'arquivo': zip_path,
             'total_arquivos': 0,
@@ -40,21 +46,27 @@ class SimpleSigtapAnalyzer:
                 print("-" * 40)
                 
                 # Categorizar arquivos
-                for file_name in file_list:
-                    if file_name.endswith('/'):
-                        continue
-                    
-                    self._categorize_file(zip_ref, file_name)
+                with self.profiler.stage('categorize', rows=len(file_list)):
+                    for file_name in file_list:
+                        if file_name.endswith('/'):
+                            continue
+                        
+                        self._categorize_file(zip_ref, file_name)
                 
                 # Analisar principais tabelas
-                self._analyze_main_tables(zip_ref)
+                with self.profiler.stage('main_tables'):
+                    self._analyze_main_tables(zip_ref)
                 
                 # Gerar estratégia
-                self._generate_strategy()
+                with self.profiler.stage('strategy'):
+                    self._generate_strategy()
                 
                 # Mostrar resultados
                 self._show_results()
                 
+                if self.profiler.enabled:
+                    self.results['profile'] = self.profiler.results()
+                
                 # Salvar relatório
                 self._save_report()
                 
@@ -113,54 +125,38 @@ class SimpleSigtapAnalyzer:
             'tb_cid.txt'
         ]
         
-        for table_name in priority_tables:
-            if table_name in self.results['tabelas_principais']:
-                self._analyze_table_sample(zip_ref, table_name)
+        tables = {
+            table_name: self.results['tabelas_principais'][table_name]['tamanho_bytes']
+            for table_name in priority_tables
+            if table_name in self.results['tabelas_principais']
+        }
+        
+        if self.workers > 1:
+            # Cada processo abre seu próprio ZipFile e analisa uma partição
+            print(f"⚡ Modo paralelo: {self.workers} processos")
+            table_results = run_partitioned(_analyze_partition, self.zip_path, tables, self.workers)
+        else:
+            namelist = set(zip_ref.namelist())
+            table_results = {
+                table_name: _analyze_table_sample(zip_ref, namelist, table_name)
+                for table_name in tables
+            }
+        
+        # Mesclar na ordem de prioridade (saída determinística)
+        for table_name in tables:
+            self._merge_table_result(table_name, table_results.get(table_name, {}))
     
-    def _analyze_table_sample(self, zip_ref, table_name):
-        """Analisa amostra de uma tabela"""
-        try:
-            # Ler arquivo de layout se existir
-            layout_file = table_name.replace('.txt', '_layout.txt')
-            layout_info = ""
-            
-            if layout_file in zip_ref.namelist():
-                layout_data = zip_ref.read(layout_file)
-                try:
-                    layout_info = layout_data.decode('utf-8', errors='ignore')
-                except:
-                    layout_info = layout_data.decode('latin1', errors='ignore')
-            
-            # Ler amostra da tabela
-            table_data = zip_ref.read(table_name)
-            try:
-                content = table_data.decode('utf-8', errors='ignore')
-            except:
-                content = table_data.decode('latin1', errors='ignore')
-            
-            lines = content.split('\n')[:5]  # Primeiras 5 linhas
-            
-            # Detectar delimitador
-            delimiter = self._detect_delimiter(lines[0] if lines else "")
-            
+    def _merge_table_result(self, table_name, result):
+        """Incorpora o resultado de uma tabela ao relatório"""
+        if 'table_info' in result:
             table_info = self.results['tabelas_principais'][table_name]
-            table_info.update({
-                'delimitador': delimiter,
-                'linhas_amostra': len(lines),
-                'layout_info': layout_info[:200] if layout_info else "Não encontrado",
-                'primeira_linha': lines[0][:100] if lines else ""
-            })
-            
-            print(f"📋 {table_name}")
-            print(f"   💾 Tamanho: {table_info['tamanho_mb']} MB")
-            print(f"   🔧 Delimitador: '{delimiter}'")
-            print(f"   📄 Layout: {'✅ Encontrado' if layout_info else '❌ Não encontrado'}")
-            print(f"   📝 Primeira linha: {lines[0][:80]}..." if lines else "   📝 Arquivo vazio")
-            
-        except Exception as e:
-            print(f"   ❌ Erro ao analisar {table_name}: {e}")
+            table_info.update(result['table_info'])
+        
+        for message in result.get('messages', []):
+            print(message)
     
-    def _detect_delimiter(self, line):
+    @staticmethod
+    def _detect_delimiter(line):
         """Detecta delimitador mais provável"""
         delimiters = [';', '|', '\t', ',']
         counts = {delim: line.count(delim) for delim in delimiters}
@@ -246,19 +242,85 @@ class SimpleSigtapAnalyzer:
         except Exception as e:
             print(f"❌ Erro ao salvar relatório: {e}")
 
+def _analyze_table_sample(zip_ref, namelist, table_name):
+    """Analisa amostra de uma tabela
+
+    Função de módulo para poder rodar em processos separados. Retorna os
+    campos a mesclar em tabelas_principais e as mensagens de console.
+    """
+    try:
+        # Ler arquivo de layout se existir
+        layout_file = table_name.replace('.txt', '_layout.txt')
+        layout_info = ""
+        
+        if layout_file in namelist:
+            layout_data = zip_ref.read(layout_file)
+            try:
+                layout_info = layout_data.decode('utf-8', errors='ignore')
+            except:
+                layout_info = layout_data.decode('latin1', errors='ignore')
+        
+        # Ler amostra da tabela
+        table_data = zip_ref.read(table_name)
+        try:
+            content = table_data.decode('utf-8', errors='ignore')
+        except:
+            content = table_data.decode('latin1', errors='ignore')
+        
+        lines = content.split('\n')[:5]  # Primeiras 5 linhas
+        
+        # Detectar delimitador
+        delimiter = SimpleSigtapAnalyzer._detect_delimiter(lines[0] if lines else "")
+        
+        table_info = {
+            'delimitador': delimiter,
+            'linhas_amostra': len(lines),
+            'layout_info': layout_info[:200] if layout_info else "Não encontrado",
+            'primeira_linha': lines[0][:100] if lines else ""
+        }
+        size_mb = round(zip_ref.getinfo(table_name).file_size / (1024 * 1024), 2)
+        
+        messages = [
+            f"📋 {table_name}",
+            f"   💾 Tamanho: {size_mb} MB",
+            f"   🔧 Delimitador: '{delimiter}'",
+            f"   📄 Layout: {'✅ Encontrado' if layout_info else '❌ Não encontrado'}",
+            f"   📝 Primeira linha: {lines[0][:80]}..." if lines else "   📝 Arquivo vazio"
+        ]
+        return {'table_info': table_info, 'messages': messages}
+        
+    except Exception as e:
+        return {'messages': [f"   ❌ Erro ao analisar {table_name}: {e}"]}
+
+def _analyze_partition(zip_path, table_names):
+    """Worker: abre um ZipFile próprio e analisa uma partição de tabelas"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        namelist = set(zip_ref.namelist())
+        return {
+            table_name: _analyze_table_sample(zip_ref, namelist, table_name)
+            for table_name in table_names
+        }
+
 def main():
-    if len(sys.argv) != 2:
-        print("❌ Uso: python simple_sigtap_analyzer.py <arquivo.zip>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Analisador simplificado de ZIP SIGTAP")
+    parser.add_argument('zip_path', help="caminho para o arquivo .zip")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"processos para análise paralela (0 = todos os núcleos: {default_workers()})")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
-    zip_path = sys.argv[1]
+    zip_path = args.zip_path
     
     if not os.path.exists(zip_path):
         print(f"❌ Arquivo não encontrado: {zip_path}")
         sys.exit(1)
     
-    analyzer = SimpleSigtapAnalyzer(zip_path)
-    analyzer.analyze()
+    workers = args.workers if args.workers > 0 else default_workers()
+    analyzer = SimpleSigtapAnalyzer(zip_path, workers=workers, profile=args.profile or bool(args.profile_out))
+    run_profiled(analyzer.analyze, analyzer.profiler, args.profile_out, name=zip_path)
+    if analyzer.profiler.enabled:
+        analyzer.profiler.stop()
+        analyzer.profiler.print_summary()
     
     print(f"\n✅ Análise concluída!")
     print(f"📊 Use os resultados para implementar importação customizada")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+🏥 SISAIH01 Processor
+Lê arquivos posicionais SISAIH01 (DATASUS) em lote, fora do navegador
+Layout compilado em offsets, arquivo mapeado em memória (mmap),
+decodificação ISO-8859-1 em bloco e colunas tipadas via NumPy
+"""
+
+import json
+import logging
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Layout oficial (início 0-based, fim exclusivo) -> coluna de saída
+# Mesmo layout de src/utils/sisaih01Parser.ts (LAYOUT_SISAIH01)
+LAYOUT_SISAIH01: Dict[str, Tuple[int, int, str]] = {
+    # Identificação
+    'NU_AIH': (43, 56, 'numero_aih'),
+    'IDENT_AIH': (56, 58, 'tipo_aih'),
+    'CNES_HOSP': (30, 37, 'cnes_hospital'),
+    'MUN_HOSP': (37, 43, 'municipio_hospital'),
+    'APRES_LOTE': (11, 17, 'competencia'),
+    # Datas
+    'DT_EMISSAO': (136, 144, 'data_emissao'),
+    'DT_INTERN': (144, 152, 'data_internacao'),
+    'DT_SAIDA': (152, 160, 'data_saida'),
+    # Procedimentos
+    'PROC_SOLICITADO': (160, 170, 'procedimento_solicitado'),
+    'PROC_REALIZADO': (171, 181, 'procedimento_realizado'),
+    'CAR_INTERN': (181, 183, 'carater_internacao'),
+    'MOT_SAIDA': (183, 185, 'motivo_saida'),
+    # Diagnósticos
+    'DIAG_PRIN': (249, 253, 'diagnostico_principal'),
+    'DIAG_SEC': (253, 257, 'diagnostico_secundario'),
+    'DIAG_COMPL': (257, 261, 'diagnostico_complementar'),
+    'DIAG_OBITO': (261, 265, 'diagnostico_obito'),
+    # Paciente
+    'NM_PACIENTE': (268, 338, 'nome_paciente'),
+    'DT_NASC_PAC': (338, 346, 'data_nascimento'),
+    'SEXO_PAC': (346, 347, 'sexo'),
+    'RACA_COR': (347, 349, 'raca_cor'),
+    'NM_MAE_PAC': (349, 419, 'nome_mae'),
+    'NM_RESP_PAC': (419, 489, 'nome_responsavel'),
+    'NU_DOC_PAC': (490, 501, 'cpf'),
+    'NU_CNS': (501, 516, 'cns'),
+    # Endereço
+    'LOGR_PAC': (522, 572, 'logradouro'),
+    'NU_END_PAC': (572, 579, 'numero_endereco'),
+    'COMPL_END_PAC': (579, 594, 'complemento'),
+    'BAIRRO_PAC': (594, 624, 'bairro'),
+    'COD_MUN_END_PAC': (624, 630, 'codigo_municipio'),
+    'UF_PAC': (630, 632, 'uf'),
+    'CEP_PAC': (632, 640, 'cep'),
+    # Hospital
+    'NU_PRONTUARIO': (640, 655, 'prontuario'),
+    'NU_ENFERMARIA': (655, 659, 'enfermaria'),
+    'NU_LEITO': (659, 663, 'leito'),
+    # Médicos
+    'DOC_MED_SOL': (186, 201, 'medico_solicitante'),
+    'DOC_MED_RESP': (202, 217, 'medico_responsavel'),
+}
+DATE_FIELDS = {'DT_EMISSAO', 'DT_INTERN', 'DT_SAIDA', 'DT_NASC_PAC'}
+VALID_AIH_TYPES = ('01', '03', '05')
+TIPO_AIH_DESCRICAO = {'01': 'Principal', '03': 'Continuação', '05': 'Longa Permanência'}
+MIN_LINE_LENGTH = 100
+CHUNK_LINES = 200_000
+# Acima disso (linhas de tamanhos variados), o bloco inteiro vai por gather
+MAX_SEGMENTS = 64
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+SPACE = ord(' ')
+
+
+class CompiledLayout:
+    """Layout pré-compilado: campos ordenados por posição e largura total"""
+
+    def __init__(self, layout: Dict[str, Tuple[int, int, str]]):
+        self.fields = sorted(layout.items(), key=lambda item: item[1][0])
+        self.width = max(end for _, (_, end, _) in self.fields)
+        self.ident = layout['IDENT_AIH'][:2]
+
+
+def _line_bounds(buf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Início/fim de cada linha (sem \\r\\n), descartando linhas curtas"""
+    newlines = np.flatnonzero(buf == NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buf)]))
+    has_cr = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN)
+    ends = ends - has_cr
+    keep = (ends - starts) >= MIN_LINE_LENGTH
+    return starts[keep], ends[keep]
+
+
+class RecordBlock:
+    """Campos de um bloco de linhas, extraídos campo a campo
+
+    As linhas são agrupadas em trechos contíguos: linhas com o tamanho do
+    layout e espaçamento constante viram uma view (sem cópia) sobre o arquivo
+    mapeado; as demais (curtas, trailer truncado) são lidas por gather de uma
+    coluna por vez, buf[starts + posição], completadas com espaço. Um cabeçalho
+    de outro tamanho só quebra o trecho em volta dele, e nenhuma matriz de
+    índices linhas x largura é criada.
+    """
+
+    def __init__(self, buf: np.ndarray, starts: np.ndarray, ends: np.ndarray, width: int):
+        self.buf = buf
+        self.starts = starts
+        self.lengths = ends - starts
+        self.keep: Optional[np.ndarray] = None
+        self.segments = self._segments(width)
+
+    def _segments(self, width: int) -> List[Tuple[int, int, Optional[np.ndarray]]]:
+        """(início, fim, view ou None para gather) de cada trecho de linhas"""
+        n = len(self.starts)
+        if n == 0:
+            return []
+        full = self.lengths >= width
+        breaks = np.zeros(n, dtype=bool)
+        breaks[0] = True
+        breaks[1:] = full[1:] != full[:-1]
+        if n > 2:
+            strides = np.diff(self.starts)
+            breaks[2:] |= full[2:] & (strides[1:] != strides[:-1])
+        bounds = np.append(np.flatnonzero(breaks), n)
+        if len(bounds) - 1 > MAX_SEGMENTS:
+            # Espaçamento irregular demais: gather do bloco inteiro
+            return [(0, n, None)]
+
+        segments = []
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            view = None
+            if full[lo]:
+                stride = int(self.starts[lo + 1] - self.starts[lo]) if hi - lo > 1 else width
+                view = np.lib.stride_tricks.as_strided(
+                    self.buf[self.starts[lo]:], shape=(hi - lo, width), strides=(stride, 1), writeable=False
+                )
+            segments.append((lo, hi, view))
+        return segments
+
+    def __len__(self) -> int:
+        return len(self.starts) if self.keep is None else int(self.keep.sum())
+
+    def select(self, keep: np.ndarray):
+        """Mantém só as linhas marcadas (aplicado campo a campo)"""
+        self.keep = keep
+
+    def field(self, start: int, end: int) -> np.ndarray:
+        """Bytes do campo [start, end) de cada linha mantida: (linhas x largura)"""
+        parts = []
+        for lo, hi, view in self.segments:
+            keep = None if self.keep is None else self.keep[lo:hi]
+            if view is not None:
+                block = view[:, start:end]
+                parts.append(block if keep is None else block[keep])
+            else:
+                starts, lengths = self.starts[lo:hi], self.lengths[lo:hi]
+                if keep is not None:
+                    starts, lengths = starts[keep], lengths[keep]
+                parts.append(self._gather(starts, lengths, start, end))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.zeros((0, end - start), dtype=np.uint8)
+        return np.concatenate(parts)
+
+    def _gather(self, starts: np.ndarray, lengths: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Uma coluna por vez (vetor de n índices), espaço além do fim da linha"""
+        columns = np.full((end - start, len(starts)), SPACE, dtype=np.uint8)
+        for k, position in enumerate(range(start, end)):
+            inside = lengths > position
+            if inside.all():
+                columns[k] = self.buf[starts + position]
+            else:
+                columns[k, inside] = self.buf[starts[inside] + position]
+        return columns.T
+
+
+def _decode_text(block: np.ndarray) -> np.ndarray:
+    """Bytes ISO-8859-1 -> strings, em bloco (latin-1 mapeia byte = code point)"""
+    width = block.shape[1]
+    codepoints = np.ascontiguousarray(block, dtype=np.uint32)
+    return np.char.strip(codepoints.view(f'U{width}').reshape(len(block)))
+
+
+def _decode_date(block: np.ndarray) -> pd.Series:
+    """AAAAMMDD -> datetime64 (NaT para vazio/00000000/inválido)"""
+    digits = block.astype(np.int64) - ord('0')
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    weights = 10 ** np.arange(7, -1, -1)
+    value = (digits * weights).sum(axis=1).astype(float)
+    value[~valid | (value == 0)] = np.nan
+    return pd.to_datetime(pd.Series(value), format='%Y%m%d', errors='coerce')
+
+
+class Sisaih01Processor:
+    """Processador de arquivos SISAIH01 em lote"""
+
+    def __init__(self, file_path: str, competencia: Optional[str] = None,
+                 layout: Dict[str, Tuple[int, int, str]] = LAYOUT_SISAIH01):
+        self.file_path = Path(file_path)
+        self.competencia = competencia
+        self.layout = CompiledLayout(layout)
+        self.records: Optional[pd.DataFrame] = None
+        self.stats = {
+            'total_lines': 0,
+            'valid_records': 0,
+            'ignored_lines': 0,
+            'chunks': 0
+        }
+
+    def process(self) -> pd.DataFrame:
+        """Processa o arquivo completo e retorna colunas tipadas"""
+        logger.info(f"🚀 Iniciando processamento SISAIH01: {self.file_path}")
+
+        if self.file_path.stat().st_size == 0:
+            # mmap não aceita arquivo vazio
+            chunks = [self._parse_chunk(np.zeros(0, dtype=np.uint8), np.zeros(0, np.int64), np.zeros(0, np.int64))]
+        else:
+            with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                buf = np.frombuffer(mm, dtype=np.uint8)
+                try:
+                    chunks = self._parse_buffer(buf)
+                finally:
+                    # Liberar a view antes de fechar o mmap
+                    del buf
+
+        self.records = pd.concat(chunks, ignore_index=True)
+        self.stats['valid_records'] = len(self.records)
+        self.stats['ignored_lines'] = self.stats['total_lines'] - self.stats['valid_records']
+
+        logger.info(f"✅ Processamento concluído: {self.stats['valid_records']} registros "
+                    f"({self.stats['ignored_lines']} linhas ignoradas)")
+        return self.records
+
+    def _parse_buffer(self, buf: np.ndarray) -> List[pd.DataFrame]:
+        """Divide o arquivo em blocos de linhas para limitar a memória"""
+        starts, ends = _line_bounds(buf)
+        self.stats['total_lines'] = len(starts)
+
+        chunks = []
+        for offset in range(0, max(len(starts), 1), CHUNK_LINES):
+            chunks.append(self._parse_chunk(buf, starts[offset:offset + CHUNK_LINES],
+                                            ends[offset:offset + CHUNK_LINES]))
+            self.stats['chunks'] += 1
+        return chunks
+
+    def _parse_chunk(self, buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> pd.DataFrame:
+        """Converte um bloco de linhas em DataFrame (um slice de colunas por campo)"""
+        records = RecordBlock(buf, starts, ends, self.layout.width)
+
+        # Apenas AIH Principal, Continuação e Longa Permanência
+        ident_start, ident_end = self.layout.ident
+        ident = _decode_text(records.field(ident_start, ident_end))
+        records.select(np.isin(ident, VALID_AIH_TYPES))
+
+        columns: Dict[str, Any] = {}
+        for name, (start, end, column) in self.layout.fields:
+            block = records.field(start, end)
+            if name in DATE_FIELDS:
+                columns[column] = _decode_date(block)
+            else:
+                columns[column] = _decode_text(block)
+
+        df = pd.DataFrame(columns)
+        if self.competencia:
+            df['competencia'] = self.competencia
+        df['tipo_aih_descricao'] = df['tipo_aih'].map(TIPO_AIH_DESCRICAO).astype('category')
+        df['sexo_descricao'] = np.where(df['sexo'] == 'M', 'Masculino', 'Feminino')
+        return df
+
+    def statistics(self) -> Dict[str, Any]:
+        """Estatísticas equivalentes a gerarEstatisticas() do frontend"""
+        df = self.records if self.records is not None else self.process()
+        return {
+            'total_registros': int(len(df)),
+            'pacientes_unicos': int(df.loc[df['cns'] != '', 'cns'].nunique()),
+            'total_masculino': int((df['sexo'] == 'M').sum()),
+            'total_feminino': int((df['sexo'] == 'F').sum()),
+            'por_tipo': {
+                'principal': int((df['tipo_aih'] == '01').sum()),
+                'continuacao': int((df['tipo_aih'] == '03').sum()),
+                'longa_permanencia': int((df['tipo_aih'] == '05').sum()),
+            }
+        }
+
+    def to_analytics_rows(self, procedure_values: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Linhas no schema Row do analytics_py (doctor_*, discharge_date, aih_value)
+
+        O SISAIH01 não traz nome do médico nem valor: o documento do médico
+        responsável vai em doctor_name/doctor_cns, e aih_value usa o valor
+        SIGTAP do procedimento realizado quando procedure_values é informado.
+        """
+        df = self.records if self.records is not None else self.process()
+        df = df[df['data_saida'].notna()]
+        doctor = df['medico_responsavel']
+        if procedure_values:
+            digits_values = {''.join(ch for ch in code if ch.isdigit()): value
+                             for code, value in procedure_values.items()}
+            value = df['procedimento_realizado'].map(digits_values).fillna(0.0)
+        else:
+            value = pd.Series(0.0, index=df.index)
+        rows = pd.DataFrame({
+            'doctor_id': None,
+            'doctor_name': doctor,
+            'doctor_cns': doctor.where(doctor != '', None),
+            'discharge_date': df['data_saida'].dt.strftime('%Y-%m-%d'),
+            'aih_value': value.astype(float),
+        })
+        return rows.to_dict(orient='records')
+
+    def save_csv(self, output_path: str):
+        """Salva registros em CSV (';', UTF-8 com BOM, como o export do frontend)"""
+        df = self.records if self.records is not None else self.process()
+        df.to_csv(output_path, sep=';', index=False, encoding='utf-8-sig', date_format='%Y-%m-%d')
+        logger.info(f"💾 Arquivo CSV salvo: {output_path}")
+        return output_path
+
+
+def _load_procedure_values(sigtap_json: str) -> Dict[str, float]:
+    """Valor SIGTAP (SH + SP) por código, a partir do sigtap_structured.json"""
+    with open(sigtap_json, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {
+        p['code']: float(p.get('value_hosp') or 0) + float(p.get('value_prof') or 0)
+        for p in data.get('procedures', [])
+    }
+
+
+# Script de uso
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Processador SISAIH01 (layout posicional DATASUS)")
+    parser.add_argument('file_path', help="arquivo SISAIH01 (.txt)")
+    parser.add_argument('--competencia', default=None, help="competência AAAAMM (padrão: APRES_LOTE do arquivo)")
+    parser.add_argument('-o', '--output', default='sisaih01_registros.csv', help="CSV de saída")
+    parser.add_argument('--analytics-json', default=None,
+                        help="também grava linhas no schema do analytics_py (JSON)")
+    parser.add_argument('--sigtap-json', default=None,
+                        help="sigtap_structured.json para valorar aih_value pelo procedimento realizado")
+    args = parser.parse_args()
+
+    processor = Sisaih01Processor(args.file_path, competencia=args.competencia)
+    processor.process()
+    processor.save_csv(args.output)
+    print(f"📊 Estatísticas: {json.dumps(processor.statistics(), ensure_ascii=False)}")
+
+    if args.analytics_json:
+        values = _load_procedure_values(args.sigtap_json) if args.sigtap_json else None
+        with open(args.analytics_json, 'w', encoding='utf-8') as f:
+            json.dump({'rows': processor.to_analytics_rows(values)}, f, ensure_ascii=False)
+        print(f"💾 Linhas para analytics salvas: {args.analytics_json}")
+
+    print(f"🎉 Processamento concluído! Arquivo salvo: {args.output}")
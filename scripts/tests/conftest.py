@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os scripts são módulos soltos (sem pacote), importados pelo nome
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
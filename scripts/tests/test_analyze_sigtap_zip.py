@@ -0,0 +1,36 @@
+import pytest
+
+from analyze_sigtap_zip import _build_key_sketches, _sketch_containment, _sketch_profile
+from sigtap_bench_fixtures import generate_procedures, write_zip
+from sigtap_benchmark import check_relationships
+
+
+@pytest.mark.parametrize('count', [50, 400, 600, 800, 2000])
+def test_foreign_keys_inferred_at_every_size(tmp_path, count):
+    archive = tmp_path / 'corpus.zip'
+    write_zip(str(archive), generate_procedures(count, seed=42))
+    assert check_relationships({'zip': archive}) == []
+
+
+def test_uniqueness_is_exact_beyond_sketch_size():
+    rows = [{'CO_PROCEDIMENTO': f'{i:010d}'} for i in range(5000)]
+    sketch = _build_key_sketches(rows, ['CO_PROCEDIMENTO'], k=256)['CO_PROCEDIMENTO']
+    assert len(sketch['hashes']) == 256
+    profile = _sketch_profile(sketch)
+    assert profile['distinct'] == 5000
+    assert profile['uniqueness'] == 1.0
+
+
+def test_uniqueness_counts_repeated_values():
+    rows = [{'CO_CID': f'A{i % 100:03d}'} for i in range(1000)]
+    profile = _sketch_profile(_build_key_sketches(rows, ['CO_CID'])['CO_CID'])
+    assert profile['distinct'] == 100
+    assert profile['uniqueness'] == 0.1
+
+
+def test_containment_of_subset_and_disjoint_columns():
+    parent = _build_key_sketches([{'C': str(i)} for i in range(3000)], ['C'])['C']
+    child = _build_key_sketches([{'C': str(i)} for i in range(0, 3000, 7)], ['C'])['C']
+    other = _build_key_sketches([{'C': f'x{i}'} for i in range(500)], ['C'])['C']
+    assert _sketch_containment(child, parent) == 1.0
+    assert _sketch_containment(other, parent) == 0.0
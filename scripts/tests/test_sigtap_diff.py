@@ -0,0 +1,41 @@
+import json
+
+from sigtap_diff import SigtapDiff, age_in_months, normalize_fields
+
+
+def _write(path, procedures):
+    path.write_text(json.dumps({'procedures': procedures}), encoding='utf-8')
+    return str(path)
+
+
+def test_ages_compared_in_months():
+    assert age_in_months(18, 'ANOS') == 216
+    assert age_in_months(216, 'MESES') == 216
+    assert age_in_months(18, '') == 216
+    assert age_in_months(9999, 'MESES') == age_in_months(9999, '') == 9999
+    # Planilha (anos) x ZIP (meses): mesma idade, mesmo registro
+    sheet = {'code': '03.01.01.007-2', 'description': 'CONSULTA', 'min_age': 18, 'max_age': 9999}
+    zipped = {**sheet, 'min_age': 216, 'min_age_unit': 'MESES', 'max_age_unit': 'MESES'}
+    assert normalize_fields(sheet) == normalize_fields(zipped)
+
+
+def test_added_removed_and_changed(tmp_path):
+    previous = _write(tmp_path / 'previous.json', [
+        {'code': '03.01.01.007-2', 'description': 'CONSULTA', 'value_prof': 10.0, 'min_age': 18},
+        {'code': '04.07.04.010-2', 'description': 'HERNIOPLASTIA', 'value_hosp': 350.5},
+        {'code': '04.09.03.002-3', 'description': 'PROSTATECTOMIA'},
+    ])
+    current = _write(tmp_path / 'current.json', [
+        {'code': '03.01.01.007-2', 'description': 'CONSULTA', 'value_prof': 10.004,
+         'min_age': 216, 'min_age_unit': 'MESES'},
+        {'code': '04.07.04.010-2', 'description': 'HERNIOPLASTIA', 'value_hosp': 370.0},
+        {'code': '04.07.04.010-2', 'description': 'DUPLICADO', 'value_hosp': 1.0},
+        {'code': '02.02.01.047-3', 'description': 'HEMOGRAMA'},
+    ])
+    output = SigtapDiff(previous, current).run()
+    assert output['added'] == ['02.02.01.047-3']
+    assert output['removed'] == ['04.09.03.002-3']
+    assert output['changed'] == [{'code': '04.07.04.010-2', 'changes': {'value_hosp': {'old': 350.5, 'new': 370.0}}}]
+    assert [record['code'] for record in output['upsert']] == ['02.02.01.047-3', '04.07.04.010-2']
+    stats = output['metadata']['diff_stats']
+    assert (stats['unchanged'], stats['value_changes'], stats['current_procedures']) == (1, 1, 3)
@@ -0,0 +1,79 @@
+import argparse
+import json
+
+import pytest
+
+from sigtap_processor import ProcedureMergeStore, SigtapProcedure, SigtapProcessor, parse_merge_policy
+
+
+def _procedure(description='CONSULTA', **values):
+    return SigtapProcedure(code='03.01.01.007-2', description=description, **values)
+
+
+def test_policies_per_field():
+    store = ProcedureMergeStore()
+    store.add(_procedure(description='CONSULTA', complexity='', value_prof=0.0, cid=['A00'], cbo=['225125']))
+    store.add(_procedure(description='CONSULTA MEDICA', complexity='MC', value_prof=10.0, cid=['B00', 'A00'],
+                         cbo=['225125']))
+    store.add(_procedure(description='OUTRA', complexity='AC', value_prof=20.0, cid=['C00']))
+    [merged] = store.procedures()
+    assert merged.description == 'CONSULTA MEDICA'  # longest
+    assert merged.complexity == 'MC'                # primeiro não vazio
+    assert merged.value_prof == 10.0                # primeiro diferente de zero
+    assert merged.cid == ['A00', 'B00', 'C00']      # união na ordem de chegada
+    assert merged.cbo == ['225125']
+    summary = store.summary()
+    assert (summary['received'], summary['unique'], summary['duplicates']) == (3, 1, 2)
+    assert summary['policies']['value_prof'] == 'first'
+
+
+def test_first_keeps_the_first_filled_value():
+    store = ProcedureMergeStore({'description': 'first'})
+    store.add(_procedure(description=''))
+    store.add(_procedure(description='CONSULTA'))
+    store.add(_procedure(description='CONSULTA MEDICA'))
+    assert store.procedures()[0].description == 'CONSULTA'
+    assert store.summary()['conflicts_by_policy']['first'] == 1
+
+
+def test_union_can_be_replaced_by_first():
+    store = ProcedureMergeStore({'cid': 'first'})
+    store.add(_procedure(cid=['A00']))
+    store.add(_procedure(cid=['B00']))
+    assert store.procedures()[0].cid == ['A00']
+
+
+def test_merge_does_not_touch_the_callers_objects():
+    first = _procedure(description='CONSULTA', value_prof=0.0, cid=['A00'])
+    second = _procedure(description='CONSULTA MEDICA', value_prof=10.0, cid=['B00'])
+    store = ProcedureMergeStore()
+    store.add(first)
+    store.add(second)
+    assert (first.description, first.value_prof, first.cid) == ('CONSULTA', 0.0, ['A00'])
+    assert (second.description, second.value_prof, second.cid) == ('CONSULTA MEDICA', 10.0, ['B00'])
+    merged = store.procedures()[0]
+    assert merged is not first
+    merged.cid.append('Z99')
+    assert first.cid == ['A00']
+
+
+def test_invalid_policies_are_rejected():
+    with pytest.raises(ValueError, match='inválida'):
+        ProcedureMergeStore({'cid': 'nonzero'})
+    with pytest.raises(ValueError, match='sem política'):
+        ProcedureMergeStore({'code': 'first'})
+    assert parse_merge_policy('cid = first') == ('cid', 'first')
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_merge_policy('value_prof=nonzero')
+
+
+def test_saved_profile_covers_every_stage_before_the_write(tmp_path):
+    processor = SigtapProcessor.from_procedures('sigtap.xlsx', [_procedure(), _procedure(description='CONSULTA MEDICA')])
+    processor.profiler.enabled = True
+    path = processor.save_json(str(tmp_path / 'sigtap_structured.json'))
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)['metadata']['processing_stats']['profile']
+    assert saved['json_build']['rows'] == 1
+    assert 'json_dump' not in saved
+    # O perfil em memória (resumo do console) inclui a escrita
+    assert processor.stats['profile']['json_dump']['rows'] == 1
@@ -0,0 +1,18 @@
+import pytest
+
+from sigtap_processor import SigtapProcedure
+from sigtap_snapshot import MANIFEST_FILE, write_snapshot
+
+
+@pytest.mark.parametrize('code', ['03.01.01.007-2 CONSULTA', '03.01.01.007-2X', '03.01.01.ÓÓ7-2'])
+def test_codes_that_do_not_fit_the_index_are_rejected(tmp_path, code):
+    procedures = [SigtapProcedure(code='03.01.01.007-2', description='OK'), SigtapProcedure(code=code, description='X')]
+    with pytest.raises(ValueError, match='Código SIGTAP'):
+        write_snapshot(procedures, str(tmp_path / 'snapshot'))
+    # Nada é gravado: sem manifest o snapshot não existe
+    assert not (tmp_path / 'snapshot').exists()
+
+
+def test_valid_codes_write_a_manifest(tmp_path):
+    out = write_snapshot([SigtapProcedure(code='03.01.01.007-2', description='CONSULTA')], str(tmp_path / 'snapshot'))
+    assert (out / MANIFEST_FILE).exists()
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sisaih01_processor
+from sisaih01_processor import RecordBlock, Sisaih01Processor
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+# Saída de parseLinhaSISAIH01 (src/utils/sisaih01Parser.ts) para sisaih01_sample.txt
+TS_EXPECTED = json.loads((FIXTURES / 'sisaih01_ts_expected.json').read_text(encoding='utf-8'))
+DATE_COLUMNS = ['data_emissao', 'data_internacao', 'data_saida', 'data_nascimento']
+
+
+def _as_ts_records(df: pd.DataFrame) -> list:
+    """Registros do processador no formato do parser TS (datas ISO ou None)"""
+    out = df.copy()
+    for column in DATE_COLUMNS:
+        out[column] = out[column].dt.strftime('%Y-%m-%d').astype(object).where(out[column].notna(), None)
+    out['tipo_aih_descricao'] = out['tipo_aih_descricao'].astype(str)
+    return out.to_dict(orient='records')
+
+
+@pytest.mark.parametrize('chunk_lines', [sisaih01_processor.CHUNK_LINES, 2])
+def test_fields_match_frontend_parser(monkeypatch, chunk_lines):
+    monkeypatch.setattr(sisaih01_processor, 'CHUNK_LINES', chunk_lines)
+    records = _as_ts_records(Sisaih01Processor(str(FIXTURES / 'sisaih01_sample.txt')).process())
+
+    assert len(records) == len(TS_EXPECTED)
+    for got, expected in zip(records, TS_EXPECTED):
+        for column, value in got.items():
+            if column in expected:
+                assert value == expected[column], column
+
+
+def test_statistics_match_fixture():
+    stats = Sisaih01Processor(str(FIXTURES / 'sisaih01_sample.txt')).statistics()
+    assert stats['total_registros'] == 4
+    assert stats['por_tipo'] == {'principal': 2, 'continuacao': 1, 'longa_permanencia': 1}
+    assert (stats['total_masculino'], stats['total_feminino']) == (3, 1)
+
+
+def _lines_buffer(lines):
+    data = b'\n'.join(lines)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    starts, ends = sisaih01_processor._line_bounds(buf)
+    return buf, starts, ends
+
+
+def _expected_field(lines, start, end):
+    kept = [line for line in lines if len(line) >= sisaih01_processor.MIN_LINE_LENGTH]
+    return np.array([list(line[start:end].ljust(end - start)) for line in kept], dtype=np.uint8)
+
+
+def test_record_block_mixed_lengths_matches_per_line_slicing():
+    rng = np.random.default_rng(7)
+    lines = [b'H' * 150]
+    lines += [bytes(rng.integers(65, 91, size=700, dtype=np.uint8)) for _ in range(50)]
+    lines += [bytes(rng.integers(65, 91, size=550, dtype=np.uint8)), b'X' * 700, b'curta']
+    lines += [bytes(rng.integers(65, 91, size=700, dtype=np.uint8)) for _ in range(20)]
+    buf, starts, ends = _lines_buffer(lines)
+
+    records = RecordBlock(buf, starts, ends, width=663)
+    # Cabeçalho e linha curta quebram trechos; o resto continua em views
+    assert sum(view is not None for _, _, view in records.segments) >= 2
+    for start, end in [(0, 10), (500, 560), (640, 663)]:
+        np.testing.assert_array_equal(records.field(start, end), _expected_field(lines, start, end))
+
+    keep = np.arange(len(starts)) % 3 == 0
+    records.select(keep)
+    np.testing.assert_array_equal(records.field(500, 560), _expected_field(lines, 500, 560)[keep])
+
+
+def test_record_block_uniform_lines_are_a_view():
+    lines = [bytes([65 + i % 26]) * 700 for i in range(10)]
+    buf, starts, ends = _lines_buffer(lines)
+    records = RecordBlock(buf, starts, ends, width=663)
+    assert len(records.segments) == 1
+    assert np.shares_memory(records.field(43, 56), buf)